@@ -0,0 +1,91 @@
+"""
+AIMD concurrency window: how many portal pages to load at the same time.
+
+The same file lives in docker-scraper/ and API-php/ (separate Docker build
+contexts) - keep both copies in sync.
+
+Additive increase, multiplicative decrease, as in TCP congestion control:
+every scrape the portal answered normally grows the window by 1/size (so by
+one page per window of successes); a congestion signal - a timeout, an error
+page such as "did not load correctly", or a latency several times the usual
+one - cuts it by `decrease`. At most one cut per round trip: signals from
+scrapes started before the last cut are ignored, so one burst of failures
+halves the window once instead of collapsing it to the minimum.
+
+    window = AIMDWindow(max_size=4, on_change=lambda old, new, why: print(...))
+    started = time.monotonic()
+    ...scrape while window.size allows...
+    window.on_success(time.monotonic() - started, started)   # or on_congestion("timeout", started)
+
+The caller gates its own workers on `size` (asyncio, process pool); this
+class only keeps the arithmetic.
+"""
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+# A success slower than SLOW_FACTOR x the usual latency of its kind counts as congestion
+SLOW_FACTOR = 3.0
+# Latencies below this never count as slow (cache-warm pages vary a lot in relative terms)
+SLOW_FLOOR_S = 5.0
+# Weight of a new sample in the usual latency (EWMA); low, so a slow spell is not learned as normal at once
+BASELINE_ALPHA = 0.1
+
+
+class AIMDWindow:
+    def __init__(self, max_size: int, min_size: int = 1, initial: Optional[int] = None,
+                 decrease: float = 0.5, slow_factor: float = SLOW_FACTOR,
+                 on_change: Optional[Callable[[int, int, str], None]] = None):
+        self.max_size = max(1, max_size)
+        self.min_size = max(1, min(min_size, self.max_size))
+        self.decrease = decrease
+        self.slow_factor = slow_factor
+        self.on_change = on_change
+        self._size = float(min(self.max_size, max(self.min_size, initial or self.min_size)))
+        self._last_cut = float("-inf")
+        self._baseline: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        # Run statistics (summaries / metrics)
+        self.low = self.high = self.size
+        self.decreases: Dict[str, int] = {}
+
+    @property
+    def size(self) -> int:
+        """Pages allowed in flight now."""
+        return int(self._size)
+
+    def _set(self, value: float, reason: str) -> None:
+        old = self.size
+        self._size = min(float(self.max_size), max(float(self.min_size), value))
+        new = self.size
+        if new != old:
+            self.low, self.high = min(self.low, new), max(self.high, new)
+            if self.on_change is not None:
+                self.on_change(old, new, reason)
+
+    def on_success(self, latency_s: float, started_at: float, kind: str = "page") -> None:
+        """A scrape the portal answered normally, started at started_at (time.monotonic())."""
+        with self._lock:
+            usual = self._baseline.get(kind)
+            self._baseline[kind] = latency_s if usual is None else usual + BASELINE_ALPHA * (latency_s - usual)
+            if usual is not None and latency_s > max(SLOW_FLOOR_S, self.slow_factor * usual):
+                self._cut(f"slow {kind} ({latency_s:.1f}s, usually {usual:.1f}s)", started_at)
+                return
+            self._set(self._size + 1.0 / max(1, self.size), "increase")
+
+    def on_congestion(self, reason: str, started_at: float) -> None:
+        """The portal timed out or served an error page for a scrape started at started_at."""
+        with self._lock:
+            self._cut(reason, started_at)
+
+    def _cut(self, reason: str, started_at: float) -> None:
+        if started_at < self._last_cut:
+            return  # already cut for this round trip
+        self._last_cut = time.monotonic()
+        kind = reason.split(" (")[0]
+        self.decreases[kind] = self.decreases.get(kind, 0) + 1
+        self._set(self._size * self.decrease, reason)
+
+    def summary(self) -> str:
+        cuts = ", ".join(f"{n} {reason}" for reason, n in sorted(self.decreases.items())) or "none"
+        return f"{self.size} (range {self.low}-{self.high} of {self.max_size}; cuts: {cuts})"
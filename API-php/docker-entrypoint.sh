@@ -35,6 +35,10 @@ for i in {1..15}; do
     sleep 1
 done
 
+# Start persistent Python Scraper Server (keeps one Chromium warm)
+echo "Starting Python Scraper Server..."
+python3 scraper.py --serve --port "${SCRAPER_PORT:-3001}" > /tmp/scraper.log 2>&1 &
+
 # Start Nginx in foreground
 echo "Starting Nginx..."
 exec nginx -g 'daemon off;'
@@ -0,0 +1,75 @@
+/*
+ * Read every field of an activity details page in one pass.
+ *
+ * The same file lives in docker-scraper/ (Selenium: execute_script) and
+ * API-php/ (Playwright: page.evaluate) - keep both copies in sync.
+ *
+ * Argument: absolute XPaths {code, name, tbody, eligible, no_approval}.
+ * Returns:
+ *   lang              - document language ('en' / 'ar' / '')
+ *   activity_code     - string ('' when the page is not a details page)
+ *   name              - activity name in the page language
+ *   locations         - [[main_location, sub_location, fee], ...]
+ *   eligible          - [requirement, ...]
+ *   approvals         - [{title, agency}, ...] from the accordion; collapsed
+ *                       panels are read through textContent, so no clicks are
+ *                       needed. agency is '' when the panel body is injected
+ *                       lazily (the caller then clicks that one heading).
+ *   approvals_heading - true if the "Required Approvals" heading is present
+ *   no_approval_text  - text of the "no approval" block ('' if absent)
+ *                       With no panel read, these two tell "no approvals"
+ *                       from "approvals failed to load" (read_approvals).
+ */
+(function (x) {
+    function node(xpath) {
+        return document.evaluate(xpath, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+    }
+    function nodes(xpath) {
+        var out = [];
+        var res = document.evaluate(xpath, document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+        for (var i = 0; i < res.snapshotLength; i++) out.push(res.snapshotItem(i));
+        return out;
+    }
+    function text(el) {
+        return el ? ((el.innerText || el.textContent || '') + '').replace(/\s+/g, ' ').trim() : '';
+    }
+
+    var locations = [];
+    var tbody = node(x.tbody);
+    if (tbody) {
+        Array.prototype.forEach.call(tbody.querySelectorAll(':scope > tr'), function (tr) {
+            var cells = Array.prototype.slice.call(tr.querySelectorAll(':scope > td'), 0, 3).map(text);
+            while (cells.length < 3) cells.push('');
+            if (cells[0] || cells[1] || cells[2]) locations.push(cells);
+        });
+    }
+
+    var eligible = nodes(x.eligible + '/li').map(text).filter(function (t) { return t; });
+
+    var approvals = [];
+    for (var i = 0; i < 12; i++) {
+        var btn = document.querySelector('#heading' + i + ' > button');
+        if (!btn) break;
+        var title = text(btn);
+        if (title && /^\d/.test(title) && title.slice(0, 5).indexOf('.') !== -1) {
+            title = title.slice(title.indexOf('.') + 1).trim();
+        }
+        // Hidden (collapsed) content is still in the DOM: textContent, not innerText
+        var agencyEl = node("//*[@id='collapse" + i + "']/div/div/div[1]/div[2]");
+        var agency = agencyEl ? (agencyEl.textContent || '').replace(/\s+/g, ' ').trim() : '';
+        approvals.push({title: title, agency: agency});
+    }
+
+    var headingXpath = "//h4[contains(text(), 'الموافقات المطلوبة') or contains(text(), 'Required Approvals')]";
+
+    return {
+        lang: (document.documentElement.lang || '').toLowerCase().slice(0, 2),
+        activity_code: text(node(x.code)),
+        name: text(node(x.name)),
+        locations: locations,
+        eligible: eligible,
+        approvals: approvals,
+        approvals_heading: !!node(headingXpath),
+        no_approval_text: text(node(x.no_approval))
+    };
+})
@@ -10,6 +10,8 @@
  * 6. Click "Activity Scraper" > "Start Processing" to begin
  * 
  * The script will process rows in batches to avoid timeout issues.
+ * Each batch of BATCH_SIZE codes is sent as one `?codes=` request, so the
+ * server launches/uses one browser session per batch instead of per row.
  */
 
 const CONFIG = {
@@ -102,58 +104,70 @@ function continueProcessing() {
 
     // Process rows until time runs out or we finish
     while (currentRow <= lastRow) {
-        // Check execution time BEFORE processing the row
+        // Check execution time BEFORE processing the batch
         // If we are already past 4 minutes, stop now to be safe
         const elapsed = (new Date() - executionStartTime) / 1000;
         if (elapsed > CONFIG.MAX_EXECUTION_TIME) {
             break;
         }
 
-        const code = sheet.getRange(currentRow, CONFIG.CODE_COLUMN).getValue();
-
-        // Skip if no code
-        if (!code || code.toString().trim() === "") {
-            currentRow++;
-            continue;
+        // Collect the next BATCH_SIZE rows that have a code
+        const batch = [];
+        let nextRow = currentRow;
+        while (nextRow <= lastRow && batch.length < CONFIG.BATCH_SIZE) {
+            const code = sheet.getRange(nextRow, CONFIG.CODE_COLUMN).getValue();
+            if (code && code.toString().trim() !== "") {
+                batch.push({ row: nextRow, code: code.toString().trim() });
+                // Update status to "Processing..."
+                sheet.getRange(nextRow, CONFIG.STATUS_COLUMN).setValue("Processing...");
+            }
+            nextRow++;
         }
-
-        // Update status to "Processing..."
-        sheet.getRange(currentRow, CONFIG.STATUS_COLUMN).setValue("Processing...");
         SpreadsheetApp.flush();
 
+        // One request (one browser session on the server) for the whole batch
+        let results = {};
+        let batchError = null;
         try {
-            // Fetch data
-            const data = fetchOne(code);
+            results = fetchBatch(batch.map(item => item.code));
+        } catch (err) {
+            batchError = err;
+        }
+
+        batch.forEach(item => {
+            if (batchError) {
+                sheet.getRange(item.row, CONFIG.STATUS_COLUMN).setValue("Error: " + batchError.message);
+                totalErrors++;
+                return;
+            }
+
+            const data = results[item.code] || ["Error: No result returned", "", "", "", ""];
 
             // Check if error
             if (data[0] && (data[0].includes("Error:") || data[0].includes("Timeout:") || data[0].includes("Script Error:"))) {
-                sheet.getRange(currentRow, CONFIG.STATUS_COLUMN).setValue("Error");
+                sheet.getRange(item.row, CONFIG.STATUS_COLUMN).setValue("Error");
                 // Write the actual error message to Column C (AR Name column) so user can see it
-                sheet.getRange(currentRow, CONFIG.DATA_START_COLUMN).setValue(data[0]);
+                sheet.getRange(item.row, CONFIG.DATA_START_COLUMN).setValue(data[0]);
                 totalErrors++;
             } else {
                 // Write data to columns C, D, E, F, G
-                sheet.getRange(currentRow, CONFIG.DATA_START_COLUMN, 1, 5).setValues([data]);
+                sheet.getRange(item.row, CONFIG.DATA_START_COLUMN, 1, 5).setValues([data]);
 
                 // Mark as completed
-                sheet.getRange(currentRow, CONFIG.STATUS_COLUMN).setValue("Completed");
+                sheet.getRange(item.row, CONFIG.STATUS_COLUMN).setValue("Completed");
                 totalProcessed++;
             }
-            SpreadsheetApp.flush();
-
-            // Small delay
-            Utilities.sleep(500);
-
-        } catch (err) {
-            sheet.getRange(currentRow, CONFIG.STATUS_COLUMN).setValue("Error: " + err.message);
-            totalErrors++;
-        }
+        });
+        SpreadsheetApp.flush();
 
-        currentRow++;
+        currentRow = nextRow;
 
-        // Save progress after EVERY row to be safe
+        // Save progress after EVERY batch to be safe
         properties.setProperty('LAST_PROCESSED_ROW', currentRow.toString());
         properties.setProperty('TOTAL_PROCESSED', totalProcessed.toString());
+
+        // Small delay
+        Utilities.sleep(500);
     }
 
     // Calculate timing
@@ -227,6 +241,40 @@ function deleteAllTriggers() {
     }
 }
 
+/**
+ * Converts one API result ({status, data, error}) into a sheet row.
+ *
+ * @param {Object} json Parsed API result.
+ * @return {Array<string>} The details (AR Name, EN Name, Location, Eligible, Approvals).
+ */
+function resultToRow(json) {
+    if (json.status === "error") {
+        return [`API Error: ${json.message || json.error}`, "", "", "", ""];
+    }
+
+    if (json.status === "success" && json.data) {
+        const d = json.data;
+
+        // Google Sheets has a 50,000 character limit per cell
+        const truncate = (str, maxLen = 45000) => {
+            if (!str) return "N/A";
+            if (str.length <= maxLen) return str;
+            return str.substring(0, maxLen) + "... [TRUNCATED]";
+        };
+
+        // Order of columns: AR Name | EN Name | Locations | Eligible | Approvals
+        return [
+            truncate(d.name_ar, 1000),
+            truncate(d.name_en, 1000),
+            truncate(d.locations, 10000),
+            truncate(d.eligible, 5000),
+            truncate(d.approvals, 25000)
+        ];
+    }
+
+    return ["Unknown Error", "", "", "", ""];
+}
+
 /**
  * Fetches activity details and returns a row of data.
  *
@@ -283,40 +331,18 @@ function fetchOne(code) {
             }
         }
 
-        if (json.status === "error") {
-            return [`API Error: ${json.message}`, "", "", "", ""];
-        }
+        const result = resultToRow(json);
 
         if (json.status === "success" && json.data) {
-            const d = json.data;
-
-            // Google Sheets has a 50,000 character limit per cell
-            const truncate = (str, maxLen = 45000) => {
-                if (!str) return "N/A";
-                if (str.length <= maxLen) return str;
-                return str.substring(0, maxLen) + "... [TRUNCATED]";
-            };
-
-            // Order of columns: AR Name | EN Name | Locations | Eligible | Approvals
-            const result = [
-                truncate(d.name_ar, 1000),
-                truncate(d.name_en, 1000),
-                truncate(d.locations, 10000),
-                truncate(d.eligible, 5000),
-                truncate(d.approvals, 25000)
-            ];
-
             // Cache the result for 6 hours (21600 seconds)
             try {
                 cache.put(cacheKey, JSON.stringify(result), 21600);
             } catch (e) {
                 // Cache failed, not critical
             }
-
-            return result;
         }
 
-        return ["Unknown Error", "", "", "", ""];
+        return result;
 
     } catch (err) {
         // Check if it's a timeout error
@@ -326,3 +352,80 @@ function fetchOne(code) {
         return [`Script Error: ${err.message}`, "", "", "", ""];
     }
 }
+
+/**
+ * Fetches several activity codes in one request (`?codes=a,b,c`).
+ * The API answers with NDJSON, one line per code.
+ *
+ * @param {Array<string>} codes The activity codes.
+ * @return {Object<string, Array<string>>} Map of code -> row of data.
+ */
+function fetchBatch(codes) {
+    const cache = CacheService.getScriptCache();
+    const rows = {};
+    const missing = [];
+
+    codes.forEach(code => {
+        const cached = cache.get(`activity_${code}`);
+        if (cached) {
+            try {
+                rows[code] = JSON.parse(cached);
+                return;
+            } catch (e) {
+                // Cache corrupted, fetch it again
+            }
+        }
+        missing.push(code);
+    });
+
+    if (missing.length === 0) {
+        return rows;
+    }
+
+    const url = `${CONFIG.BASE_URL}${CONFIG.SCRIPT_PATH}?codes=${encodeURIComponent(missing.join(','))}`;
+
+    try {
+        const response = UrlFetchApp.fetch(url, { 'method': 'get', 'muteHttpExceptions': true });
+        const text = response.getContentText();
+        const responseCode = response.getResponseCode();
+
+        if (responseCode !== 200) {
+            missing.forEach(code => {
+                rows[code] = [`Error: HTTP ${responseCode}`, text.substring(0, 100), "", "", ""];
+            });
+            return rows;
+        }
+
+        text.split("\n").forEach(line => {
+            if (!line.trim()) return;
+            let json;
+            try {
+                json = JSON.parse(line);
+            } catch (e) {
+                return;
+            }
+            if (!json.code) return;
+
+            const result = resultToRow(json);
+            rows[json.code] = result;
+
+            if (json.status === "success" && json.data) {
+                try {
+                    cache.put(`activity_${json.code}`, JSON.stringify(result), 21600);
+                } catch (e) {
+                    // Cache failed, not critical
+                }
+            }
+        });
+
+    } catch (err) {
+        const message = err.message && err.message.includes("timeout")
+            ? "Timeout: API took too long. Try again."
+            : `Script Error: ${err.message}`;
+        missing.forEach(code => {
+            if (!rows[code]) rows[code] = [message, "", "", "", ""];
+        });
+    }
+
+    return rows;
+}
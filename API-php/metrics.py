@@ -0,0 +1,252 @@
+"""
+Prometheus metrics of the persistent scraper (GET /metrics in --serve mode).
+
+A small in-process registry that renders the Prometheus text format, so the
+service needs no extra dependency. Metrics live at module level; scraper.py
+updates them and handle_http serves `render()`.
+"""
+import functools
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+CONTENT_TYPE = "text/plain; version=0.0.4"
+
+# Seconds; portal pages take from well under a second (cache, fast path) to a minute (search fallbacks)
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120)
+
+LabelKey = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: LabelKey, extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelKey:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help_text, labelnames)
+        self._values: Dict[LabelKey, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_labels(self.labelnames, key)} {_number(value)}" for key, value in items]
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help_text, labelnames)
+        self._values: Dict[LabelKey, float] = {}
+        self._function: Optional[Callable[[], float]] = None
+
+    def set(self, value: float, **labels) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels) -> None:
+        self.inc(-amount, **labels)
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        """Read the (unlabelled) value from function at every scrape."""
+        self._function = function
+
+    @contextmanager
+    def track(self, **labels) -> Iterator[None]:
+        """+1 while the block runs."""
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+    def samples(self) -> List[str]:
+        if self._function is not None:
+            try:
+                return [f"{self.name} {_number(self._function())}"]
+            except Exception:
+                return []
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_labels(self.labelnames, key)} {_number(value)}" for key, value in items]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        # key -> (per-bucket counts, sum, count)
+        self._values: Dict[LabelKey, Tuple[List[int], float, int]] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            counts, total, count = self._values.get(key) or ([0] * len(self.buckets), 0.0, 0)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            self._values[key] = (counts, total + value, count + 1)
+
+    @contextmanager
+    def time(self, **labels) -> Iterator[None]:
+        """Observe the duration of the block (also when it raises)."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def samples(self) -> List[str]:
+        lines = []
+        with self._lock:
+            items = sorted((key, (list(c), s, n)) for key, (c, s, n) in self._values.items())
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                le = 'le="' + _number(bound) + '"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {count}")
+        return lines
+
+
+def timed(histogram: Histogram, **labels):
+    """Decorator: observe the duration of every call of a coroutine function."""
+    def decorate(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            with histogram.time(**labels):
+                return await func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+class Registry:
+    def __init__(self):
+        self.metrics: List[_Metric] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self.metrics:
+            lines.extend(metric.header())
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+def process_tree_rss(root_pid: Optional[int] = None) -> int:
+    """Resident memory (bytes) of root_pid and all its descendants (the Chromium processes), from /proc."""
+    root_pid = root_pid or os.getpid()
+    parents: Dict[int, int] = {}
+    rss_pages: Dict[int, int] = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat", "r") as f:
+                stat = f.read()
+        except OSError:
+            continue
+        # Fields after the ")" closing the command name: state ppid ... rss is field 24
+        fields = stat[stat.rfind(")") + 2:].split()
+        parents[int(entry)] = int(fields[1])
+        rss_pages[int(entry)] = int(fields[21])
+    tree = {root_pid}
+    changed = True
+    while changed:
+        changed = False
+        for pid, ppid in parents.items():
+            if ppid in tree and pid not in tree:
+                tree.add(pid)
+                changed = True
+    page_size = os.sysconf("SC_PAGE_SIZE")
+    return sum(rss_pages.get(pid, 0) for pid in tree) * page_size
+
+
+REGISTRY = Registry()
+
+REQUESTS = REGISTRY.register(Counter(
+    "scraper_http_requests_total", "HTTP requests by route and status code", ("route", "status")))
+REQUEST_SECONDS = REGISTRY.register(Histogram(
+    "scraper_http_request_seconds", "HTTP request latency by route", ("route",)))
+SCRAPES = REGISTRY.register(Counter(
+    "scraper_scrapes_total",
+    "Scrapes by path (cache, fast_path, direct, search, footer_search) and outcome (success, error)",
+    ("path", "outcome")))
+STAGE_SECONDS = REGISTRY.register(Histogram(
+    "scraper_stage_seconds", "Latency of the scrape stages (navigate, footer_search, extract, toggle, scrape)", ("stage",)))
+ACTIVE_PAGES = REGISTRY.register(Gauge(
+    "scraper_active_pages", "Browser pages currently scraping"))
+QUEUE_DEPTH = REGISTRY.register(Gauge(
+    "scraper_queue_depth", "Scrapes waiting for room in the concurrency window or a free browser context"))
+CONCURRENCY_WINDOW = REGISTRY.register(Gauge(
+    "scraper_concurrency_window", "Live scrapes allowed at the same time (AIMD window)"))
+CONCURRENCY_CUTS = REGISTRY.register(Counter(
+    "scraper_concurrency_cuts_total", "AIMD window decreases by signal (timeout, direct URL failed, slow ...)",
+    ("reason",)))
+IDLE_CONTEXTS = REGISTRY.register(Gauge(
+    "scraper_idle_contexts", "Browser contexts free in the pool"))
+BROWSER_MEMORY = REGISTRY.register(Gauge(
+    "scraper_browser_memory_bytes", "Resident memory of the scraper and its browser processes"))
+BROWSER_MEMORY.set_function(process_tree_rss)
+ACTIVE_PAGES.set(0)
+QUEUE_DEPTH.set(0)
+
+
+def render() -> str:
+    return REGISTRY.render()
@@ -0,0 +1,166 @@
+"""
+Typed records for scraped activity details.
+
+The same file lives in docker-scraper/ and API-php/ (separate Docker build
+contexts) - keep both copies in sync.
+
+Scrapers build `Activity` records from raw page values; the Sheets text
+("Main Location 1: ...", "Approval 1: ...") is only rendered at the edge by
+`sheet_fields()`. Records serialize to JSON, NDJSON and msgpack (optional
+dependency: `pip install msgpack`).
+"""
+import json
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+try:
+    import msgpack
+except ImportError:  # optional, only needed for to_msgpack/from_msgpack
+    msgpack = None
+
+SCHEMA_VERSION = 1
+
+# Sheet texts per language
+LABELS = {
+    "en": {
+        "location": "Main Location {i}: {main}\nSub Location {i}: {sub}\nFee {i}: {fee}",
+        "approval": "Approval {i}: {title}\nAgency {i}: {agency}",
+        "approval_title": "Approval {i}",
+        "no_agency": "Not specified",
+        "no_requirements": "No Business Requirements",
+        "no_approvals": "No Approvals Needed",
+        "approvals_error": "Error extracting approvals",
+    },
+    "ar": {
+        "location": "تصنيف الموقع {i}: {main}\nنوع الموقع {i}: {sub}\nالرسوم {i}: {fee}",
+        "approval": "الموافقة {i}: {title}\nالجهة {i}: {agency}",
+        "approval_title": "الموافقة {i}",
+        "no_agency": "غير محدد",
+        "no_requirements": "لا يوجد تفاصيل",
+        "no_approvals": "هذا النشاط لا يتطلب موافقة",
+        "approvals_error": "Error extracting approvals",
+    },
+}
+
+
+@dataclass(slots=True)
+class LocationFee:
+    main_location: str
+    sub_location: str
+    fee: str
+
+
+@dataclass(slots=True)
+class Approval:
+    title: str = ""   # "" -> rendered as "Approval {i}"
+    agency: str = ""  # "" -> rendered as "Not specified"
+
+
+@dataclass(slots=True)
+class Eligibility:
+    requirements: List[str] = field(default_factory=list)
+
+
+@dataclass(slots=True)
+class Activity:
+    """One activity code; locations/eligibility/approvals are in `lang`, names in both languages."""
+    code: str
+    lang: str = "en"
+    # None when that name could not be read (left out of sheet_fields, so the cell keeps its value)
+    name_en: Optional[str] = None
+    name_ar: Optional[str] = None
+    locations: List[LocationFee] = field(default_factory=list)
+    eligibility: Eligibility = field(default_factory=Eligibility)
+    # None when the approvals could not be read (rendered as an error, not as "none needed")
+    approvals: Optional[List[Approval]] = field(default_factory=list)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"schema": SCHEMA_VERSION, **asdict(self)}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Activity":
+        approvals = data.get("approvals")
+        return cls(
+            code=data["code"],
+            lang=data.get("lang", "en"),
+            name_en=data.get("name_en"),
+            name_ar=data.get("name_ar"),
+            locations=[LocationFee(**loc) for loc in data.get("locations", [])],
+            eligibility=Eligibility(**data.get("eligibility", {})),
+            approvals=None if approvals is None else [Approval(**a) for a in approvals],
+        )
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict(), ensure_ascii=False, separators=(",", ":"))
+
+    @classmethod
+    def from_json(cls, text: str) -> "Activity":
+        return cls.from_dict(json.loads(text))
+
+    def to_msgpack(self) -> bytes:
+        if msgpack is None:
+            raise RuntimeError("msgpack is not installed (pip install msgpack)")
+        return msgpack.packb(self.to_dict(), use_bin_type=True)
+
+    @classmethod
+    def from_msgpack(cls, payload: bytes) -> "Activity":
+        if msgpack is None:
+            raise RuntimeError("msgpack is not installed (pip install msgpack)")
+        return cls.from_dict(msgpack.unpackb(payload, raw=False))
+
+
+def dumps_ndjson(records: Iterable[Activity]) -> str:
+    return "".join(record.to_json() + "\n" for record in records)
+
+
+def loads_ndjson(lines: Iterable[str]) -> Iterator[Activity]:
+    for line in lines:
+        if line.strip():
+            yield Activity.from_json(line)
+
+
+# ----------------------------
+# Sheets rendering (edge only)
+# ----------------------------
+def render_locations(locations: List[LocationFee], lang: str = "en") -> str:
+    return "\n\n".join(
+        LABELS[lang]["location"].format(i=i, main=loc.main_location, sub=loc.sub_location, fee=loc.fee)
+        for i, loc in enumerate(locations, start=1)
+    )
+
+
+def render_eligibility(eligibility: Eligibility, lang: str = "en") -> str:
+    return "\n".join(eligibility.requirements) or LABELS[lang]["no_requirements"]
+
+
+def render_approvals(approvals: Optional[List[Approval]], lang: str = "en") -> str:
+    labels = LABELS[lang]
+    if approvals is None:
+        return labels["approvals_error"]
+    if not approvals:
+        return labels["no_approvals"]
+    return "\n\n".join(
+        labels["approval"].format(
+            i=i,
+            title=a.title or labels["approval_title"].format(i=i),
+            agency=a.agency or labels["no_agency"],
+        )
+        for i, a in enumerate(approvals, start=1)
+    )
+
+
+def sheet_fields(activity: Activity) -> Dict[str, str]:
+    """
+    The Sheets/API text of a record: activity_code, name_en, name_ar, locations,
+    eligible, approvals. `locations` is left out when the page had no location table,
+    a name when it could not be read.
+    """
+    fields = {"activity_code": activity.code}
+    for key in ("name_en", "name_ar"):
+        if getattr(activity, key) is not None:
+            fields[key] = getattr(activity, key)
+    fields["eligible"] = render_eligibility(activity.eligibility, activity.lang)
+    fields["approvals"] = render_approvals(activity.approvals, activity.lang)
+    if activity.locations:
+        fields["locations"] = render_locations(activity.locations, activity.lang)
+    return fields
@@ -0,0 +1,85 @@
+"""
+On-disk cache of scrape results (SQLite).
+
+Entries are keyed by (code, language, schema version), so bumping
+RESULT_SCHEMA_VERSION in scraper.py invalidates everything written with the
+old result layout. Entries expire after `ttl_s`; beyond `max_entries` the
+least recently used ones are evicted. Only successful results are cached.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    code        TEXT NOT NULL,
+    lang        TEXT NOT NULL,
+    schema      INTEGER NOT NULL,
+    result      TEXT NOT NULL,
+    created_at  REAL NOT NULL,
+    accessed_at REAL NOT NULL,
+    PRIMARY KEY (code, lang, schema)
+);
+CREATE INDEX IF NOT EXISTS results_accessed ON results (accessed_at);
+"""
+
+
+class ResultCache:
+    def __init__(self, path: str, schema_version: int, ttl_s: float = 86400.0, max_entries: int = 5000):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.schema_version = schema_version
+        self.ttl_s = ttl_s
+        self.max_entries = max(1, max_entries)
+        # One connection shared by the event loop and worker threads
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+
+    def get(self, code: str, lang: str, max_age: Optional[float] = None) -> Optional[Tuple[Dict[str, Any], float]]:
+        """(result, age in seconds) if a fresh entry exists, else None. max_age defaults to the TTL."""
+        limit = self.ttl_s if max_age is None else min(max_age, self.ttl_s)
+        now = time.time()
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT result, created_at FROM results WHERE code = ? AND lang = ? AND schema = ?",
+                (code, lang, self.schema_version),
+            ).fetchone()
+            if row is None or now - row[1] > limit:
+                return None
+            self.conn.execute(
+                "UPDATE results SET accessed_at = ? WHERE code = ? AND lang = ? AND schema = ?",
+                (now, code, lang, self.schema_version),
+            )
+            self.conn.commit()
+        return json.loads(row[0]), now - row[1]
+
+    def put(self, code: str, lang: str, result: Dict[str, Any]) -> None:
+        now = time.time()
+        with self._lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO results (code, lang, schema, result, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (code, lang, self.schema_version, json.dumps(result, ensure_ascii=False), now, now),
+            )
+            self._evict(now)
+            self.conn.commit()
+
+    def _evict(self, now: float) -> None:
+        """Drop expired entries, entries of other schema versions, then the LRU overflow."""
+        self.conn.execute(
+            "DELETE FROM results WHERE created_at < ? OR schema != ?", (now - self.ttl_s, self.schema_version)
+        )
+        self.conn.execute(
+            "DELETE FROM results WHERE rowid IN ("
+            "SELECT rowid FROM results ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,),
+        )
+
+    def close(self) -> None:
+        with self._lock:
+            self.conn.close()
@@ -2,14 +2,71 @@
 // scraper.php
 // PHP Wrapper for Python Scraper
 // Usage: php scraper.php {bacode}
+//        php scraper.php --codes {bacode},{bacode},...
+//
+// Requests are proxied to the persistent Python scraper service
+// (`python3 scraper.py --serve`, started by docker-entrypoint.sh), which keeps
+// one Chromium warm. If the service is not reachable, we fall back to
+// spawning `scraper.py --code` for this single request.
 
 header('Content-Type: application/json');
 
 // Get code from query parameter or CLI
 if (php_sapi_name() === 'cli') {
     $code = isset($argv[1]) ? $argv[1] : '';
+    $codes = isset($argv[2]) && $argv[1] === '--codes' ? $argv[2] : '';
 } else {
     $code = isset($_GET['code']) ? $_GET['code'] : '';
+    $codes = isset($_GET['codes']) ? $_GET['codes'] : '';
+}
+
+$service = getenv('SCRAPER_URL') ?: 'http://127.0.0.1:3001';
+
+// Optional cache freshness limit in seconds (0 forces a live scrape)
+$max_age = (php_sapi_name() !== 'cli' && isset($_GET['max_age'])) ? preg_replace('/[^0-9]/', '', $_GET['max_age']) : '';
+$max_age_qs = $max_age !== '' ? "&max_age=" . $max_age : '';
+
+// Batch mode: ?codes=013001,351009 -> NDJSON, one line per code as it finishes
+if (!empty($codes)) {
+    $codes = implode(',', array_filter(array_map(function ($c) {
+        return preg_replace('/[^0-9]/', '', $c);
+    }, explode(',', $codes))));
+
+    if (empty($codes)) {
+        echo json_encode(["status" => "error", "message" => "Invalid 'codes' parameter. Usage: scraper.php?codes=013001,351009"]);
+        exit(1);
+    }
+
+    header('Content-Type: application/x-ndjson');
+    // Tell Nginx not to buffer the stream
+    header('X-Accel-Buffering: no');
+
+    $streamed = false;
+    if (function_exists('curl_init')) {
+        $ch = curl_init();
+        curl_setopt($ch, CURLOPT_URL, rtrim($service, '/') . "/scrape/batch?codes=" . urlencode($codes) . $max_age_qs);
+        curl_setopt($ch, CURLOPT_CONNECTTIMEOUT, 2);
+        curl_setopt($ch, CURLOPT_TIMEOUT, 280);
+        curl_setopt($ch, CURLOPT_WRITEFUNCTION, function ($ch, $chunk) use (&$streamed) {
+            $streamed = true;
+            echo $chunk;
+            flush();
+            return strlen($chunk);
+        });
+        curl_exec($ch);
+        $errno = curl_errno($ch);
+        curl_close($ch);
+
+        if ($streamed || ($errno !== CURLE_COULDNT_CONNECT && $errno !== CURLE_COULDNT_RESOLVE_HOST)) {
+            exit(0);
+        }
+    }
+
+    // Fallback: one Python process, one browser, for the whole batch
+    $codes_esc = escapeshellarg($codes);
+    $max_age_arg = $max_age !== '' ? " --max-age $max_age" : '';
+    passthru("PLAYWRIGHT_BROWSERS_PATH=/ms-playwright PYTHONIOENCODING=utf-8 python3 scraper.py --codes $codes_esc$max_age_arg 2>/dev/null");
+    exit(0);
 }
 
 if (empty($code)) {
@@ -17,10 +74,51 @@ if (empty($code)) {
     exit(1);
 }
 
+// Sanitize input
+$code = preg_replace('/[^0-9]/', '', $code);
+
+if (empty($code)) {
+    echo json_encode(["status" => "error", "message" => "Invalid code format. Code must be numeric."]);
+    exit(1);
+}
+
+// 1. Persistent scraper service
+$url = rtrim($service, '/') . "/scrape?code=" . urlencode($code) . $max_age_qs;
+
+if (function_exists('curl_init')) {
+    $ch = curl_init();
+    curl_setopt($ch, CURLOPT_URL, $url);
+    curl_setopt($ch, CURLOPT_RETURNTRANSFER, true);
+    curl_setopt($ch, CURLOPT_CONNECTTIMEOUT, 2);
+    curl_setopt($ch, CURLOPT_TIMEOUT, 200);
+    $output = curl_exec($ch);
+    $httpCode = curl_getinfo($ch, CURLINFO_HTTP_CODE);
+    $errno = curl_errno($ch);
+    $error = curl_error($ch);
+    curl_close($ch);
+
+    if ($output !== false && $httpCode === 200) {
+        echo $output;
+        exit(0);
+    }
+
+    // Only fall back when the service is down; a real scrape error/timeout is returned as-is
+    if ($errno !== CURLE_COULDNT_CONNECT && $errno !== CURLE_COULDNT_RESOLVE_HOST) {
+        if ($output === false) {
+            echo json_encode(["status" => "error", "message" => "Failed to communicate with scraper service: $error"]);
+        } else {
+            echo json_encode(["status" => "error", "message" => "Scraper service returned HTTP $httpCode: $output"]);
+        }
+        exit(1);
+    }
+}
+
+// 2. Fallback: spawn the Python script for this request
 $code_esc = escapeshellarg($code);
 
 // Command to run Python script (Linux syntax)
-$command = "PLAYWRIGHT_BROWSERS_PATH=/ms-playwright PYTHONIOENCODING=utf-8 python3 scraper.py --code $code_esc --json 2>&1"; 
+$max_age_arg = $max_age !== '' ? " --max-age $max_age" : '';
+$command = "PLAYWRIGHT_BROWSERS_PATH=/ms-playwright PYTHONIOENCODING=utf-8 python3 scraper.py --code $code_esc --json$max_age_arg 2>&1";
 
 // Execute command
 $output = shell_exec($command);
@@ -30,19 +128,8 @@ if ($output === null) {
     exit(1);
 }
 
-// The Python script might output other logs to stderr (which shell_exec doesn't capture by default) or stdout.
-// We expect the LAST line or the specific JSON block to be the result.
-// But our Python script prints JSON via print() and other logs via print().
-// In run_single, we muted other prints or ensuring JSON is distinct?
-// Actually scrape-EN.py prints "Processing row..." etc.
-// We need to make sure ONLY JSON is output or we parse the JSON from the output.
-
-// Let's rely on finding the last JSON object in the output or assume run_single is clean.
-// In run_single, I added prints: `print("Processing row...")` is inside `process_activity_code`.
-// So stdout will be mixed.
-// I should filter the output to find the JSON line.
-
-// Regex to extract JSON block { "status": ... }
+// stdout may contain other prints besides the JSON result,
+// so extract the JSON block { "status": ... } from the output.
 if (preg_match('/\{[\s\S]*"status":[\s\S]*\}/', $output, $matches)) {
     echo $matches[0];
 } else {
@@ -3,17 +3,25 @@ import asyncio
 import argparse
 import os
 import re
+import signal
+import sys
 import time
 import json
-from typing import Optional, List, Tuple, Dict, Any
+from typing import Optional, List, Dict, Any, AsyncIterator, Tuple
+from urllib.parse import urlsplit, parse_qs
 
-from playwright.async_api import async_playwright, TimeoutError as PlaywrightTimeoutError, Page
+from aimd import AIMDWindow
+from details_http import DETAILS_URL, PORTAL_ORIGIN, fetch_details, NeedsBrowser
+from result_cache import ResultCache
+import metrics
+from records import Activity, Approval, Eligibility, LocationFee, sheet_fields
+from playwright.async_api import async_playwright, TimeoutError as PlaywrightTimeoutError, Page, Browser, BrowserContext
 
 # ----------------------------
 # Configuration
 # ----------------------------
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
-BASE_URL = "https://investor.sw.gov.qa/wps/portal/investors/home/!ut/p/z1/04_Sj9CPykssy0xPLMnMz0vMAfIjo8zivfxNXA393Q38LXy9DQzMAj0cg4NcLY0MDMz1w_Wj9KNQlISGGRkEOjuZBjm6Wxj7OxpCFRjgAI4G-sGJRfoF2dlpjo6KigD6q7KF/dz/d5/L0lHSkovd0RNQUZrQUVnQSEhLzROVkUvZW4!/"
+BASE_URL = PORTAL_ORIGIN + "/wps/portal/investors/home/!ut/p/z1/04_Sj9CPykssy0xPLMnMz0vMAfIjo8zivfxNXA393Q38LXy9DQzMAj0cg4NcLY0MDMz1w_Wj9KNQlISGGRkEOjuZBjm6Wxj7OxpCFRjgAI4G-sGJRfoF2dlpjo6KigD6q7KF/dz/d5/L0lHSkovd0RNQUZrQUVnQSEhLzROVkUvZW4!/"
 
 # Details page XPaths
 X_ACTIVITY_CODE = "/html/body/div[4]/div/div/section/div[2]/main/section[3]/div/div/div/div/div[1]/div[2]"
@@ -21,6 +29,18 @@ X_ACTIVITY_NAME = "/html/body/div[4]/div/div/section/div[2]/main/section[3]/div/
 X_TBODY = "/html/body/div[4]/div/div/section/div[2]/main/section[3]/div/div/div/div/div[8]/div[2]/table/tbody"
 X_ELIGIBLE = "/html/body/div[4]/div/div/section/div[2]/main/section[3]/div/div/div/div/div[9]/div[2]/table/tbody/tr[2]/td"
 X_NO_APPROVAL = "/html/body/div[4]/div/div/section/div[2]/main/section[3]/div/div/div/div/div[10]/div[2]"
+X_ELIGIBLE_UL = X_ELIGIBLE + "/ul"
+
+# One-shot extraction snippet (shared with docker-scraper/details_engine.py)
+with open(os.path.join(SCRIPT_DIR, "extract_details.js"), "r", encoding="utf-8") as _f:
+    EXTRACT_DETAILS_JS = _f.read()
+EXTRACT_XPATHS = {
+    "code": X_ACTIVITY_CODE,
+    "name": X_ACTIVITY_NAME,
+    "tbody": X_TBODY,
+    "eligible": X_ELIGIBLE_UL,
+    "no_approval": X_NO_APPROVAL,
+}
 
 # Search flow selectors
 X_SEARCH_ICON = "//*[@id='searchIconId']"
@@ -35,6 +55,29 @@ X_FOOTER_SEARCH_INPUT = "/html/body/div[4]/div/div/section/div[2]/main/section[3
 X_FOOTER_SEARCH_CONTAINER = "/html/body/div[4]/div/div/section/div[2]/main/section[3]/div/div/div[1]/div"
 CSS_RESULTS_FIRST_ACTIVITY_LINK = "#pills-activities a.ba-link"
 
+# Persistent server (--serve)
+SERVE_HOST = os.environ.get("SCRAPER_HOST", "127.0.0.1")
+SERVE_PORT = int(os.environ.get("SCRAPER_PORT", "3001"))
+SERVE_CONTEXTS = int(os.environ.get("SCRAPER_CONTEXTS", "2"))
+HTTP_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 500: "Internal Server Error"}
+HTTP_ROUTES = ("/", "/scrape", "/scrape/batch", "/health", "/metrics")
+BATCH_MAX_CODES = int(os.environ.get("SCRAPER_BATCH_MAX", "200"))
+FAST_PATH = os.environ.get("SCRAPER_FAST_PATH", "0") == "1"
+# Tune the live scrapes in flight (1..contexts) from portal latency and errors (aimd.py)
+ADAPTIVE = os.environ.get("SCRAPER_ADAPTIVE", "1") == "1"
+
+# Result cache (bump RESULT_SCHEMA_VERSION whenever the "data"/"record" layout changes)
+RESULT_SCHEMA_VERSION = 2
+RESULT_LANG = "en"
+CACHE_PATH = os.environ.get("SCRAPER_CACHE_PATH", os.path.join(SCRIPT_DIR, "cache", "results.sqlite3"))
+CACHE_TTL = float(os.environ.get("SCRAPER_CACHE_TTL", "86400"))
+CACHE_MAX_ENTRIES = int(os.environ.get("SCRAPER_CACHE_MAX", "5000"))
+
+
+def log(message: str) -> None:
+    """Service logs go to stderr so stdout stays clean for JSON / NDJSON output."""
+    print(message, file=sys.stderr, flush=True)
+
 
 async def _safe_screenshot(page: Page, filename: str) -> None:
     pass
@@ -47,6 +90,7 @@ async def _get_lang(page: Page) -> str:
         return ""
 
 
+@metrics.timed(metrics.STAGE_SECONDS, stage="toggle")
 async def set_language(page: Page, target_lang: str, timeout_s: int = 10) -> bool:
     """
     Toggle website language between Arabic and English.
@@ -94,11 +138,12 @@ async def fill_css(page: Page, selector: str, value: str, timeout_ms: int = 10_0
     await el.fill(value)
 
 
+@metrics.timed(metrics.STAGE_SECONDS, stage="navigate")
 async def direct_to_details(page: Page, code: str) -> Page:
     """
     Go directly to the details page using the bacode URL parameter.
     """
-    details_url = f"https://investor.sw.gov.qa/wps/portal/investors/information-center/ba/details?bacode={code}"
+    details_url = DETAILS_URL.format(code=code)
     
     await page.goto(details_url, wait_until="domcontentloaded")
     
@@ -112,6 +157,7 @@ async def direct_to_details(page: Page, code: str) -> Page:
     return page
 
 
+@metrics.timed(metrics.STAGE_SECONDS, stage="footer_search")
 async def additional_step_footer_business_search(page: Page, code: str) -> Page:
     """
     Additional Step: use the footer Business Activities Search page.
@@ -210,7 +256,7 @@ async def get_text_xpath(page: Page, xpath: str, timeout_ms: int = 10_000) -> st
     return (txt or "").strip()
 
 
-async def get_table_data(page: Page) -> List[Tuple[str, str, str]]:
+async def get_table_data(page: Page) -> List[LocationFee]:
     try:
         tbody = page.locator(f"xpath={X_TBODY}")
         await tbody.wait_for(state="visible", timeout=10_000)
@@ -221,41 +267,37 @@ async def get_table_data(page: Page) -> List[Tuple[str, str, str]]:
 
         rows = tbody.locator("tr")
         n = await rows.count()
-        out: List[Tuple[str, str, str]] = []
+        out: List[LocationFee] = []
         for i in range(1, n + 1):
             td1 = await get_text_xpath(page, f"{X_TBODY}/tr[{i}]/td[1]")
             td2 = await get_text_xpath(page, f"{X_TBODY}/tr[{i}]/td[2]")
             td3 = await get_text_xpath(page, f"{X_TBODY}/tr[{i}]/td[3]")
             if td1 or td2 or td3:
-                out.append((td1, td2, td3))
+                out.append(LocationFee(td1, td2, td3))
         return out
     except Exception:
         return []
 
 
-async def get_eligible_status(page: Page) -> str:
+async def get_eligibility(page: Page) -> Eligibility:
     try:
-        ul_xpath = "/html/body/div[4]/div/div/section/div[2]/main/section[3]/div/div/div/div/div[9]/div[2]/table/tbody/tr[2]/td/ul"
+        ul_xpath = X_ELIGIBLE_UL
         ul_locator = page.locator(f"xpath={ul_xpath}")
         
         try:
             await ul_locator.wait_for(state="visible", timeout=3000)
         except Exception:
-            return "No Business Requirements"
+            return Eligibility()
 
         items = await ul_locator.locator("li").all_inner_texts()
-        cleaned_items = [item.strip() for item in items if item.strip()]
-        
-        if cleaned_items:
-            return "\n".join(cleaned_items)
-            
-        return "No Business Requirements"
+        return Eligibility([item.strip() for item in items if item.strip()])
 
     except Exception:
-        return "No Business Requirements"
+        return Eligibility()
 
 
-async def get_approvals_data(page: Page) -> str:
+async def get_approvals_data(page: Page) -> Optional[List[Approval]]:
+    """Approvals read field by field; None if they could not be read."""
     try:
         try:
             await page.evaluate("window.scrollTo(0, document.body.scrollHeight/2)")
@@ -269,11 +311,11 @@ async def get_approvals_data(page: Page) -> str:
                 if await no_el.count() > 0:
                     txt = ((await no_el.text_content()) or "").strip()
                     if txt and not any(str(i) in txt[:10] for i in range(1, 7)):
-                        return "No Approvals Needed"
+                        return []
             except Exception:
                 pass
 
-        approval_data = []
+        approvals: List[Approval] = []
         for i in range(12):
             btn = page.locator(f"xpath=//*[@id='heading{i}']/button")
             if await btn.count() == 0:
@@ -286,61 +328,152 @@ async def get_approvals_data(page: Page) -> str:
                 title_text = ((await btn.text_content()) or "").strip()
                 if title_text and title_text[0].isdigit() and "." in title_text[:5]:
                     title_text = title_text.split(".", 1)[1].strip()
-                approval_title = title_text or f"Approval {i+1}"
             except Exception:
-                approval_title = f"Approval {i+1}"
-
-            try:
-                await btn.click()
-            except Exception:
-                try:
-                    await page.evaluate("(el) => el.click()", await btn.element_handle())
-                except Exception:
-                    pass
+                title_text = ""
 
-            agency = "Not specified"
+            # Collapsed panels usually already hold their body: text_content() reads it without clicking
+            agency = ""
+            agency_el = page.locator(f"xpath=//*[@id='collapse{i}']/div/div/div[1]/div[2]")
             try:
-                agency_el = page.locator(f"xpath=//*[@id='collapse{i}']/div/div/div[1]/div[2]")
                 if await agency_el.count() > 0:
-                    try:
-                        await agency_el.scroll_into_view_if_needed()
-                    except Exception:
-                        pass
-                    agency_txt = ((await agency_el.text_content()) or "").strip()
-                    agency = agency_txt or agency
+                    agency = ((await agency_el.text_content()) or "").strip()
             except Exception:
                 pass
 
-            approval_data.append((i + 1, approval_title, agency))
+            # Lazily injected body: click to expand, then read it
+            if not agency:
+                agency = await click_agency(page, i)
 
-        if not approval_data:
-            return "No Approvals Needed"
+            approvals.append(Approval(title_text, agency))
 
-        parts = []
-        for num, title, agency in approval_data:
-            parts.append(f"Approval {num}: {title}\nAgency {num}: {agency}")
-        return "\n\n".join(parts)
+        return approvals
     except Exception:
-        return "Error extracting approvals"
+        return None
+
+
+async def click_agency(page: Page, i: int) -> str:
+    """Expand approval panel i (its body is injected lazily) and read the agency."""
+    try:
+        await page.locator(f"xpath=//*[@id='heading{i}']/button").click(timeout=3_000)
+        agency_el = page.locator(f"xpath=//*[@id='collapse{i}']/div/div/div[1]/div[2]")
+        await agency_el.wait_for(state="visible", timeout=3_000)
+        return ((await agency_el.text_content()) or "").strip()
+    except Exception:
+        return ""
+
+
+def approvals_announced(fields: Dict[str, Any]) -> bool:
+    """The "Required Approvals" heading, or a numbered list where the "no approval" text would be."""
+    txt = fields["no_approval_text"]
+    return fields["approvals_heading"] or (bool(txt) and any(str(i) in txt[:10] for i in range(1, 7)))
+
+
+async def read_approvals(page: Page, fields: Dict[str, Any]) -> Optional[List[Approval]]:
+    """
+    Approvals from the one-shot extraction: every collapsed panel is read in one pass,
+    only panels whose body is not in the DOM yet are clicked.
+    None (failed to load) when the page announces approvals but no panel rendered.
+    """
+    if not fields["approvals"]:
+        return None if approvals_announced(fields) else []
+    approvals = []
+    for i, approval in enumerate(fields["approvals"]):
+        approvals.append(Approval(approval["title"], approval["agency"] or await click_agency(page, i)))
+    return approvals
+
+
+def try_fast_path(code: str) -> Optional[Activity]:
+    """
+    Fast path: fetch the EN and AR details pages over plain HTTP and parse them with lxml.
+    Returns the same record as process_activity_code, or None when the browser is needed.
+    Blocking (requests) - call it through asyncio.to_thread.
+    """
+    try:
+        en = fetch_details(code, "en")
+        ar = fetch_details(code, "ar")
+    except NeedsBrowser as e:
+        log(f"Fast path not usable for {code} ({e}), using browser")
+        return None
+
+    return Activity(
+        code=en["activity_code"],
+        lang=RESULT_LANG,
+        name_en=en["name"],
+        name_ar=ar["name"],
+        locations=[LocationFee(*row) for row in en["locations"]],
+        eligibility=Eligibility(list(en["eligible"])),
+        approvals=[Approval(title, agency) for title, agency in en["approvals"]],
+    )
+
+
+async def extract_page(page: Page) -> Optional[Dict[str, Any]]:
+    """All fields of the current details page in one page.evaluate call, or None if the snippet failed."""
+    try:
+        await page.wait_for_load_state("networkidle", timeout=5_000)
+    except Exception:
+        pass
+    try:
+        fields = await page.evaluate(EXTRACT_DETAILS_JS, EXTRACT_XPATHS)
+    except Exception as e:
+        log(f"One-shot extraction failed ({e}), reading fields one by one")
+        return None
+    if not fields or not fields.get("activity_code"):
+        return None
+    return fields
+
+
+@metrics.timed(metrics.STAGE_SECONDS, stage="extract")
+async def read_english_fields(page: Page, record: Activity) -> bool:
+    """Read every English field from the current details page into record. False if the code is missing."""
+    fields = await extract_page(page)
+    if fields is not None:
+        record.code = fields["activity_code"]
+        record.name_en = fields["name"]
+        record.locations = [LocationFee(*row) for row in fields["locations"]]
+        record.eligibility = Eligibility(list(fields["eligible"]))
+        record.approvals = await read_approvals(page, fields)
+        return True
+
+    # Fallback: one locator round-trip per field
+    extracted_code = await get_text_xpath(page, X_ACTIVITY_CODE)
+    if not extracted_code:
+        return False
+    record.code = extracted_code
+
+    # English Name
+    record.name_en = await get_text_xpath(page, X_ACTIVITY_NAME)
 
+    # Location
+    record.locations = await get_table_data(page)
 
-async def process_activity_code(page: Page, code: str) -> tuple[bool, bool, str | None, Dict[str, Any]]:
+    # Eligible
+    record.eligibility = await get_eligibility(page)
+
+    # Approvals
+    record.approvals = await get_approvals_data(page)
+    return True
+
+
+async def process_activity_code(page: Page, code: str) -> tuple[bool, str, str | None, Activity | None]:
     """
-    Process a single activity code and return data.
-    Returns: (success, used_additional, error_msg, data_dict)
+    Process a single activity code and return its record.
+    Returns: (success, path, error_msg, record); path is how the details page was reached:
+    "direct" (details URL), "search" (home page search) or "footer_search" (additional step).
     """
     popup_details_page: Page | None = None
-    used_additional = False
+    path = "direct"
     error_msg = None
-    data = {}
+    record = Activity(code=code, lang=RESULT_LANG)
     
     try:
         # 1. Navigate
         try:
             page = await direct_to_details(page, code)
         except Exception as e:
-            # Fallback
+            # Fallback (the only step that needs the home page)
+            path = "search"
             try:
+                await page.goto(BASE_URL, wait_until="domcontentloaded")
                 await click_xpath(page, X_SEARCH_ICON)
                 await click_xpath(page, X_BUSINESS_TAB)
                 await fill_css(page, CSS_SEARCH_INPUT, code)
@@ -361,7 +494,7 @@ async def process_activity_code(page: Page, code: str) -> tuple[bool, bool, str
                     pass
                 
                 if use_additional:
-                    used_additional = True
+                    path = "footer_search"
                     details_page = await additional_step_footer_business_search(page, code)
                     if details_page is not page:
                         popup_details_page = details_page
@@ -372,57 +505,39 @@ async def process_activity_code(page: Page, code: str) -> tuple[bool, bool, str
                         await page.wait_for_load_state("networkidle", timeout=20_000)
                         await page.locator(f"xpath={X_ACTIVITY_CODE}").wait_for(state="visible", timeout=20_000)
                     except PlaywrightTimeoutError:
-                        used_additional = True
+                        path = "footer_search"
                         details_page = await additional_step_footer_business_search(page, code)
                         if details_page is not page:
                             popup_details_page = details_page
                             page = details_page
 
             except Exception as fallback_error:
-                return False, used_additional, f"All methods failed: {fallback_error}", {}
+                return False, path, f"All methods failed: {fallback_error}", None
 
         # 2. Extract Data
-        await set_language(page, "en")
-        
-        extracted_code = await get_text_xpath(page, X_ACTIVITY_CODE)
-        if not extracted_code:
-             return False, used_additional, "Activity code not found", {}
-        data['activity_code'] = extracted_code
-
-        # English Name
-        await set_language(page, "en")
-        data['name_en'] = await get_text_xpath(page, X_ACTIVITY_NAME)
-
-        # Arabic Name
-        if await set_language(page, "ar"):
-             data['name_ar'] = await get_text_xpath(page, X_ACTIVITY_NAME)
-        else:
-             data['name_ar'] = "Error switching to Arabic"
-
-        # Back to English
-        await set_language(page, "en")
-
-        # Location
-        rows = await get_table_data(page)
-        if rows:
-            formatted = []
-            for i, (main_loc, sub_loc, fee) in enumerate(rows, start=1):
-                formatted.append(f"Main Location {i}: {main_loc}\nSub Location {i}: {sub_loc}\nFee {i}: {fee}")
-            data['locations'] = "\n\n".join(formatted)
+        # Read everything the page offers in the language it arrived in, then toggle
+        # once for the other language: at most two page loads per code, no round-trip.
+        if await _get_lang(page) == "ar":
+            record.name_ar = await get_text_xpath(page, X_ACTIVITY_NAME)
+            if not await set_language(page, "en"):
+                # Reading on would store the Arabic page as the English record (and cache it)
+                return False, path, "Could not switch site language to 'en'", None
+            if not await read_english_fields(page, record):
+                return False, path, "Activity code not found", None
         else:
-            data['locations'] = ""
-
-        # Eligible
-        data['eligible'] = await get_eligible_status(page)
-
-        # Approvals
-        data['approvals'] = await get_approvals_data(page)
+            if not await read_english_fields(page, record):
+                return False, path, "Activity code not found", None
+            # Arabic Name
+            if await set_language(page, "ar"):
+                record.name_ar = await get_text_xpath(page, X_ACTIVITY_NAME)
+            else:
+                record.name_ar = "Error switching to Arabic"
 
-        return True, used_additional, None, data
+        return True, path, None, record
 
     except Exception as e:
         await _safe_screenshot(page, os.path.join(SCRIPT_DIR, f"error_{code}.png"))
-        return False, used_additional, str(e), {}
+        return False, path, str(e), None
     finally:
         if popup_details_page is not None:
             try:
@@ -431,54 +546,497 @@ async def process_activity_code(page: Page, code: str) -> tuple[bool, bool, str
                 pass
 
 
-async def run_single(code: str, headless: bool, json_output: bool) -> None:
-    async with async_playwright() as p:
-        browser = await p.chromium.launch(headless=headless)
-        context = await browser.new_context()
-        
-        # Optimization: Block unnecessary resources
-        async def block_aggressively(route):
-            if route.request.resource_type in ["image", "font", "stylesheet"]:
-                await route.abort()
-            else:
-                await route.continue_()
-        
-        await context.route("**/*", block_aggressively)
-        
-        page = await context.new_page()
-        page.set_default_timeout(120_000)
-        
+# ----------------------------
+# Browser / context helpers
+# ----------------------------
+async def block_aggressively(route):
+    # Optimization: Block unnecessary resources
+    if route.request.resource_type in ["image", "font", "stylesheet"]:
+        await route.abort()
+    else:
+        await route.continue_()
+
+
+async def new_scrape_context(browser: Browser) -> BrowserContext:
+    context = await browser.new_context()
+    await context.route("**/*", block_aggressively)
+    return context
+
+
+def build_result(success: bool, error: Optional[str], record: Optional[Activity]) -> Dict[str, Any]:
+    """
+    API result: "data" is the Sheets text of the record (what the Apps Script writes),
+    "record" the typed record itself (records.Activity.to_dict()).
+    """
+    data = None
+    if success and record is not None:
+        # The API has always returned "locations", even when the page has none
+        data = {"locations": "", **sheet_fields(record)}
+    return {
+        "status": "success" if data is not None else "error",
+        "data": data,
+        "record": record.to_dict() if data is not None else None,
+        "error": error
+    }
+
+
+def open_cache(enabled: bool) -> Optional[ResultCache]:
+    if not enabled:
+        return None
+    try:
+        return ResultCache(CACHE_PATH, RESULT_SCHEMA_VERSION, ttl_s=CACHE_TTL, max_entries=CACHE_MAX_ENTRIES)
+    except Exception as e:
+        log(f"Result cache disabled: {e}")
+        return None
+
+
+def cached_result(cache: Optional[ResultCache], code: str, max_age: Optional[float]) -> Optional[Dict[str, Any]]:
+    """The cached result of code (with cached/age_s fields), or None on a miss."""
+    if cache is None:
+        return None
+    hit = cache.get(code, RESULT_LANG, max_age)
+    if hit is None:
+        return None
+    result, age = hit
+    return {**result, "cached": True, "age_s": round(age, 1)}
+
+
+def remember_result(cache: Optional[ResultCache], code: str, result: Dict[str, Any]) -> Dict[str, Any]:
+    """Store a fresh successful result and mark it as not cached."""
+    if cache is not None and result["status"] == "success":
         try:
-            await page.goto(BASE_URL, wait_until="domcontentloaded")
-            success, _, error, data = await process_activity_code(page, code)
-            
-            if json_output:
-                result = {
-                    "status": "success" if success else "error",
-                    "data": data if success else None,
-                    "error": error
-                }
-                print(json.dumps(result, ensure_ascii=True, indent=2))
-            else:
-                if success:
-                    print(f"Successfully scraped code {code}")
-                    for k, v in data.items():
-                        print(f"{k}: {v}")
+            cache.put(code, RESULT_LANG, result)
+        except Exception as e:
+            log(f"Could not cache result of {code}: {e}")
+    return {**result, "cached": False, "age_s": 0}
+
+
+async def scrape_with_context(context: BrowserContext, code: str, fast_path: bool = False) -> Tuple[Dict[str, Any], str]:
+    """
+    Scrape one code on a fresh page of an existing context.
+    Returns (API result dict, path): path as in process_activity_code, or "fast_path".
+    """
+    if fast_path:
+        record = await asyncio.to_thread(try_fast_path, code)
+        if record:
+            metrics.SCRAPES.inc(path="fast_path", outcome="success")
+            return build_result(True, None, record), "fast_path"
+
+    page = await context.new_page()
+    page.set_default_timeout(120_000)
+    try:
+        # direct_to_details opens the details URL itself; the home page is only loaded by the search fallback
+        with metrics.ACTIVE_PAGES.track(), metrics.STAGE_SECONDS.time(stage="scrape"):
+            success, path, error, record = await process_activity_code(page, code)
+        metrics.SCRAPES.inc(path=path, outcome="success" if success else "error")
+        return build_result(success, error, record), path
+    finally:
+        try:
+            await page.close()
+        except Exception:
+            pass
+
+
+def congestion_signal(path: str, error: Optional[str]) -> Optional[str]:
+    """Why a live scrape points at an overloaded portal (shrinks the AIMD window), or None."""
+    if error and "timeout" in error.lower():
+        return "timeout"
+    if path in ("search", "footer_search"):
+        # direct_to_details failed: the details page did not load via the direct URL
+        return "direct URL failed"
+    return None
+
+
+async def run_single(code: str, headless: bool, json_output: bool, fast_path: bool = False,
+                     use_cache: bool = True, max_age: Optional[float] = None) -> None:
+    cache = open_cache(use_cache)
+    result = cached_result(cache, code, max_age)
+    if result is None and fast_path:
+        # No browser launch at all when the static page is enough
+        record = await asyncio.to_thread(try_fast_path, code)
+        if record:
+            result = build_result(True, None, record)
+
+    if result is None:
+        async with async_playwright() as p:
+            browser = await p.chromium.launch(headless=headless)
+            context = await new_scrape_context(browser)
+            try:
+                result, _ = await scrape_with_context(context, code)
+            finally:
+                await browser.close()
+
+    if not result.get("cached"):
+        result = remember_result(cache, code, result)
+    if cache is not None:
+        cache.close()
+
+    success, error, data = result["status"] == "success", result["error"], result["data"]
+    
+    if json_output:
+        print(json.dumps(result, ensure_ascii=True, indent=2))
+    else:
+        if success:
+            print(f"Successfully scraped code {code}")
+            for k, v in data.items():
+                print(f"{k}: {v}")
+        else:
+            print(f"Failed to scrape code {code}: {error}")
+
+
+# ----------------------------
+# Persistent service (--serve)
+# ----------------------------
+class ScraperService:
+    """
+    Keeps one Chromium warm and hands out reusable browser contexts,
+    so a request only pays for page navigation, not Python/Playwright/Chromium startup.
+
+    Live scrapes of all requests share one AIMD window (the portal is one host):
+    it starts at one page and grows up to pool_size while the portal keeps up.
+    """
+
+    def __init__(self, headless: bool, pool_size: int, fast_path: bool = False,
+                 cache: Optional[ResultCache] = None, max_age: Optional[float] = None,
+                 adaptive: bool = ADAPTIVE):
+        self.headless = headless
+        self.fast_path = fast_path
+        self.cache = cache
+        self.max_age = max_age
+        self.pool_size = max(1, pool_size)
+        self._playwright = None
+        self.browser: Optional[Browser] = None
+        self._contexts: "asyncio.Queue[BrowserContext]" = asyncio.Queue()
+        self._launch_lock = asyncio.Lock()
+        self.window = AIMDWindow(
+            max_size=self.pool_size, initial=None if adaptive else self.pool_size,
+            min_size=1 if adaptive else self.pool_size, on_change=self._window_changed,
+        )
+        self._in_flight = 0
+        self._window_free = asyncio.Condition()
+        metrics.CONCURRENCY_WINDOW.set(self.window.size)
+
+    def _window_changed(self, old: int, new: int, reason: str) -> None:
+        metrics.CONCURRENCY_WINDOW.set(new)
+        if new < old:
+            metrics.CONCURRENCY_CUTS.inc(reason=reason.split(" (")[0])
+        log(f"Concurrency window {old} -> {new} ({reason})")
+
+    async def start(self) -> None:
+        self._playwright = await async_playwright().start()
+        await self._launch()
+
+    async def _launch(self) -> None:
+        self.browser = await self._playwright.chromium.launch(headless=self.headless)
+        self._contexts = asyncio.Queue()
+        for _ in range(self.pool_size):
+            self._contexts.put_nowait(await new_scrape_context(self.browser))
+        log(f"Browser launched with {self.pool_size} contexts")
+
+    async def _ensure_browser(self) -> None:
+        async with self._launch_lock:
+            if self.browser is None or not self.browser.is_connected():
+                log("Browser disconnected, relaunching...")
+                await self._launch()
+
+    async def scrape(self, code: str, max_age: Optional[float] = None) -> Dict[str, Any]:
+        """Cached result if fresh enough (max_age overrides the service default), else a live scrape."""
+        result = cached_result(self.cache, code, self.max_age if max_age is None else max_age)
+        if result is not None:
+            metrics.SCRAPES.inc(path="cache", outcome="success")
+            return result
+        return remember_result(self.cache, code, await self._scrape_live(code))
+
+    async def _scrape_live(self, code: str) -> Dict[str, Any]:
+        await self._ensure_browser()
+        contexts = self._contexts
+        with metrics.QUEUE_DEPTH.track():
+            await self._enter_window()
+        path = None
+        try:
+            with metrics.QUEUE_DEPTH.track():
+                context = await contexts.get()
+            started = time.monotonic()
+            try:
+                result, path = await scrape_with_context(context, code, self.fast_path)
+            except Exception as e:
+                result = build_result(False, str(e), {})
+            finally:
+                # Contexts of a crashed browser are dropped; _launch() already refilled a new queue
+                if context.browser is self.browser and self.browser.is_connected():
+                    contexts.put_nowait(context)
+            # A browser crash (no path) says nothing about the portal
+            if path is not None:
+                signal = congestion_signal(path, result["error"])
+                if signal:
+                    self.window.on_congestion(signal, started)
                 else:
-                    print(f"Failed to scrape code {code}: {error}")
-                    
+                    self.window.on_success(time.monotonic() - started, started, kind=path)
+            return result
         finally:
-            await browser.close()
+            await self._leave_window()
+
+    async def _enter_window(self) -> None:
+        async with self._window_free:
+            await self._window_free.wait_for(lambda: self._in_flight < self.window.size)
+            self._in_flight += 1
+
+    async def _leave_window(self) -> None:
+        async with self._window_free:
+            self._in_flight -= 1
+            # Also wakes the waiters a window increase made room for
+            self._window_free.notify_all()
+
+    async def stop(self) -> None:
+        try:
+            if self.browser is not None:
+                await self.browser.close()
+        finally:
+            if self._playwright is not None:
+                await self._playwright.stop()
+            if self.cache is not None:
+                self.cache.close()
+
+
+def parse_codes(raw: str) -> List[str]:
+    """Split a comma/whitespace separated code list, keep digits only, drop duplicates (order kept)."""
+    codes: List[str] = []
+    for part in re.split(r"[\s,;]+", raw or ""):
+        code = re.sub(r"[^0-9]", "", part)
+        if code and code not in codes:
+            codes.append(code)
+    return codes
+
+
+async def scrape_batch(service: ScraperService, codes: List[str], concurrency: int,
+                       max_age: Optional[float] = None) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Scrape many codes on the shared browser, at most `concurrency` at a time.
+    Yields one result per code ({"code": ..., "status": ..., ...}) as soon as it finishes.
+    """
+    semaphore = asyncio.Semaphore(max(1, min(concurrency, service.pool_size)))
+
+    async def one(code: str) -> Dict[str, Any]:
+        async with semaphore:
+            started = time.time()
+            result = await service.scrape(code, max_age)
+            return {"code": code, **result, "elapsed_s": round(time.time() - started, 2)}
+
+    tasks = [asyncio.create_task(one(code)) for code in codes]
+    try:
+        for finished in asyncio.as_completed(tasks):
+            yield await finished
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+async def run_batch(codes: List[str], headless: bool, concurrency: int, fast_path: bool = False,
+                    use_cache: bool = True, max_age: Optional[float] = None, adaptive: bool = ADAPTIVE) -> None:
+    """CLI --codes: one browser launch for the whole list, NDJSON lines on stdout."""
+    service = ScraperService(headless=headless, pool_size=concurrency, fast_path=fast_path,
+                             cache=open_cache(use_cache), max_age=max_age, adaptive=adaptive)
+    await service.start()
+    try:
+        async for result in scrape_batch(service, codes, concurrency):
+            print(json.dumps(result, ensure_ascii=True), flush=True)
+    finally:
+        log(f"Concurrency window: {service.window.summary()}")
+        await service.stop()
+
+
+async def send_http_response(writer: asyncio.StreamWriter, status: int, body: str,
+                             content_type: str = "application/json") -> None:
+    payload = body.encode("utf-8")
+    reason = HTTP_REASONS.get(status, "OK")
+    head = (
+        f"HTTP/1.1 {status} {reason}\r\n"
+        f"Content-Type: {content_type}; charset=utf-8\r\n"
+        f"Content-Length: {len(payload)}\r\n"
+        "Connection: close\r\n\r\n"
+    )
+    writer.write(head.encode("latin-1") + payload)
+    await writer.drain()
+
+
+async def handle_http(service: ScraperService, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+    """
+    Minimal HTTP/1.1 handler:
+      GET  /health
+      GET  /metrics                    (Prometheus text format)
+      GET  /scrape?code=...
+      GET  /scrape/batch?codes=a,b,c   (or POST the code list as the body) -> NDJSON stream
+    Both scrape routes accept max_age=SECONDS (0 forces a live scrape).
+    """
+    route, status = "other", 0
+    started = time.perf_counter()
+
+    async def respond(code: int, body: str, content_type: str = "application/json") -> None:
+        nonlocal status
+        status = code
+        await send_http_response(writer, code, body, content_type)
+
+    try:
+        request_line = (await reader.readline()).decode("latin-1").strip()
+        content_length = 0
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            if name.strip().lower() == "content-length":
+                content_length = int(value.strip() or 0)
+        body = (await reader.readexactly(content_length)).decode("utf-8") if content_length else ""
+
+        parts = request_line.split()
+        if len(parts) < 2:
+            await respond(400, json.dumps({"status": "error", "message": "Bad request."}))
+            return
+
+        url = urlsplit(parts[1])
+        query = parse_qs(url.query)
+        route = {"/": "/scrape"}.get(url.path, url.path) if url.path in HTTP_ROUTES else "other"
+        max_age_raw = (query.get("max_age") or [""])[0]
+        max_age = float(max_age_raw) if re.fullmatch(r"\d+(\.\d+)?", max_age_raw) else None
+
+        if url.path == "/health":
+            await respond(200, "OK", "text/plain")
+            return
+
+        if url.path == "/metrics":
+            await respond(200, metrics.render(), metrics.CONTENT_TYPE)
+            return
+
+        if url.path in ("/", "/scrape"):
+            code = re.sub(r"[^0-9]", "", (query.get("code") or [""])[0])
+            if not code:
+                await respond(400, json.dumps({"status": "error", "message": "Missing 'code' parameter."}))
+                return
+            log(f"Received request for code: {code}")
+            result = await service.scrape(code, max_age)
+            await respond(200, json.dumps(result, ensure_ascii=True))
+            return
+
+        if url.path == "/scrape/batch":
+            codes = parse_codes(",".join(query.get("codes") or []) + "," + body)
+            if not codes:
+                await respond(400, json.dumps({"status": "error", "message": "Missing 'codes' parameter."}))
+                return
+            if len(codes) > BATCH_MAX_CODES:
+                await respond(400, json.dumps({"status": "error", "message": f"Too many codes (max {BATCH_MAX_CODES})."}))
+                return
+            concurrency_raw = (query.get("concurrency") or [""])[0]
+            concurrency = int(concurrency_raw) if re.fullmatch(r"[0-9]+", concurrency_raw) else service.pool_size
+            log(f"Received batch request for {len(codes)} codes")
+
+            # Stream NDJSON: one line per code as it finishes (no Content-Length, close ends the body)
+            status = 200
+            writer.write((
+                "HTTP/1.1 200 OK\r\n"
+                "Content-Type: application/x-ndjson; charset=utf-8\r\n"
+                "Cache-Control: no-cache\r\n"
+                "Connection: close\r\n\r\n"
+            ).encode("latin-1"))
+            await writer.drain()
+            async for result in scrape_batch(service, codes, concurrency, max_age):
+                writer.write((json.dumps(result, ensure_ascii=True) + "\n").encode("utf-8"))
+                await writer.drain()
+            return
+
+        await respond(404, json.dumps({"status": "error", "message": "Not found."}))
+    except Exception as e:
+        try:
+            await respond(500, json.dumps({"status": "error", "message": str(e)}))
+        except Exception:
+            pass
+    finally:
+        if status:
+            metrics.REQUESTS.inc(route=route, status=str(status))
+            metrics.REQUEST_SECONDS.observe(time.perf_counter() - started, route=route)
+        try:
+            writer.close()
+            await writer.wait_closed()
+        except Exception:
+            pass
+
+
+async def serve(host: str, port: int, socket_path: Optional[str], headless: bool, pool_size: int,
+                fast_path: bool = False, use_cache: bool = True, max_age: Optional[float] = None,
+                adaptive: bool = ADAPTIVE) -> None:
+    service = ScraperService(headless=headless, pool_size=pool_size, fast_path=fast_path,
+                             cache=open_cache(use_cache), max_age=max_age, adaptive=adaptive)
+    await service.start()
+    metrics.IDLE_CONTEXTS.set_function(lambda: service._contexts.qsize())
+
+    async def handler(reader, writer):
+        await handle_http(service, reader, writer)
+
+    if socket_path:
+        server = await asyncio.start_unix_server(handler, path=socket_path)
+        log(f"Scraper server running on unix:{socket_path}")
+    else:
+        server = await asyncio.start_server(handler, host, port)
+        log(f"Scraper server running on http://{host}:{port}")
+
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        try:
+            loop.add_signal_handler(sig, server.close)
+        except NotImplementedError:
+            pass
+
+    try:
+        async with server:
+            await server.serve_forever()
+    except asyncio.CancelledError:
+        pass
+    finally:
+        log("Shutting down, closing browser...")
+        await service.stop()
 
 
 def main() -> None:
-    parser = argparse.ArgumentParser(description="Scrape EN/AR details (Single Run Only)")
+    parser = argparse.ArgumentParser(description="Scrape EN/AR details (single run or persistent server)")
     parser.add_argument("--visible", action="store_true", help="Run browser visible (default is headless)")
-    parser.add_argument("--code", type=str, required=True, help="Scrape a single activity code")
+    parser.add_argument("--code", type=str, help="Scrape a single activity code")
+    parser.add_argument("--codes", type=str, help="Scrape many codes (comma separated) in one browser, NDJSON output")
+    parser.add_argument("--concurrency", type=int, default=SERVE_CONTEXTS, help=f"Codes scraped at the same time with --codes (default {SERVE_CONTEXTS})")
     parser.add_argument("--json", action="store_true", help="Output result as JSON to stdout")
+    parser.add_argument("--fast", action="store_true", default=FAST_PATH,
+                        help="Try plain HTTP + lxml extraction first, browser only as fallback (env SCRAPER_FAST_PATH=1)")
+    parser.add_argument("--serve", action="store_true", help="Run as a persistent HTTP server with a warm browser")
+    parser.add_argument("--host", type=str, default=SERVE_HOST, help=f"Server bind address (default {SERVE_HOST})")
+    parser.add_argument("--port", type=int, default=SERVE_PORT, help=f"Server port (default {SERVE_PORT})")
+    parser.add_argument("--socket", type=str, default=None, help="Listen on a Unix socket instead of TCP")
+    parser.add_argument("--contexts", type=int, default=SERVE_CONTEXTS, help=f"Reusable browser contexts in serve mode (default {SERVE_CONTEXTS})")
+    parser.add_argument("--fixed-concurrency", action="store_true", default=not ADAPTIVE,
+                        help="Always scrape --contexts / --concurrency codes at once instead of adapting "
+                             "to the portal's latency and errors (env SCRAPER_ADAPTIVE=0)")
+    parser.add_argument("--no-cache", action="store_true", help="Do not read or write the on-disk result cache")
+    parser.add_argument("--max-age", type=float, default=None,
+                        help=f"Only use cached results younger than this many seconds (default: cache TTL, {CACHE_TTL:g}s)")
     args = parser.parse_args()
-
-    asyncio.run(run_single(args.code, headless=not args.visible, json_output=args.json))
+    use_cache = not args.no_cache
+
+    if args.serve:
+        asyncio.run(serve(args.host, args.port, args.socket, headless=not args.visible, pool_size=args.contexts,
+                          fast_path=args.fast, use_cache=use_cache, max_age=args.max_age,
+                          adaptive=not args.fixed_concurrency))
+        return
+
+    if args.codes:
+        codes = parse_codes(args.codes)
+        if not codes:
+            parser.error("--codes did not contain any numeric code")
+        asyncio.run(run_batch(codes, headless=not args.visible, concurrency=args.concurrency, fast_path=args.fast,
+                              use_cache=use_cache, max_age=args.max_age, adaptive=not args.fixed_concurrency))
+        return
+
+    if not args.code:
+        parser.error("--code or --codes is required unless --serve is given")
+
+    asyncio.run(run_single(args.code, headless=not args.visible, json_output=args.json, fast_path=args.fast,
+                           use_cache=use_cache, max_age=args.max_age))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,56 @@
+"""
+GET /metrics of the persistent scraper, served by handle_http on an ephemeral port.
+
+    python -m pytest API-php/tests
+"""
+import asyncio
+
+import scraper
+
+
+class StubService:
+    """/health and /metrics never reach the browser."""
+    pool_size = 2
+
+
+async def http_get(port: int, path: str) -> str:
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(f"GET {path} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode("latin-1"))
+    await writer.drain()
+    response = (await reader.read()).decode("utf-8")
+    writer.close()
+    return response
+
+
+async def scrape_metrics() -> str:
+    service = StubService()
+    server = await asyncio.start_server(
+        lambda reader, writer: scraper.handle_http(service, reader, writer), "127.0.0.1", 0
+    )
+    port = server.sockets[0].getsockname()[1]
+    try:
+        await http_get(port, "/health")  # counted once its response is sent
+        return await http_get(port, "/metrics")
+    finally:
+        server.close()
+        await server.wait_closed()
+
+
+def test_metrics_endpoint():
+    response = asyncio.run(scrape_metrics())
+    head, _, body = response.partition("\r\n\r\n")
+    assert head.startswith("HTTP/1.1 200")
+    assert "Content-Type: text/plain; version=0.0.4" in head
+    lines = body.splitlines()
+
+    # Counter
+    assert "# TYPE scraper_http_requests_total counter" in lines
+    assert any(line.startswith('scraper_http_requests_total{route="/health",status="200"} ') for line in lines)
+    # Histogram
+    assert "# TYPE scraper_http_request_seconds histogram" in lines
+    assert any(line.startswith('scraper_http_request_seconds_bucket{route="/health",le="+Inf"} ') for line in lines)
+    assert any(line.startswith('scraper_http_request_seconds_count{route="/health"} ') for line in lines)
+    # Gauges
+    assert "# TYPE scraper_active_pages gauge" in lines
+    assert "scraper_active_pages 0" in lines
+    assert "scraper_queue_depth 0" in lines
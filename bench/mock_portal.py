@@ -0,0 +1,560 @@
+"""
+Local mock of the investor portal (investor.sw.gov.qa) for offline benchmarks.
+
+Serves the pages the scrapers walk through, with the structure they rely on
+(absolute XPaths, ids, `page-number`, `orange-text`, `nextPage()`, the
+approvals accordion):
+
+    /wps/portal/investors/home/...                      home page: header search, footer link, language toggle
+    /wps/portal/investors/information-center/ba         business activities listing (search, page size, pages)
+    /wps/portal/investors/information-center/ba/details?bacode=CODE
+                                                        details page: locations, eligibility, approvals
+    /mock/api/activities?q=&page=&size=                 JSON the listing and the header search render client side
+    /mock/api/details?bacode=&lang=                     details fragment (--client-render)
+    /mock/lang?to=ar&next=URL                           language toggle (cookie), behind #swChangeLangLink
+    /mock/stats                                         requests served per route (read by run_bench.py)
+
+Every response waits --latency-ms +- --jitter-ms (XHRs: --api-latency-ms), so
+timings reflect round trips rather than loopback speed. The pages keep
+`$http.pendingRequests` in a tiny `angular` stand-in, so the scrapers'
+Angular-idle waits behave as on the live site.
+
+Activities come from a synthetic catalogue (--codes N, deterministic per --seed).
+A directory of recorded details pages (--pages DIR, files CODE.en.html /
+CODE.ar.html) replaces the generated page of those codes.
+
+    python bench/mock_portal.py --port 8765 --codes 300 --latency-ms 250 --jitter-ms 100
+    PORTAL_ORIGIN=http://127.0.0.1:8765 python docker-scraper/scrape_codes.py --sink csv
+"""
+import argparse
+import html
+import json
+import math
+import os
+import random
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from http.cookies import SimpleCookie
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, quote, urlsplit
+
+LIVE_ORIGIN = "https://investor.sw.gov.qa"
+HOME_PATH = "/wps/portal/investors/home/"
+LISTING_PATH = "/wps/portal/investors/information-center/ba"
+DETAILS_PATH = "/wps/portal/investors/information-center/ba/details"
+
+# ----------------------------
+# Synthetic catalogue
+# ----------------------------
+SUBJECTS = [
+    ("Trading in", "تجارة"), ("Manufacturing of", "صناعة"), ("Repair of", "إصلاح"),
+    ("Wholesale of", "بيع بالجملة"), ("Retail sale of", "بيع بالتجزئة"), ("Rental of", "تأجير"),
+    ("Installation of", "تركيب"), ("Maintenance of", "صيانة"), ("Import of", "استيراد"),
+]
+OBJECTS = [
+    ("building materials", "مواد البناء"), ("electrical equipment", "المعدات الكهربائية"),
+    ("textiles", "المنسوجات"), ("foodstuffs", "المواد الغذائية"), ("computers", "أجهزة الحاسوب"),
+    ("furniture", "الأثاث"), ("medical devices", "الأجهزة الطبية"), ("vehicles", "المركبات"),
+    ("jewellery", "المجوهرات"), ("cosmetics", "مستحضرات التجميل"), ("spare parts", "قطع الغيار"),
+]
+LOCATIONS = [
+    (("Commercial", "تجاري"), ("Shop", "محل")),
+    (("Commercial", "تجاري"), ("Office", "مكتب")),
+    (("Industrial", "صناعي"), ("Workshop", "ورشة")),
+    (("Industrial", "صناعي"), ("Warehouse", "مستودع")),
+    (("Residential", "سكني"), ("Home business", "عمل منزلي")),
+]
+ELIGIBILITY = [
+    ("Allowed for Qatari nationals", "مسموح للقطريين"),
+    ("Allowed for GCC nationals", "مسموح لمواطني دول مجلس التعاون"),
+    ("Allowed for Non-GCC nationals", "مسموح لغير مواطني دول مجلس التعاون"),
+    ("Requires a Qatari partner", "يتطلب شريكا قطريا"),
+]
+APPROVALS = [
+    (("Civil Defense approval", "موافقة الدفاع المدني"), ("Ministry of Interior", "وزارة الداخلية")),
+    (("Municipality approval", "موافقة البلدية"), ("Ministry of Municipality", "وزارة البلدية")),
+    (("Health license", "ترخيص صحي"), ("Ministry of Public Health", "وزارة الصحة العامة")),
+    (("Environmental permit", "تصريح بيئي"), ("Ministry of Environment", "وزارة البيئة")),
+    (("Commercial registration", "السجل التجاري"), ("Ministry of Commerce", "وزارة التجارة")),
+]
+
+
+@dataclass
+class MockActivity:
+    code: str
+    name: Dict[str, str]
+    locations: Dict[str, List[Tuple[str, str, str]]]
+    eligible: Dict[str, List[str]]
+    approvals: Dict[str, List[Tuple[str, str]]]
+    # Approval panels whose body is only injected when the heading is clicked
+    lazy_panels: List[int] = field(default_factory=list)
+
+
+def build_catalogue(count: int, seed: int = 1, lazy_approvals: float = 0.1) -> List[MockActivity]:
+    """`count` activities with 6-digit codes spread over every leading digit (same seed, same catalogue)."""
+    rng = random.Random(seed)
+    codes = sorted(rng.sample(range(1000, 1_000_000), count))
+    activities = []
+    for number in codes:
+        code = f"{number:06d}"
+        subject, obj = rng.choice(SUBJECTS), rng.choice(OBJECTS)
+        locations = rng.sample(LOCATIONS, rng.randint(0, 3))
+        fees = [f"{rng.choice((500, 1000, 1500, 2000, 5000))} QAR" for _ in locations]
+        eligible = rng.sample(ELIGIBILITY, rng.randint(1, 3))
+        approvals = rng.sample(APPROVALS, rng.choice((0, 0, 1, 2, 3, 4)))
+        activities.append(MockActivity(
+            code=code,
+            name={"en": f"{subject[0]} {obj[0]}", "ar": f"{subject[1]} {obj[1]}"},
+            locations={lang: [(main[i], sub[i], fee) for (main, sub), fee in zip(locations, fees)]
+                       for i, lang in enumerate(("en", "ar"))},
+            eligible={lang: [item[i] for item in eligible] for i, lang in enumerate(("en", "ar"))},
+            approvals={lang: [(title[i], agency[i]) for title, agency in approvals]
+                       for i, lang in enumerate(("en", "ar"))},
+            lazy_panels=[i for i in range(len(approvals)) if rng.random() < lazy_approvals],
+        ))
+    return activities
+
+
+# ----------------------------
+# Pages
+# ----------------------------
+TEXT = {
+    "en": {
+        "toggle": "العربية", "code": "Activity Code", "name": "Activity Name", "sector": "Sector",
+        "status": "Status", "active": "Active", "locations": "Locations and Fees", "main": "Main Location",
+        "sub": "Sub Location", "fee": "Fee", "eligibility": "Eligibility", "approvals": "Required Approvals",
+        "agency": "Agency", "no_approvals": "This activity does not require any approval",
+        "search": "Search", "business": "Business Activities", "results": "Results", "next": "Next",
+    },
+    "ar": {
+        "toggle": "English", "code": "رمز النشاط", "name": "اسم النشاط", "sector": "القطاع",
+        "status": "الحالة", "active": "فعال", "locations": "المواقع والرسوم", "main": "تصنيف الموقع",
+        "sub": "نوع الموقع", "fee": "الرسوم", "eligibility": "الأهلية", "approvals": "الموافقات المطلوبة",
+        "agency": "الجهة", "no_approvals": "هذا النشاط لا يتطلب موافقة",
+        "search": "Search", "business": "الأنشطة التجارية", "results": "النتائج", "next": "التالي",
+    },
+}
+
+# Stand-in for Angular: page_waits.py reads $http.pendingRequests through the injector,
+# scrape_codes.py's page jump sets the listing controller's page through scope()
+JS_COMMON = """
+window.mockHttp = {pendingRequests: []};
+window.mockScope = {$parent: null, $apply: function (fn) { fn(); }};
+window.angular = {element: function () { return {
+    injector: function () { return {get: function () { return window.mockHttp; }}; },
+    scope: function () { return window.mockScope; }
+}; }};
+function mockGet(url, done) {
+    var req = {url: url};
+    mockHttp.pendingRequests.push(req);
+    var xhr = new XMLHttpRequest();
+    xhr.open('GET', url);
+    xhr.onloadend = function () {
+        try { done(xhr.status === 200 ? JSON.parse(xhr.responseText) : null); }
+        finally { mockHttp.pendingRequests.splice(mockHttp.pendingRequests.indexOf(req), 1); }
+    };
+    xhr.send();
+}
+function esc(s) {
+    return String(s).replace(/[&<>"]/g, function (c) { return {'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;'}[c]; });
+}
+document.getElementById('searchIconId').onclick = function () {
+    document.getElementById('headerSearch').style.display = 'block';
+};
+document.getElementById('nav-business-tab').onclick = function () {
+    document.getElementById('nav-business').style.display = 'block';
+};
+document.getElementById('searchInput').oninput = function () {
+    var q = this.value, list = document.getElementById('businessList');
+    list.innerHTML = '';
+    if (!q) return;
+    mockGet('/mock/api/activities?size=10&q=' + encodeURIComponent(q), function (res) {
+        if (!res || document.getElementById('searchInput').value !== q) return;
+        list.innerHTML = res.items.map(function (a) {
+            return '<li><a href="__DETAILS__?bacode=' + a.code + '"><div>' + esc(a.name) + '</div></a></li>';
+        }).join('');
+    });
+};
+"""
+
+# Business activities listing: search, page size and nextPage(), rendered from /mock/api/activities
+JS_LISTING = """
+// The listing controller's scope, as angular.element(...).scope() returns it
+var state = window.mockScope;
+state.query = ''; state.currentPage = 1; state.pageSize = 10; state.totalPages = 1;
+state.nextPage = function () { if (state.currentPage < state.totalPages) { state.currentPage += 1; load(); } };
+function load() {
+    // The rendered page stays until the response replaces it (ng-repeat does the same)
+    mockGet('/mock/api/activities?q=' + encodeURIComponent(state.query) + '&page=' + state.currentPage + '&size=' + state.pageSize, function (res) {
+        if (!res) return;
+        state.totalPages = res.pages;
+        document.getElementById('totalResults').textContent = res.total;
+        document.getElementById('pageNumber').textContent = 'Page ' + res.page + ' / ' + res.pages;
+        document.getElementById('nextLi').className = 'page-item' + (res.page >= res.pages ? ' disabled' : '');
+        document.getElementById('activityItems').innerHTML = res.items.map(function (a) {
+            return '<div class="activity-item"><div class="orange-text ng-binding">' + a.code + '</div>'
+                + '<a class="ba-link" href="__DETAILS__?bacode=' + a.code + '">' + esc(a.name) + '</a></div>';
+        }).join('');
+    });
+}
+function search() { state.query = document.getElementById('listingSearch').value.trim(); state.currentPage = 1; load(); }
+document.getElementById('listingSearch').onkeydown = function (e) { if (e.key === 'Enter') search(); };
+document.getElementById('listingSearchButton').onclick = search;
+document.getElementById('removeFilter').onclick = function () {
+    document.getElementById('listingSearch').value = ''; state.query = ''; state.currentPage = 1; load();
+};
+document.getElementById('page_num_select').onchange = function () { state.pageSize = parseInt(this.value, 10); state.currentPage = 1; load(); };
+document.querySelector('#nextLi .page-link').onclick = function () { state.nextPage(); };
+load();
+"""
+
+# Approval panels: toggle on click; lazy panels get their body injected on the first click
+JS_DETAILS = """
+function bindPanels() {
+    document.querySelectorAll('[id^=heading] > button').forEach(function (btn) {
+        btn.onclick = function () {
+            var i = btn.parentNode.id.slice(7), panel = document.getElementById('collapse' + i);
+            var lazy = panel.getAttribute('data-lazy');
+            if (lazy) {
+                panel.removeAttribute('data-lazy');
+                setTimeout(function () { panel.innerHTML = lazy; }, 50);
+            }
+            panel.classList.toggle('show');
+        };
+    });
+}
+bindPanels();
+"""
+
+# --client-render: the details are filled in by script, like an un-prerendered Angular template
+JS_CLIENT_RENDER = """
+mockGet('/mock/api/details?bacode=' + encodeURIComponent(__CODE__) + '&lang=' + document.documentElement.lang, function (res) {
+    if (!res) return;
+    document.getElementById('detailsSection').innerHTML = res.html;
+    bindPanels();
+});
+"""
+
+
+def page_html(lang: str, title: str, section: str, script: str, next_url: str) -> str:
+    """
+    Full page. Body children: three header divs, div[4] with main/section[3] (the content the
+    scrapers address by absolute XPath), then the footer with the Business activities link.
+    """
+    t = TEXT[lang]
+    other = "ar" if lang == "en" else "en"
+    script = (JS_COMMON + script).replace("__DETAILS__", DETAILS_PATH)
+    return f"""<!DOCTYPE html>
+<html lang="{lang}" dir="{'rtl' if lang == 'ar' else 'ltr'}">
+<head>
+<meta charset="utf-8">
+<title>{html.escape(title)}</title>
+<style>
+[ng-cloak], .collapse, #headerSearch, #nav-business {{ display: none; }}
+.collapse.show {{ display: block; }}
+.orange-text {{ color: #c60; }}
+.page-item.disabled {{ opacity: .5; }}
+</style>
+</head>
+<body>
+<div class="top-bar"><a id="swChangeLangLink" href="/mock/lang?to={other}&amp;next={quote(next_url, safe='')}"><div>{t['toggle']}</div></a></div>
+<div class="header"><span id="searchIconId" role="button">&#128269;</span></div>
+<div id="headerSearch">
+  <nav><a id="nav-business-tab" href="javascript:void(0)">{t['business']}</a></nav>
+  <div id="nav-business"><input id="searchInput" type="text" autocomplete="off"><ul id="businessList"></ul></div>
+</div>
+<div class="wrapper"><div><div><section>
+  <div class="breadcrumb">{html.escape(title)}</div>
+  <div><main>
+    <section class="banner"></section>
+    <section class="intro"></section>
+    <section id="detailsSection">{section}</section>
+  </main></div>
+</section></div></div></div>
+<footer><section class="footer-links"><div><div>
+  <div><ul><li><a href="{HOME_PATH}">Home</a></li></ul></div>
+  <div><ul><li><a href="{HOME_PATH}">Investors</a></li><li><a href="{LISTING_PATH}">{t['business']}</a></li></ul></div>
+</div></div></section></footer>
+<script>{script}</script>
+</body>
+</html>"""
+
+
+def details_section(activity: MockActivity, lang: str) -> str:
+    """section[3] of a details page: .../div/div/div/div/div[1..10], field in div[N]/div[2]."""
+    t = TEXT[lang]
+    rows = "".join(
+        f"<tr><td>{html.escape(main)}</td><td>{html.escape(sub)}</td><td>{html.escape(fee)}</td></tr>"
+        for main, sub, fee in activity.locations[lang]
+    )
+    items = "".join(f"<li>{html.escape(item)}</li>" for item in activity.eligible[lang])
+    approvals = activity.approvals[lang]
+    if approvals:
+        panels = []
+        for i, (title, agency) in enumerate(approvals):
+            body = (f"<div><div><div><div>{t['agency']}</div><div>{html.escape(agency)}</div></div>"
+                    f"<div><div></div></div></div></div>")
+            if i in activity.lazy_panels:
+                panel = f'<div id="collapse{i}" class="collapse" data-lazy="{html.escape(body)}"></div>'
+            else:
+                panel = f'<div id="collapse{i}" class="collapse">{body}</div>'
+            panels.append(f'<div class="card"><div id="heading{i}"><button type="button">{i + 1}. {html.escape(title)}</button></div>{panel}</div>')
+        approvals_html = f"<div><h4>{t['approvals']}</h4></div><div>{''.join(panels)}</div>"
+    else:
+        approvals_html = f"<div></div><div>{t['no_approvals']}</div>"
+    fields = [
+        f"<div>{t['code']}</div><div>{activity.code}</div>",
+        "<div></div><div></div>",
+        f"<div>{t['name']}</div><div>{html.escape(activity.name[lang])}</div>",
+        f"<div>{t['sector']}</div><div>{html.escape(activity.name[lang].split(' ')[0])}</div>",
+        f"<div>{t['status']}</div><div>{t['active']}</div>",
+        "<div></div><div></div>",
+        "<div></div><div></div>",
+        (f"<div>{t['locations']}</div><div><table><thead><tr><th>{t['main']}</th><th>{t['sub']}</th>"
+         f"<th>{t['fee']}</th></tr></thead><tbody>{rows}</tbody></table></div>"),
+        (f"<div>{t['eligibility']}</div><div><table><tbody><tr><th>{t['eligibility']}</th></tr>"
+         f"<tr><td><ul>{items}</ul></td></tr></tbody></table></div>"),
+        approvals_html,
+    ]
+    return "<div><div><div><div>" + "".join(f"<div>{f}</div>" for f in fields) + "</div></div></div></div>"
+
+
+def listing_section(lang: str) -> str:
+    """section[3] of the listing: div[1] search box, div[2] counters / page size, div[3] results."""
+    t = TEXT[lang]
+    return f"""<div><div>
+  <div><div><div>
+    <input id="listingSearch" type="text" autocomplete="off">
+    <div><div><span id="removeFilter" role="button">&times;</span></div></div>
+    <button id="listingSearchButton" type="button">{t['search']}</button>
+  </div></div></div>
+  <div>
+    <div class="result-search-info">{t['results']}: <span id="totalResults"></span></div>
+    <select id="page_num_select"><option>10</option><option>30</option><option>50</option></select>
+  </div>
+  <div>
+    <div id="pills-activities">
+      <div id="activityItems"></div>
+      <div class="page-number" id="pageNumber"></div>
+      <ul class="pagination"><li id="nextLi" class="page-item" ng-click="nextPage()"><div class="page-link">{t['next']}</div></li></ul>
+    </div>
+  </div>
+</div></div>"""
+
+
+# ----------------------------
+# Server
+# ----------------------------
+class MockPortal:
+    """The mock site: catalogue, latency model and request counters; serves on a background thread."""
+
+    def __init__(self, activities: List[MockActivity], host: str = "127.0.0.1", port: int = 0,
+                 latency_ms: float = 200.0, jitter_ms: float = 100.0, api_latency_ms: Optional[float] = None,
+                 client_render: bool = False, pages_dir: Optional[str] = None, seed: int = 1):
+        self.activities = activities
+        self.by_code = {a.code: a for a in activities}
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.api_latency_ms = latency_ms if api_latency_ms is None else api_latency_ms
+        self.client_render = client_render
+        self.pages_dir = pages_dir
+        self.requests: Counter = Counter()
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.server = ThreadingHTTPServer((host, port), _make_handler(self))
+        self.server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def origin(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "MockPortal":
+        self._thread = threading.Thread(target=self.server.serve_forever, name="mock-portal", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+    def delay(self, api: bool) -> None:
+        base = self.api_latency_ms if api else self.latency_ms
+        with self._lock:
+            ms = base + self._rng.uniform(-self.jitter_ms, self.jitter_ms)
+        if ms > 0:
+            time.sleep(ms / 1000)
+
+    def count(self, route: str) -> None:
+        with self._lock:
+            self.requests[route] += 1
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self.requests)
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self.requests.clear()
+
+    def search(self, q: str, lang: str) -> List[MockActivity]:
+        """Like the portal: codes or names containing q."""
+        q = q.strip().lower()
+        if not q:
+            return self.activities
+        return [a for a in self.activities if q in a.code or q in a.name[lang].lower()]
+
+    def recorded_page(self, code: str, lang: str) -> Optional[str]:
+        """Recorded details page of code (--pages), with live-site links pointed at the mock."""
+        if not self.pages_dir:
+            return None
+        path = os.path.join(self.pages_dir, f"{code}.{lang}.html")
+        if not os.path.exists(path):
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            return f.read().replace(LIVE_ORIGIN, self.origin)
+
+
+def _make_handler(portal: MockPortal):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def _lang(self, query: Dict[str, List[str]]) -> str:
+            """?lang=, then the toggle cookie, then Accept-Language (what details_http.py sends)."""
+            if query.get("lang", [""])[0] in TEXT:
+                return query["lang"][0]
+            cookie = SimpleCookie(self.headers.get("Cookie", ""))
+            if "lang" in cookie and cookie["lang"].value in TEXT:
+                return cookie["lang"].value
+            return "ar" if self.headers.get("Accept-Language", "").lower().startswith("ar") else "en"
+
+        def _send(self, status: int, body: str, content_type: str = "text/html; charset=utf-8",
+                  headers: Optional[Dict[str, str]] = None) -> None:
+            payload = body.encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(payload)))
+            self.send_header("Cache-Control", "no-store")
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def _json(self, data) -> None:
+            self._send(200, json.dumps(data, ensure_ascii=False), "application/json; charset=utf-8")
+
+        def do_GET(self):
+            parts = urlsplit(self.path)
+            path, query = parts.path.rstrip("/") or "/", parse_qs(parts.query)
+            lang = self._lang(query)
+
+            if path == "/mock/stats":
+                return self._json({"requests": portal.stats()})
+
+            if path == "/mock/lang":
+                to = query.get("to", ["en"])[0]
+                portal.count("toggle")
+                portal.delay(api=False)
+                return self._send(302, "", headers={
+                    "Location": query.get("next", [HOME_PATH])[0],
+                    "Set-Cookie": f"lang={to if to in TEXT else 'en'}; Path=/",
+                })
+
+            if path == "/mock/api/activities":
+                portal.count("api_activities")
+                portal.delay(api=True)
+                found = portal.search(query.get("q", [""])[0], lang)
+                size = max(1, int(query.get("size", ["10"])[0]))
+                pages = max(1, math.ceil(len(found) / size))
+                page = min(max(1, int(query.get("page", ["1"])[0])), pages)
+                items = found[(page - 1) * size:page * size]
+                return self._json({
+                    "total": len(found), "page": page, "pages": pages,
+                    "items": [{"code": a.code, "name": a.name[lang]} for a in items],
+                })
+
+            if path == "/mock/api/details":
+                portal.count("api_details")
+                portal.delay(api=True)
+                activity = portal.by_code.get(query.get("bacode", [""])[0])
+                if activity is None:
+                    return self._send(404, "{}", "application/json")
+                return self._json({"html": details_section(activity, lang)})
+
+            if path == DETAILS_PATH:
+                portal.count("details")
+                portal.delay(api=False)
+                code = query.get("bacode", [""])[0]
+                recorded = portal.recorded_page(code, lang)
+                if recorded is not None:
+                    return self._send(200, recorded)
+                activity = portal.by_code.get(code)
+                if activity is None:
+                    # Like the live site: an empty details template, nothing for the scrapers to find
+                    return self._send(200, page_html(lang, "Details", "", JS_DETAILS, self.path))
+                if portal.client_render:
+                    skeleton = details_section(MockActivity(
+                        code="{{ activity.code }}", name={lang: "{{ activity.name }}"},
+                        locations={lang: []}, eligible={lang: []}, approvals={lang: []},
+                    ), lang).replace("<div>", '<div ng-cloak="">', 1)
+                    script = JS_DETAILS + JS_CLIENT_RENDER.replace("__CODE__", json.dumps(code))
+                    return self._send(200, page_html(lang, "Details", skeleton, script, self.path))
+                return self._send(200, page_html(lang, activity.name[lang], details_section(activity, lang),
+                                                 JS_DETAILS, self.path))
+
+            if path == LISTING_PATH:
+                portal.count("listing")
+                portal.delay(api=False)
+                return self._send(200, page_html(lang, TEXT[lang]["business"], listing_section(lang), JS_LISTING, self.path))
+
+            if path.startswith(HOME_PATH.rstrip("/")) or path == "/":
+                portal.count("home")
+                portal.delay(api=False)
+                return self._send(200, page_html(lang, "Investor Portal", "", "", self.path))
+
+            portal.count("not_found")
+            self._send(404, "Not found", "text/plain")
+
+    return Handler
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Local mock of the investor portal for offline benchmarks")
+    parser.add_argument("--host", default="127.0.0.1", help="Bind address (default 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8765, help="Port (default 8765)")
+    parser.add_argument("--codes", type=int, default=300, help="Activities in the synthetic catalogue (default 300)")
+    parser.add_argument("--seed", type=int, default=1, help="Catalogue / jitter seed (default 1)")
+    parser.add_argument("--latency-ms", type=float, default=200.0, help="Mean delay of page loads (default 200)")
+    parser.add_argument("--api-latency-ms", type=float, default=None, help="Mean delay of XHRs (default: --latency-ms)")
+    parser.add_argument("--jitter-ms", type=float, default=100.0, help="Uniform +- jitter on every delay (default 100)")
+    parser.add_argument("--lazy-approvals", type=float, default=0.1,
+                        help="Share of approval panels injected only on click (default 0.1)")
+    parser.add_argument("--client-render", action="store_true",
+                        help="Fill the details pages in by script (static HTML has no data, the fast path falls back)")
+    parser.add_argument("--pages", default=None, help="Directory of recorded details pages (CODE.en.html, CODE.ar.html)")
+    args = parser.parse_args()
+
+    portal = MockPortal(
+        build_catalogue(args.codes, args.seed, args.lazy_approvals), args.host, args.port,
+        latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, api_latency_ms=args.api_latency_ms,
+        client_render=args.client_render, pages_dir=args.pages, seed=args.seed,
+    )
+    print(f"Mock portal on {portal.origin} ({args.codes} activities, latency {args.latency_ms:g}+-{args.jitter_ms:g} ms)")
+    print(f"Point the scrapers at it with PORTAL_ORIGIN={portal.origin}")
+    try:
+        portal.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        portal.server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,294 @@
+"""
+Offline benchmark of the scrapers against the local mock portal (mock_portal.py).
+
+Starts the mock on a free port and runs each target against it through
+PORTAL_ORIGIN, in a throw-away copy of its directory (so output/, cache/ and
+the checkpoints of the real runs are never touched):
+
+    listing   docker-scraper/scrape_codes.py --sink csv     (every catalogue code, page by page)
+    details   docker-scraper/scrape-EN.py --sink sqlite     (--codes codes, from a written snapshot)
+    api       API-php/scraper.py --codes ... --no-cache     (--codes codes, batch mode)
+
+Reported per target: codes per minute, p50/p95 latency per unit of work
+(listing: page render, details: code, api: code), peak memory of the whole
+process tree (Python + browsers) and portal requests per code.
+
+    python bench/run_bench.py
+    python bench/run_bench.py --target api --codes 40 --latency-ms 300 --jitter-ms 150 --api-args "--concurrency 4"
+    python bench/run_bench.py --output bench-results.json --baseline bench/baseline.json --max-regression 0.15
+
+With --baseline, the run exits with status 1 when a target got slower, hungrier
+or less reliable than the baseline by more than --max-regression, so CI can gate on it.
+"""
+import argparse
+import json
+import os
+import shlex
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from typing import Dict, List
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+SCRAPER_DIR = os.path.join(REPO_DIR, "docker-scraper")
+API_DIR = os.path.join(REPO_DIR, "API-php")
+
+sys.path.insert(0, SCRAPER_DIR)
+sys.path.insert(0, API_DIR)
+from metrics import process_tree_rss  # API-php/metrics.py
+from mock_portal import MockPortal, build_catalogue
+from tracing import CODE_STAGE, load_trace, percentile  # docker-scraper/tracing.py
+
+TARGETS = ("listing", "details", "api")
+# Results where a higher value is worse, and the one where lower is worse
+HIGHER_IS_WORSE = ("p95_ms", "peak_rss_mb", "requests_per_code")
+LOWER_IS_WORSE = ("codes_per_minute",)
+
+
+class PeakRSS:
+    """Samples the resident memory of a process and its children until stopped; keeps the peak."""
+
+    def __init__(self, pid: int, interval: float = 0.25):
+        self.pid = pid
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.peak = max(self.peak, process_tree_rss(self.pid))
+            except Exception:
+                pass
+            self._stop.wait(self.interval)
+
+    def __enter__(self) -> "PeakRSS":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._stop.set()
+        self._thread.join()
+
+
+def copy_tree(src: str, workdir: str, target: str) -> str:
+    """Copy a scraper directory for one target, without its run state (output, cache, credentials)."""
+    dst = os.path.join(workdir, target, os.path.basename(src))
+    shutil.copytree(src, dst, ignore=shutil.ignore_patterns("output", "cache", "drive", "__pycache__", "*.png"))
+    return dst
+
+
+def run_target(cmd: List[str], cwd: str, env: Dict[str, str], log_path: str, timeout: float) -> Dict[str, float]:
+    """Run one scraper process; returns wall time, exit code and peak memory. Output goes to log_path."""
+    started = time.time()
+    with open(log_path, "w", encoding="utf-8") as log:
+        proc = subprocess.Popen(cmd, cwd=cwd, env=env, stdout=log, stderr=subprocess.STDOUT)
+        with PeakRSS(proc.pid) as rss:
+            try:
+                returncode = proc.wait(timeout=timeout)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+                returncode = proc.wait()
+                log.write(f"\n[bench] killed after {timeout:g}s\n")
+    return {"wall_s": time.time() - started, "returncode": returncode, "peak_rss_mb": rss.peak / 2**20}
+
+
+def stage_ms(trace_path: str, name: str) -> List[float]:
+    if not os.path.exists(trace_path):
+        return []
+    return sorted(r["ms"] for r in load_trace(trace_path) if r["stage"] == name and r.get("ok", True))
+
+
+def bench_listing(args, env: Dict[str, str], workdir: str, expected: int) -> Dict:
+    cwd = copy_tree(SCRAPER_DIR, workdir, "listing")
+    trace = os.path.join(workdir, "listing-trace.jsonl")
+    cmd = [sys.executable, "scrape_codes.py", "--sink", "csv", "--trace", trace] + shlex.split(args.listing_args)
+    result = run_target(cmd, cwd, env, os.path.join(workdir, "listing.log"), args.timeout)
+    codes_path = os.path.join(cwd, "output", "codes.csv")
+    if os.path.exists(codes_path):
+        with open(codes_path, "r", encoding="utf-8-sig") as f:
+            ok = max(0, sum(1 for _ in f) - 1)
+    else:
+        ok = 0
+    return {**result, "codes": expected, "ok": ok, "unit": "page", "latencies_ms": stage_ms(trace, "page_render")}
+
+
+def bench_details(args, env: Dict[str, str], workdir: str, codes: List[str]) -> Dict:
+    cwd = copy_tree(SCRAPER_DIR, workdir, "details")
+    # The codes to scrape: a listing snapshot, as scrape_codes.py would leave it
+    os.makedirs(os.path.join(cwd, "output"), exist_ok=True)
+    with open(os.path.join(cwd, "output", "codes_snapshot.json"), "w", encoding="utf-8") as f:
+        json.dump({"taken_at": time.time(), "previous_taken_at": None, "codes": codes, "added": codes, "removed": []}, f)
+    trace = os.path.join(workdir, "details-trace.jsonl")
+    cmd = [sys.executable, "scrape-EN.py", "--sink", "sqlite", "--trace", trace] + shlex.split(args.details_args)
+    result = run_target(cmd, cwd, env, os.path.join(workdir, "details.log"), args.timeout)
+    ok = 0
+    db_path = os.path.join(cwd, "output", "scrape.sqlite3")
+    if os.path.exists(db_path):
+        conn = sqlite3.connect(db_path)
+        try:
+            ok = conn.execute("SELECT COUNT(*) FROM activities WHERE lang = 'en'").fetchone()[0]
+        finally:
+            conn.close()
+    return {**result, "codes": len(codes), "ok": ok, "unit": "code", "latencies_ms": stage_ms(trace, CODE_STAGE)}
+
+
+def bench_api(args, env: Dict[str, str], workdir: str, codes: List[str]) -> Dict:
+    cwd = copy_tree(API_DIR, workdir, "api")
+    log_path = os.path.join(workdir, "api.log")
+    cmd = [sys.executable, "scraper.py", "--codes", ",".join(codes), "--no-cache"] + shlex.split(args.api_args)
+    result = run_target(cmd, cwd, env, log_path, args.timeout)
+    ok, latencies = 0, []
+    with open(log_path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                row = json.loads(line)
+            except ValueError:
+                continue # service logs share the file
+            if isinstance(row, dict) and "elapsed_s" in row:
+                latencies.append(row["elapsed_s"] * 1000)
+                ok += row.get("status") == "success"
+    return {**result, "codes": len(codes), "ok": ok, "unit": "code", "latencies_ms": sorted(latencies)}
+
+
+def summarize(result: Dict, requests: Dict[str, int]) -> Dict:
+    latencies = result.pop("latencies_ms")
+    total_requests = sum(requests.values())
+    return {
+        **result,
+        "codes_per_minute": round(result["ok"] / result["wall_s"] * 60, 1) if result["wall_s"] else 0.0,
+        "p50_ms": round(percentile(latencies, 50)),
+        "p95_ms": round(percentile(latencies, 95)),
+        "samples": len(latencies),
+        "requests": requests,
+        "requests_per_code": round(total_requests / result["codes"], 2) if result["codes"] else 0.0,
+        "wall_s": round(result["wall_s"], 1),
+        "peak_rss_mb": round(result["peak_rss_mb"], 1),
+    }
+
+
+def compare(results: Dict[str, Dict], baseline: Dict[str, Dict], max_regression: float) -> List[str]:
+    """Regressions of results against baseline, as printable lines (empty: none)."""
+    problems = []
+    for name, res in results.items():
+        if res["ok"] < res["codes"]:
+            problems.append(f"{name}: {res['codes'] - res['ok']} of {res['codes']} codes failed")
+        base = baseline.get(name)
+        if not base:
+            continue
+        for key in LOWER_IS_WORSE + HIGHER_IS_WORSE:
+            old, new = base.get(key), res.get(key)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            if (key in LOWER_IS_WORSE and change < -max_regression) or (key in HIGHER_IS_WORSE and change > max_regression):
+                problems.append(f"{name}: {key} {old:g} -> {new:g} ({change:+.0%})")
+    return problems
+
+
+def print_report(results: Dict[str, Dict], config: Dict) -> None:
+    print("\n" + "="*94)
+    print(f"BENCHMARK (mock portal: {config['catalogue']} activities, latency {config['latency_ms']:g}"
+          f"+-{config['jitter_ms']:g} ms{', client render' if config['client_render'] else ''})")
+    print("="*94)
+    print(f"{'Target':<10}{'Codes':>7}{'OK':>6}{'Wall s':>9}{'Codes/min':>11}{'Unit':>7}{'p50 ms':>9}{'p95 ms':>9}"
+          f"{'Peak RSS MB':>13}{'Req/code':>10}")
+    for name, res in results.items():
+        print(f"{name:<10}{res['codes']:>7}{res['ok']:>6}{res['wall_s']:>9.1f}{res['codes_per_minute']:>11.1f}"
+              f"{res['unit']:>7}{res['p50_ms']:>9}{res['p95_ms']:>9}{res['peak_rss_mb']:>13.1f}{res['requests_per_code']:>10.2f}")
+    print("="*94)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the scrapers against a local mock of the investor portal")
+    parser.add_argument("--target", default=",".join(TARGETS), help=f"Comma separated targets (default {','.join(TARGETS)})")
+    parser.add_argument("--catalogue", type=int, default=300, help="Activities on the mock portal = codes listed (default 300)")
+    parser.add_argument("--codes", type=int, default=30, help="Codes scraped by the details and api targets (default 30)")
+    parser.add_argument("--latency-ms", type=float, default=200.0, help="Mean page latency of the mock (default 200)")
+    parser.add_argument("--api-latency-ms", type=float, default=None, help="Mean XHR latency (default: --latency-ms)")
+    parser.add_argument("--jitter-ms", type=float, default=100.0, help="Uniform +- jitter (default 100)")
+    parser.add_argument("--client-render", action="store_true", help="Details filled in by script (fast path falls back)")
+    parser.add_argument("--pages", default=None, help="Recorded details pages to serve (CODE.en.html / CODE.ar.html)")
+    parser.add_argument("--seed", type=int, default=1, help="Catalogue / jitter seed (default 1)")
+    parser.add_argument("--listing-args", default="", help="Extra arguments for scrape_codes.py (e.g. \"--shards 4\")")
+    parser.add_argument("--details-args", default="", help="Extra arguments for scrape-EN.py (e.g. \"--workers 2 --fast\")")
+    parser.add_argument("--api-args", default="", help="Extra arguments for API-php/scraper.py (e.g. \"--concurrency 4\")")
+    parser.add_argument("--timeout", type=float, default=1800, help="Seconds before a target is killed (default 1800)")
+    parser.add_argument("--output", default=None, help="Write the results as JSON")
+    parser.add_argument("--baseline", default=None, help="Results JSON of an earlier run to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.2,
+                        help="Allowed relative change against the baseline (default 0.2 = 20%%)")
+    parser.add_argument("--keep", action="store_true", help="Keep the work directory (logs, traces, outputs)")
+    args = parser.parse_args()
+
+    targets = [t.strip() for t in args.target.split(",") if t.strip()]
+    unknown = [t for t in targets if t not in TARGETS]
+    if unknown:
+        parser.error(f"unknown target(s) {', '.join(unknown)} (use {', '.join(TARGETS)})")
+
+    catalogue = build_catalogue(args.catalogue, args.seed)
+    # Spread the scraped codes over the whole catalogue
+    step = max(1, len(catalogue) // max(1, args.codes))
+    codes = [a.code for a in catalogue[::step]][:args.codes]
+
+    portal = MockPortal(catalogue, latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+                        api_latency_ms=args.api_latency_ms, client_render=args.client_render,
+                        pages_dir=args.pages, seed=args.seed).start()
+    env = {**os.environ, "PORTAL_ORIGIN": portal.origin, "PYTHONIOENCODING": "utf-8"}
+    workdir = tempfile.mkdtemp(prefix="scraper-bench-")
+    print(f"Mock portal on {portal.origin}, work directory {workdir}")
+
+    results: Dict[str, Dict] = {}
+    try:
+        for name in targets:
+            print(f"Running {name} ...", flush=True)
+            portal.reset_stats()
+            if name == "listing":
+                res = bench_listing(args, env, workdir, len(catalogue))
+            elif name == "details":
+                res = bench_details(args, env, workdir, codes)
+            else:
+                res = bench_api(args, env, workdir, codes)
+            results[name] = summarize(res, portal.stats())
+            if results[name]["returncode"] != 0:
+                print(f"  {name} exited with {results[name]['returncode']} (log: {os.path.join(workdir, name + '.log')}"
+                      + ("" if args.keep else ", rerun with --keep to read it") + ")")
+    finally:
+        portal.stop()
+        if not args.keep:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    config = {
+        "catalogue": args.catalogue, "codes": len(codes), "latency_ms": args.latency_ms,
+        "api_latency_ms": args.api_latency_ms, "jitter_ms": args.jitter_ms, "client_render": args.client_render,
+        "seed": args.seed, "listing_args": args.listing_args, "details_args": args.details_args, "api_args": args.api_args,
+    }
+    print_report(results, config)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"config": config, "targets": results}, f, indent=2)
+        print(f"Results written to {args.output}")
+
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f).get("targets", {})
+    problems = compare(results, baseline, args.max_regression)
+    if problems:
+        print("\nFailures / regressions:")
+        for line in problems:
+            print(f"  ✗ {line}")
+        sys.exit(1)
+    if baseline:
+        print(f"\nNo regression beyond {args.max_regression:.0%} against {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+# pyright: reportMissingImports=false
+"""
+Checkpoint store for the details scraper (SQLite under output/).
+
+Every run is a *generation*. For each code the store records status,
+a hash of the scraped result and a timestamp. `--resume` reopens the last
+unfinished generation and skips the codes it already finished, so a crash
+or a VPS reboot only costs the rows that were still buffered.
+
+A code is only marked done once its rows have actually reached the sheet:
+results are staged first and committed when every worksheet they were
+written to has flushed (see `BufferedSheetWriter.on_flush`).
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    generation  INTEGER PRIMARY KEY AUTOINCREMENT,
+    langs       TEXT NOT NULL,
+    started_at  REAL NOT NULL,
+    finished_at REAL
+);
+CREATE TABLE IF NOT EXISTS codes (
+    generation  INTEGER NOT NULL,
+    code        TEXT NOT NULL,
+    status      TEXT NOT NULL,
+    result_hash TEXT,
+    error       TEXT,
+    updated_at  REAL NOT NULL,
+    PRIMARY KEY (generation, code)
+);
+"""
+
+
+def result_hash(result) -> str:
+    """Stable hash of a result object (key order does not matter)."""
+    payload = json.dumps(result, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class CheckpointStore:
+    """
+    Usage:
+        store = CheckpointStore(path)
+        generation = store.begin("en,ar", resume=True)
+        skip = store.done_codes()
+        ...
+        store.stage(code, ok, result, error, waiting_on=["en", "ar"])
+        writer.on_flush = lambda: store.flushed("en")
+        ...
+        store.finish()
+    """
+
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript(SCHEMA)
+        self.generation: Optional[int] = None
+        # code -> (row values, worksheets that still have to flush it)
+        self._staged: Dict[str, Tuple[tuple, Set[str]]] = {}
+
+    def begin(self, langs: str, resume: bool = False) -> int:
+        """Start a new generation, or reopen the last unfinished one for the same langs."""
+        if resume:
+            row = self.conn.execute(
+                "SELECT generation FROM runs WHERE langs = ? AND finished_at IS NULL "
+                "ORDER BY generation DESC LIMIT 1", (langs,)
+            ).fetchone()
+            if row:
+                self.generation = row[0]
+                return self.generation
+            print("No unfinished run to resume, starting a new one")
+        cur = self.conn.execute(
+            "INSERT INTO runs (langs, started_at) VALUES (?, ?)", (langs, time.time())
+        )
+        self.conn.commit()
+        self.generation = cur.lastrowid
+        return self.generation
+
+    def done_codes(self) -> Set[str]:
+        """Codes finished successfully in the current generation."""
+        rows = self.conn.execute(
+            "SELECT code FROM codes WHERE generation = ? AND status = 'ok'", (self.generation,)
+        )
+        return {code for (code,) in rows}
+
+    def latest_results(self, langs: str) -> Dict[str, Tuple[str, float]]:
+        """code -> (result_hash, updated_at) of its most recent successful scrape, over all runs for langs."""
+        rows = self.conn.execute(
+            "SELECT c.code, c.result_hash, MAX(c.updated_at) FROM codes c "
+            "JOIN runs r ON r.generation = c.generation "
+            "WHERE r.langs = ? AND c.status = 'ok' GROUP BY c.code", (langs,)
+        )
+        return {code: (digest, updated_at) for code, digest, updated_at in rows}
+
+    def stage(self, code: str, ok: bool, result=None, error: Optional[str] = None,
+              waiting_on: Iterable[str] = ()) -> None:
+        """Record the outcome of a code; committed once every worksheet in waiting_on has flushed."""
+        values = (
+            self.generation, code, "ok" if ok else "failed",
+            result_hash(result) if result else None, error, time.time(),
+        )
+        waiting = set(waiting_on)
+        if waiting:
+            self._staged[code] = (values, waiting)
+        else:
+            self._write([values])
+
+    def flushed(self, worksheet: str) -> None:
+        """A worksheet writer flushed: commit the codes no longer waiting on any sheet."""
+        ready = []
+        for code, (values, waiting) in list(self._staged.items()):
+            waiting.discard(worksheet)
+            if not waiting:
+                ready.append(values)
+                del self._staged[code]
+        self._write(ready)
+
+    def _write(self, rows) -> None:
+        if not rows:
+            return
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO codes (generation, code, status, result_hash, error, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?)", rows
+        )
+        self.conn.commit()
+
+    def finish(self) -> None:
+        """Mark the generation complete (a later --resume starts a new one)."""
+        self.conn.execute(
+            "UPDATE runs SET finished_at = ? WHERE generation = ?", (time.time(), self.generation)
+        )
+        self.conn.commit()
+
+    def close(self) -> None:
+        self.conn.close()
@@ -0,0 +1,57 @@
+"""
+Snapshot of the activity code listing (output/codes_snapshot.json).
+
+scrape_codes.py saves the full code list after every complete listing run
+and records which codes were added / removed since the previous snapshot.
+details_engine.py --incremental reads it to limit a run to the delta.
+"""
+import json
+import os
+import time
+from typing import Dict, List, Optional
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+OUTPUT_DIR = os.path.join(SCRIPT_DIR, "output")
+SNAPSHOT_FILE = os.path.join(OUTPUT_DIR, "codes_snapshot.json")
+
+
+def load_snapshot(path: str = SNAPSHOT_FILE) -> Optional[Dict]:
+    """The last saved snapshot, or None if there is none (or it is unreadable)."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def diff_codes(previous: List[str], current: List[str]) -> Dict[str, List[str]]:
+    """Codes added to / removed from the listing, in listing order."""
+    prev_set, cur_set = set(previous), set(current)
+    return {
+        "added": [c for c in current if c not in prev_set],
+        "removed": [c for c in previous if c not in cur_set],
+    }
+
+
+def save_snapshot(codes: List[str], path: str = SNAPSHOT_FILE) -> Dict[str, List[str]]:
+    """
+    Store the current listing and return its diff against the previous one.
+    On the very first snapshot every code counts as added.
+    """
+    previous = load_snapshot(path)
+    current = list(dict.fromkeys(codes)) # dedupe, keep order
+    delta = diff_codes(previous["codes"] if previous else [], current)
+
+    snapshot = {
+        "taken_at": time.time(),
+        "previous_taken_at": previous["taken_at"] if previous else None,
+        "codes": current,
+        "added": delta["added"],
+        "removed": delta["removed"],
+    }
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(snapshot, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+    return delta
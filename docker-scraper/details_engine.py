@@ -0,0 +1,1105 @@
+# pyright: reportMissingImports=false
+"""
+Unified detail-scraping engine for the EN and AR worksheets.
+
+Each activity code is visited once: every field is read in the language the
+page arrived in, the site language is toggled once, and the other language is
+read. One record per language (records.py) then feeds the worksheets.
+
+    python details_engine.py --lang en,ar     # both sheets, one visit per code
+    python details_engine.py --lang en        # same as scrape-EN.py
+    python details_engine.py --sink sqlite    # local output only (codes from the listing snapshot)
+    python details_engine.py --record         # also save page fixtures for `python fixtures.py replay`
+"""
+import os
+import argparse
+import multiprocessing
+import multiprocessing.util
+import queue
+import time
+import re
+import warnings
+import gspread
+from typing import Optional, List, Sequence, Tuple, Dict, Any
+from oauth2client.service_account import ServiceAccountCredentials
+from aimd import AIMDWindow
+from sheet_writer import BackgroundSheetWriter, BufferedSheetWriter, TokenBucket, DEFAULT_WRITES_PER_MINUTE
+from checkpoint import CheckpointStore, result_hash
+from code_snapshot import load_snapshot
+from details_http import DETAILS_URL, PORTAL_ORIGIN, fetch_details, NeedsBrowser
+from page_waits import wait_for_angular_idle
+from lean_browser import new_driver, page_weight
+import fixtures
+import tracing
+from tracing import stage, trace_code, traced
+from records import Activity, Approval, Eligibility, LocationFee, sheet_fields
+from sinks import LocalSink, open_local_sinks, parse_sinks
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.common.keys import Keys
+from selenium.common.exceptions import TimeoutException
+
+# Suppress gspread deprecation warnings
+warnings.filterwarnings('ignore', category=UserWarning, module='gspread')
+
+# ----------------------------
+# Configuration
+# ----------------------------
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DRIVE_DIR = os.path.join(SCRIPT_DIR, "drive")
+OUTPUT_DIR = os.path.join(SCRIPT_DIR, "output")
+GOOGLE_CREDENTIALS_FILE = os.path.join(DRIVE_DIR, "google-credentials.json")
+CHECKPOINT_FILE = os.path.join(OUTPUT_DIR, "checkpoints.sqlite3")
+SPREADSHEET_NAME = "Filter"
+LANGUAGES = ("en", "ar")
+WORKSHEET_NAMES = {"en": "EN", "ar": "AR"}
+BASE_URLS = {
+    "en": PORTAL_ORIGIN + "/wps/portal/investors/home/!ut/p/z1/04_Sj9CPykssy0xPLMnMz0vMAfIjo8zivfxNXA393Q38LXy9DQzMAj0cg4NcLY0MDMz1w_Wj9KNQlISGGRkEOjuZBjm6Wxj7OxpCFRjgAI4G-sGJRfoF2dlpjo6KigD6q7KF/dz/d5/L0lHSkovd0RNQUZrQUVnQSEhLzROVkUvZW4!/",
+    "ar": PORTAL_ORIGIN + "/wps/portal/investors/home/!ut/p/z1/04_Sj9CPykssy0xPLMnMz0vMAfIjo8zivfxNXA393Q38LXy9DQzMAj0cg4NcLY0MDMz1w_Wj9KNQlISGGRkEOjuZBjm6Wxj7OxpCFRjgAI4G-sGpefoF2dlpjo6KigAeufkI/dz/d5/L0lHSkovd0RNQUZrQUVnQSEhLzROVkUvYXI!/",
+}
+BASE_URL = BASE_URLS["en"]
+
+# Details page XPaths
+X_ACTIVITY_CODE = "/html/body/div[4]/div/div/section/div[2]/main/section[3]/div/div/div/div/div[1]/div[2]"
+X_ACTIVITY_NAME = "/html/body/div[4]/div/div/section/div[2]/main/section[3]/div/div/div/div/div[3]/div[2]"
+X_TBODY = "/html/body/div[4]/div/div/section/div[2]/main/section[3]/div/div/div/div/div[8]/div[2]/table/tbody"
+X_ELIGIBLE = "/html/body/div[4]/div/div/section/div[2]/main/section[3]/div/div/div/div/div[9]/div[2]/table/tbody/tr[2]/td"
+X_ELIGIBLE_UL = X_ELIGIBLE + "/ul"
+X_NO_APPROVAL = "/html/body/div[4]/div/div/section/div[2]/main/section[3]/div/div/div/div/div[10]/div[2]"
+
+# Search flow selectors
+X_SEARCH_ICON = "//*[@id='searchIconId']"
+X_BUSINESS_TAB = "//*[@id='nav-business-tab']"
+CSS_SEARCH_INPUT = "input#searchInput"
+X_FIRST_ACTIVITY = "//*[@id='businessList']/li/a/div"
+X_LANG_TOGGLE = "//*[@id='swChangeLangLink']/div"
+
+# Additional Step (Footer Business Activities Search)
+X_FOOTER_BUSINESS_ACTIVITIES = "/html/body/footer/section[1]/div/div/div[2]/ul/li[2]/a"
+X_FOOTER_SEARCH_INPUT = "/html/body/div[4]/div/div/section/div[2]/main/section[3]/div/div/div[1]/div/div/input"
+X_FOOTER_SEARCH_CONTAINER = "/html/body/div[4]/div/div/section/div[2]/main/section[3]/div/div/div[1]/div"
+CSS_RESULTS_FIRST_ACTIVITY_LINK = "#pills-activities a.ba-link"
+
+# One-shot extraction snippet (shared with API-php/scraper.py)
+with open(os.path.join(SCRIPT_DIR, "extract_details.js"), "r", encoding="utf-8") as _f:
+    EXTRACT_DETAILS_JS = _f.read()
+EXTRACT_XPATHS = {
+    "code": X_ACTIVITY_CODE,
+    "name": X_ACTIVITY_NAME,
+    "tbody": X_TBODY,
+    "eligible": X_ELIGIBLE_UL,
+    "no_approval": X_NO_APPROVAL,
+}
+
+# Result field -> sheet column (Column B, the activity code, is written separately)
+SHEET_COLUMNS = [
+    ("name_ar", 3),
+    ("name_en", 4),
+    ("locations", 5),
+    ("eligible", 6),
+    ("approvals", 7),
+]
+SHEET_HEADERS = {
+    2: "Activity_Code",
+    3: "AR-Activity",
+    4: "EN-Activity",
+    5: "Location",
+    6: "Eligible",
+    7: "Approvals",
+}
+
+
+def format_column_b_as_text(worksheet):
+    """Format Column B as TEXT to preserve leading zeros"""
+    try:
+        worksheet.format("B:B", {
+            "numberFormat": {
+                "type": "TEXT"
+            }
+        })
+        return True
+    except Exception as e:
+        print(f"Warning: Could not format column B as TEXT: {e}")
+        return False
+
+
+def connect_to_spreadsheet():
+    scope = ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"]
+    credentials = ServiceAccountCredentials.from_json_keyfile_name(GOOGLE_CREDENTIALS_FILE, scope)
+    client = gspread.authorize(credentials)
+    return client.open(SPREADSHEET_NAME)
+
+
+def _safe_screenshot(driver, filename: str) -> None:
+    try:
+        driver.save_screenshot(filename)
+    except Exception:
+        pass
+
+
+def _get_lang(driver) -> str:
+    try:
+        return driver.execute_script("return document.documentElement.lang") or ""
+    except Exception:
+        return ""
+
+
+@traced("toggle")
+def set_language(driver, target_lang: str, timeout_s: int = 10) -> bool:
+    """
+    Toggle website language between Arabic and English.
+    target_lang: 'ar' or 'en'
+    """
+    try:
+        current_lang = _get_lang(driver)
+        if current_lang == target_lang:
+            return True
+
+        btn = WebDriverWait(driver, 10).until(
+            EC.element_to_be_clickable((By.XPATH, X_LANG_TOGGLE))
+        )
+        try:
+            driver.execute_script("arguments[0].scrollIntoView();", btn)
+        except Exception:
+            pass
+        btn.click()
+
+        # Wait until language changes
+        deadline = time.time() + timeout_s
+        while time.time() < deadline:
+            if _get_lang(driver) == target_lang:
+                time.sleep(1) # Wait for reload
+                return True
+            time.sleep(0.5)
+        return False
+    except Exception:
+        return False
+
+
+def click_xpath(driver, xpath: str, timeout_ms: int = 10_000) -> None:
+    element = WebDriverWait(driver, timeout_ms/1000).until(
+        EC.element_to_be_clickable((By.XPATH, xpath))
+    )
+    try:
+        driver.execute_script("arguments[0].scrollIntoView();", element)
+    except Exception:
+        pass
+    element.click()
+
+
+def fill_css(driver, selector: str, value: str, timeout_ms: int = 10_000) -> None:
+    element = WebDriverWait(driver, timeout_ms/1000).until(
+        EC.visibility_of_element_located((By.CSS_SELECTOR, selector))
+    )
+    element.clear()
+    element.send_keys(value)
+
+
+@traced("navigate")
+def direct_to_details(driver, code: str) -> bool:
+    """
+    FASTEST APPROACH: Go directly to the details page using the bacode URL parameter.
+    """
+    # Construct direct URL to details page
+    details_url = DETAILS_URL.format(code=code)
+    
+    driver.get(details_url)
+    
+    # Wait for the activity code element to be visible
+    try:
+        WebDriverWait(driver, 30).until(
+            EC.visibility_of_element_located((By.XPATH, X_ACTIVITY_CODE))
+        )
+        return True
+    except TimeoutException:
+        raise Exception("Details page did not load correctly via direct URL")
+
+
+@traced("footer_search")
+def additional_step_footer_business_search(driver, code: str):
+    """
+    Additional Step: use the footer Business Activities Search page to find and open the activity details.
+    """
+    driver.get(BASE_URL)
+    
+    # Scroll to footer and click Business activities
+    driver.execute_script("window.scrollTo(0, document.body.scrollHeight)")
+    
+    footer = WebDriverWait(driver, 20).until(
+        EC.element_to_be_clickable((By.XPATH, X_FOOTER_BUSINESS_ACTIVITIES))
+    )
+    footer.click()
+    
+    # Type code and trigger search
+    inp = WebDriverWait(driver, 20).until(
+        EC.visibility_of_element_located((By.XPATH, X_FOOTER_SEARCH_INPUT))
+    )
+    inp.send_keys(code)
+    try:
+        inp.send_keys(Keys.ENTER)
+    except Exception:
+        pass
+        
+    # Prefer real SEARCH button if present; fall back to container click
+    try:
+        btn = driver.find_elements(By.XPATH, "//button[contains(translate(normalize-space(.), 'search', 'SEARCH'), 'SEARCH')]")
+        if len(btn) > 0:
+            btn[0].click()
+        else:
+            driver.find_element(By.XPATH, X_FOOTER_SEARCH_CONTAINER).click()
+    except Exception:
+        try:
+            driver.find_element(By.XPATH, X_FOOTER_SEARCH_CONTAINER).click()
+        except Exception:
+            pass
+            
+    # Results render under pills-activities
+    WebDriverWait(driver, 20).until(
+        EC.presence_of_element_located((By.CSS_SELECTOR, "#pills-activities"))
+    )
+    
+    # Find exact match by href
+    all_links = driver.find_elements(By.CSS_SELECTOR, CSS_RESULTS_FIRST_ACTIVITY_LINK)
+    link = None
+    for cur in all_links:
+        href = cur.get_attribute("href")
+        bacode_match = re.search(r"(?:\?|&)bacode=(\d+)", href or "")
+        bacode = bacode_match.group(1) if bacode_match else None
+        
+        if bacode == code:
+            link = cur
+            break
+            
+    if link is None:
+        if len(all_links) > 0:
+            raise Exception(f"No exact match found for code {code}")
+        raise Exception("No results found")
+
+    # Handle new tab logic if needed
+    current_handles = driver.window_handles
+    link.click()
+    time.sleep(2)
+    new_handles = driver.window_handles
+    
+    if len(new_handles) > len(current_handles):
+        new_tab = [h for h in new_handles if h not in current_handles][0]
+        driver.switch_to.window(new_tab)
+        
+    WebDriverWait(driver, 30).until(
+        EC.visibility_of_element_located((By.XPATH, X_ACTIVITY_CODE))
+    )
+
+
+def get_text_xpath(driver, xpath: str, timeout_ms: int = 10_000) -> str:
+    try:
+        el = WebDriverWait(driver, timeout_ms/1000).until(
+            EC.visibility_of_element_located((By.XPATH, xpath))
+        )
+        try:
+            driver.execute_script("arguments[0].scrollIntoView();", el)
+        except Exception:
+            pass
+        return (el.text or "").strip()
+    except Exception:
+        return ""
+
+
+@traced("locations")
+def get_table_data(driver) -> List[LocationFee]:
+    try:
+        tbody = WebDriverWait(driver, 10).until(
+            EC.visibility_of_element_located((By.XPATH, X_TBODY))
+        )
+        try:
+            driver.execute_script("arguments[0].scrollIntoView();", tbody)
+        except Exception:
+            pass
+            
+        rows = tbody.find_elements(By.TAG_NAME, "tr")
+        n = len(rows)
+        out: List[LocationFee] = []
+        for i in range(1, n + 1):
+            td1 = get_text_xpath(driver, f"{X_TBODY}/tr[{i}]/td[1]")
+            td2 = get_text_xpath(driver, f"{X_TBODY}/tr[{i}]/td[2]")
+            td3 = get_text_xpath(driver, f"{X_TBODY}/tr[{i}]/td[3]")
+            if td1 or td2 or td3:
+                out.append(LocationFee(td1, td2, td3))
+        return out
+    except Exception:
+        return []
+
+
+def get_eligibility(driver) -> Eligibility:
+    try:
+        ul_xpath = X_ELIGIBLE_UL
+        try:
+            ul_locator = WebDriverWait(driver, 3).until(
+                EC.visibility_of_element_located((By.XPATH, ul_xpath))
+            )
+        except Exception:
+            return Eligibility()
+            
+        items = ul_locator.find_elements(By.TAG_NAME, "li")
+        return Eligibility([item.text.strip() for item in items if item.text.strip()])
+    except Exception:
+        return Eligibility()
+
+
+@traced("approvals")
+def get_approvals_data(driver) -> Optional[List[Approval]]:
+    """Approvals read field by field; None if they could not be read."""
+    try:
+        driver.execute_script("window.scrollTo(0, document.body.scrollHeight/2)")
+        time.sleep(0.5)
+        
+        # The portal has been seen with either heading, whatever the page language
+        heading_ar = driver.find_elements(By.XPATH, "//h4[contains(text(), 'الموافقات المطلوبة')]")
+        heading_en = driver.find_elements(By.XPATH, "//h4[contains(text(), 'Required Approvals')]")
+        
+        if len(heading_ar) == 0 and len(heading_en) == 0:
+            try:
+                no_el = driver.find_elements(By.XPATH, X_NO_APPROVAL)
+                if len(no_el) > 0:
+                    txt = no_el[0].text.strip()
+                    if txt and not any(str(i) in txt[:10] for i in range(1, 7)):
+                        return []
+            except Exception:
+                pass
+                
+        approvals: List[Approval] = []
+        for i in range(12):
+            btn_xpath = f"//*[@id='heading{i}']/button"
+            btn = driver.find_elements(By.XPATH, btn_xpath)
+            if len(btn) == 0:
+                break
+            
+            try:
+                try:
+                    driver.execute_script("arguments[0].scrollIntoView();", btn[0])
+                except:
+                    pass
+                title_text = btn[0].text.strip()
+                if title_text and title_text[0].isdigit() and "." in title_text[:5]:
+                    title_text = title_text.split(".", 1)[1].strip()
+            except Exception:
+                title_text = ""
+                
+            # Collapsed panels usually already hold their body: read it without clicking
+            agency = ""
+            agency_xpath = f"//*[@id='collapse{i}']/div/div/div[1]/div[2]"
+            try:
+                agency_el = driver.find_elements(By.XPATH, agency_xpath)
+                if len(agency_el) > 0:
+                    agency = re.sub(r"\s+", " ", agency_el[0].get_attribute("textContent") or "").strip()
+            except Exception:
+                pass
+                
+            # Lazily injected body: click to expand, then read it
+            if not agency:
+                try:
+                    btn[0].click()
+                except Exception:
+                    driver.execute_script("arguments[0].click();", btn[0])
+                time.sleep(0.5)
+                try:
+                    agency_el = driver.find_elements(By.XPATH, agency_xpath)
+                    if len(agency_el) > 0:
+                        agency = agency_el[0].text.strip()
+                except Exception:
+                    pass
+                    
+            approvals.append(Approval(title_text, agency))
+            
+        return approvals
+    except Exception:
+        return None
+
+
+def click_agency(driver, i: int) -> str:
+    """Expand approval panel i (its body is injected lazily) and read the agency."""
+    try:
+        btn = driver.find_element(By.XPATH, f"//*[@id='heading{i}']/button")
+        driver.execute_script("arguments[0].click();", btn)
+        el = WebDriverWait(driver, 3).until(
+            EC.visibility_of_element_located((By.XPATH, f"//*[@id='collapse{i}']/div/div/div[1]/div[2]"))
+        )
+        return el.text.strip()
+    except Exception:
+        return ""
+
+
+def approvals_announced(page: Dict[str, Any]) -> bool:
+    """The "Required Approvals" heading, or a numbered list where the "no approval" text would be."""
+    txt = page["no_approval_text"]
+    return page["approvals_heading"] or (bool(txt) and any(str(i) in txt[:10] for i in range(1, 7)))
+
+
+@traced("approvals")
+def read_approvals(driver, page: Dict[str, Any]) -> Optional[List[Approval]]:
+    """
+    Approvals from the one-shot extraction: every collapsed panel is read in one pass,
+    only panels whose body is not in the DOM yet are clicked.
+    None (failed to load) when the page announces approvals but no panel rendered.
+    """
+    if not page["approvals"]:
+        return None if approvals_announced(page) else []
+    return [
+        Approval(approval["title"], approval["agency"] or click_agency(driver, i))
+        for i, approval in enumerate(page["approvals"])
+    ]
+
+
+# ----------------------------
+# Records
+# ----------------------------
+# A scrape yields {lang: Activity} (records.py) for the languages being scraped;
+# each record carries both names. The Sheets text is rendered by sheet_fields()
+# when the row is written, nowhere else.
+
+def build_records(code: str, names: Dict[str, str], sections: Dict[str, Activity]) -> Dict[str, Activity]:
+    """Complete the per-language records with the names read in both languages."""
+    for record in sections.values():
+        record.code = names.get("activity_code") or record.code or code
+        record.name_en = names.get("name_en")
+        record.name_ar = names.get("name_ar")
+    return sections
+
+
+def records_payload(records: Dict[str, Activity]) -> Dict[str, Any]:
+    """Plain-dict form of a scrape, as hashed by the checkpoint store."""
+    return {lang: record.to_dict() for lang, record in records.items()}
+
+
+@traced("fast_path")
+def try_fast_path(code: str, langs: List[str]) -> Optional[Dict[str, Activity]]:
+    """
+    Fast path: fetch the details page of each language in `langs` over plain HTTP and parse it with lxml.
+    The name in a language not scraped stays None (not written).
+    Returns the records, or None when the browser is needed.
+    """
+    try:
+        pages = {lang: fetch_details(code, lang) for lang in langs}
+    except NeedsBrowser as e:
+        print(f"  Fast path not usable ({e}), using browser")
+        return None
+        
+    names = {"activity_code": pages[langs[0]]["activity_code"]}
+    for lang in langs:
+        names[f"name_{lang}"] = pages[lang]["name"]
+    sections = {
+        lang: Activity(
+            code=code,
+            lang=lang,
+            locations=[LocationFee(*row) for row in pages[lang]["locations"]],
+            eligibility=Eligibility(list(pages[lang]["eligible"])),
+            approvals=[Approval(title, agency) for title, agency in pages[lang]["approvals"]],
+        )
+        for lang in langs
+    }
+    print("  ✓ Success (fast path)")
+    return build_records(code, names, sections)
+
+
+def save_activity_code_to_sheet(worksheet, row_number: int, activity_code: str) -> bool:
+    try:
+        worksheet.update_cell(row_number, 2, str(activity_code))
+        return True
+    except Exception:
+        return False
+
+
+def save_to_sheet(worksheet, row_number: int, col: int, value: str) -> bool:
+    try:
+        worksheet.update_cell(row_number, col, value)
+        return True
+    except Exception:
+        return False
+
+
+@traced("extract")
+def extract_page(driver) -> Optional[Dict[str, Any]]:
+    """All fields of the current details page in one execute_script call, or None if the snippet failed."""
+    wait_for_angular_idle(driver, timeout=10)
+    try:
+        page = driver.execute_script("return (" + EXTRACT_DETAILS_JS + ")(arguments[0]);", EXTRACT_XPATHS)
+    except Exception as e:
+        print(f"  One-shot extraction failed ({e}), reading fields one by one")
+        return None
+    if not page or not page.get("activity_code"):
+        return None
+    return page
+
+
+def read_language_fields(driver, lang: str, names: Dict[str, str],
+                         sections: Dict[str, Activity], full: bool) -> bool:
+    """
+    Read the current details page (already in `lang`): the code and name into `names`,
+    and with full=True the details into sections[lang]. False if the activity code is missing.
+    """
+    page = extract_page(driver)
+    if page is not None:
+        names["activity_code"] = page["activity_code"]
+        names[f"name_{lang}"] = page["name"]
+        if full:
+            sections[lang] = Activity(
+                code=page["activity_code"],
+                lang=lang,
+                locations=[LocationFee(*row) for row in page["locations"]],
+                eligibility=Eligibility(list(page["eligible"])),
+                approvals=read_approvals(driver, page),
+            )
+        return True
+        
+    # Fallback: one WebDriver call per field
+    # Extract activity code
+    activity_code = get_text_xpath(driver, X_ACTIVITY_CODE)
+    if not activity_code:
+        return False
+    names["activity_code"] = activity_code
+    
+    # Activity name (Column C for AR, Column D for EN)
+    names[f"name_{lang}"] = get_text_xpath(driver, X_ACTIVITY_NAME)
+    if not full:
+        return True
+        
+    sections[lang] = Activity(
+        code=activity_code,
+        lang=lang,
+        locations=get_table_data(driver),       # Column E
+        eligibility=get_eligibility(driver),    # Column F
+        approvals=get_approvals_data(driver),   # Column G
+    )
+    return True
+
+
+# Browser visits / direct URL failures of this process (congestion signals of run_parallel)
+_nav_stats = {"visits": 0, "direct_failures": 0}
+
+
+def navigate_to_details(driver, code: str) -> bool:
+    """
+    Open the details page of code (direct URL, then search fallbacks).
+    Returns used_additional_step; raises if every method failed.
+    """
+    used_additional = False
+    _nav_stats["visits"] += 1
+    
+    # FASTEST APPROACH: Try direct URL first
+    try:
+        direct_to_details(driver, code)
+        print("  ✓ Success")
+        return used_additional
+    except Exception as e:
+        _nav_stats["direct_failures"] += 1
+        print(f"\n  Direct URL failed: {e}")
+        print(f"  Falling back to search methods...")
+        
+    # Fallback to search flow (the only step that needs the home page)
+    try:
+        driver.get(BASE_URL)
+        wait_for_angular_idle(driver, timeout=15)
+        click_xpath(driver, X_SEARCH_ICON)
+        click_xpath(driver, X_BUSINESS_TAB)
+        fill_css(driver, CSS_SEARCH_INPUT, code)
+        time.sleep(1)
+        
+        # Check for multiple results
+        try:
+            business_list = driver.find_elements(By.XPATH, "//*[@id='businessList']/li")
+            if len(business_list) > 1:
+                 print(f"Multiple results detected ({len(business_list)}), using Additional Step for exact match")
+                 additional_step_footer_business_search(driver, code)
+                 used_additional = True
+            else:
+                # Proper first click
+                click_xpath(driver, X_FIRST_ACTIVITY)
+                WebDriverWait(driver, 20).until(
+                     EC.visibility_of_element_located((By.XPATH, X_ACTIVITY_CODE))
+                )
+        except TimeoutException:
+             print("Additional Step: Footer Business Activities Search")
+             additional_step_footer_business_search(driver, code)
+             used_additional = True
+    except Exception as fallback_error:
+        raise Exception(f"All methods failed: {fallback_error}")
+        
+    return used_additional
+
+
+def scrape_activity_code(driver, code: str, langs: List[str]) -> "Tuple[bool, bool, Optional[str], Dict[str, Activity]]":
+    """
+    Visit a single activity code once and extract it for every language in langs.
+    Returns: (success: bool, used_additional_step: bool, error_msg: Optional[str], records: {lang: Activity})
+    """
+    names: Dict[str, str] = {}
+    sections: Dict[str, Activity] = {}
+    
+    try:
+        used_additional = navigate_to_details(driver, code)
+    except Exception as e:
+        print(str(e))
+        return False, False, str(e), {}
+    load_ms, transferred = page_weight(driver)
+    if load_ms:
+        print(f"  Page: {load_ms} ms, {transferred // 1024} KB")
+        
+    # Read everything in the language the page arrived in, then toggle once
+    # for the other language: at most two page loads per code, no round-trip.
+    first = _get_lang(driver) if _get_lang(driver) in LANGUAGES else "en"
+    second = "ar" if first == "en" else "en"
+    
+    if not read_language_fields(driver, first, names, sections, full=first in langs):
+        return False, used_additional, "Activity code not found on details page", {}
+    if fixtures.enabled():
+        fixtures.record_page(code, first, driver.page_source)
+        
+    # Both names are always needed (Columns C and D); the other language's
+    # details only when that worksheet is being scraped.
+    if set_language(driver, second):
+        if read_language_fields(driver, second, names, sections, full=second in langs):
+            if fixtures.enabled():
+                fixtures.record_page(code, second, driver.page_source)
+        elif second in langs:
+            # Nothing to write for that worksheet: must not be checkpointed as done
+            return False, used_additional, f"Activity code not found after switching to '{second}'", {}
+    elif second in langs:
+        return False, used_additional, f"Could not switch site language to '{second}'", build_records(code, names, sections)
+        
+    return True, used_additional, None, build_records(code, names, sections)
+
+
+def save_result_to_sheet(worksheet, row_number: int, data: Dict[str, str]) -> None:
+    """Write the extracted fields of one activity code to its row (only fields that were found)."""
+    if "activity_code" in data:
+        save_activity_code_to_sheet(worksheet, row_number, data["activity_code"])
+    for key, col in SHEET_COLUMNS:
+        if key in data:
+            save_to_sheet(worksheet, row_number, col, data[key])
+
+
+def save_result(targets: Dict[str, "SheetTarget"], code: str, records: Dict[str, Activity]) -> List[str]:
+    """Write each record to the worksheet of its language, if it lists the code. Returns the languages written."""
+    written = []
+    with stage("sheet_write", code=code):
+        for lang, target in targets.items():
+            row_number = target.rows.get(code)
+            if row_number is not None and lang in records:
+                save_result_to_sheet(target.writer, row_number, sheet_fields(records[lang]))
+                written.append(lang)
+    return written
+
+
+def record_result(targets: Dict[str, "SheetTarget"], store: CheckpointStore, code: str, ok: bool,
+                  error_msg: Optional[str], records: Dict[str, Activity],
+                  previous: Optional[Dict[str, Tuple[str, float]]] = None,
+                  sinks: Sequence[LocalSink] = ()) -> bool:
+    """
+    Buffer the sheet / local sink writes of a code and stage its checkpoint (committed once those writes are flushed).
+    With `previous` (incremental runs), a result identical to the last successful one is not rewritten.
+    Returns False when the write was skipped for that reason.
+    """
+    payload = records_payload(records)
+    if ok and previous is not None and code in previous and previous[code][0] == result_hash(payload):
+        store.stage(code, ok, payload, error_msg)
+        return False
+    written = save_result(targets, code, records)
+    if records:
+        for sink in sinks:
+            sink.upsert(records.values())
+            written.append(sink.name)
+    store.stage(code, ok, payload, error_msg, waiting_on=written)
+    return True
+
+
+def select_incremental(jobs: List[Tuple[int, str]], previous: Dict[str, Tuple[str, float]],
+                       max_age_days: float) -> List[Tuple[int, str]]:
+    """
+    Keep only the codes worth rescraping:
+      - added to the listing since the previous snapshot (scrape_codes.py),
+      - never scraped successfully,
+      - last scraped more than max_age_days ago.
+    Codes missing from the latest complete listing are skipped (removed from the portal).
+    """
+    snapshot = load_snapshot()
+    listed = set(snapshot["codes"]) if snapshot else None
+    added = set(snapshot["added"]) if snapshot else set()
+    taken_at = snapshot["taken_at"] if snapshot else 0.0
+    cutoff = time.time() - max_age_days * 86400
+    
+    selected = []
+    counts = {"added": 0, "new": 0, "stale": 0, "removed": 0, "fresh": 0}
+    for idx, code in jobs:
+        if listed is not None and code not in listed:
+            counts["removed"] += 1
+        elif code in added and (code not in previous or previous[code][1] < taken_at):
+            counts["added"] += 1
+            selected.append((idx, code))
+        elif code not in previous:
+            counts["new"] += 1
+            selected.append((idx, code))
+        elif previous[code][1] < cutoff:
+            counts["stale"] += 1
+            selected.append((idx, code))
+        else:
+            counts["fresh"] += 1
+            
+    if snapshot is None:
+        print("No code snapshot found (run scrape_codes.py first); selecting by age only")
+    print(
+        f"Incremental: {len(selected)} of {len(jobs)} codes to scrape "
+        f"(added {counts['added']}, never scraped {counts['new']}, older than {max_age_days:g}d {counts['stale']}; "
+        f"skipped fresh {counts['fresh']}, no longer listed {counts['removed']})"
+    )
+    return selected
+
+
+def snapshot_jobs() -> List[Tuple[int, str]]:
+    """(row, code) jobs from the listing snapshot, for runs without the spreadsheet (--sink without sheets)."""
+    snapshot = load_snapshot()
+    if snapshot is None:
+        print("No code snapshot found: run scrape_codes.py first, or add the sheets sink")
+        return []
+    return list(enumerate(snapshot["codes"], start=2))
+
+
+class SheetTarget:
+    """One worksheet being filled: its buffered writer and the code -> row map of Column A."""
+
+    def __init__(self, worksheet, writer: "BufferedSheetWriter | BackgroundSheetWriter"):
+        self.worksheet = worksheet
+        self.writer = writer
+        self.codes: List[str] = worksheet.col_values(1)[1:] # from row 2
+        self.rows: Dict[str, int] = {}
+        for row_number, code in enumerate(self.codes, start=2):
+            self.rows.setdefault(code, row_number)
+
+
+# ----------------------------
+# Parallel workers (--workers N)
+# ----------------------------
+_worker_driver = None
+_worker_fast_path = False
+_worker_langs: List[str] = list(LANGUAGES)
+
+
+def _quit_worker_driver() -> None:
+    global _worker_driver
+    if _worker_driver is not None:
+        try:
+            _worker_driver.quit()
+        except Exception:
+            pass
+        _worker_driver = None
+
+
+def _init_worker(headless: bool, fast_path: bool, langs: List[str], lean: bool = True) -> None:
+    """Pool initializer: each worker process owns one browser for its whole lifetime."""
+    global _worker_driver, _worker_fast_path, _worker_langs
+    _worker_fast_path = fast_path
+    _worker_langs = langs
+    _worker_driver = new_driver(headless, lean)
+    # Runs when the pool shuts the worker down cleanly (close + join)
+    multiprocessing.util.Finalize(None, _quit_worker_driver, exitpriority=10)
+
+
+def scrape_one(driver, code: str, row_number: int, langs: List[str], fast_path: bool) -> "Tuple[bool, Optional[str], Dict[str, Activity]]":
+    """Fast path first (if enabled), then the browser. Returns (success, error_msg, records)."""
+    with trace_code(code):
+        if fast_path:
+            records = try_fast_path(code, langs)
+            if records:
+                return True, None, records
+        try:
+            # Straight from the previous details page to this one; the home page is
+            # only loaded by the search fallback in navigate_to_details
+            ok, _, error_msg, records = scrape_activity_code(driver, code, langs)
+            if ok:
+                fixtures.record_records(code, records)
+            return ok, error_msg, records
+        except Exception as e:
+            print(f"Error processing activity code {code}: {e}")
+            _safe_screenshot(driver, os.path.join(SCRIPT_DIR, f"error_row_{row_number}.png"))
+            return False, str(e), {}
+
+
+def congestion_signal(direct_failed: bool, error_msg: Optional[str]) -> Optional[str]:
+    """Why a scrape points at an overloaded portal (shrinks the --workers window), or None."""
+    if error_msg and ("timeout" in error_msg.lower() or "timed out" in error_msg.lower()):
+        return "timeout"
+    if direct_failed:
+        # direct_to_details: "Details page did not load correctly via direct URL"
+        return "direct URL failed"
+    return None
+
+
+def _scrape_in_worker(job: Tuple[int, str]) -> "Tuple[int, str, bool, Optional[str], Dict[str, Activity], Optional[str], str]":
+    row_number, code = job
+    print(f"[worker {os.getpid()}] Processing row {row_number} with code {code} ...")
+    before = dict(_nav_stats)
+    ok, error_msg, records = scrape_one(_worker_driver, code, row_number, _worker_langs, _worker_fast_path)
+    signal = congestion_signal(_nav_stats["direct_failures"] > before["direct_failures"], error_msg)
+    kind = "browser" if _nav_stats["visits"] > before["visits"] else "fast_path"
+    return row_number, code, ok, error_msg, records, signal, kind
+
+
+def run_parallel(targets: Dict[str, SheetTarget], store: CheckpointStore, jobs: List[Tuple[int, str]], headless: bool,
+                 workers: int, langs: List[str], fast_path: bool = False,
+                 previous: Optional[Dict[str, Tuple[str, float]]] = None, lean: bool = True,
+                 sinks: Sequence[LocalSink] = (), adaptive: bool = True) -> Tuple[int, int, int]:
+    """
+    Split the codes across `workers` browser processes.
+    With `adaptive`, only an AIMD window of them (aimd.py) scrapes at the same time: it starts
+    at one and grows while the portal keeps up, and is cut on timeouts, direct URL failures
+    and unusually slow codes. Results are written by this process only, in completion order.
+    Returns: (total_success, total_failed, total_unchanged)
+    """
+    total_success = 0
+    total_failed = 0
+    total_unchanged = 0
+    
+    window = AIMDWindow(
+        max_size=workers, initial=None if adaptive else workers, min_size=1 if adaptive else workers,
+        on_change=lambda old, new, reason: print(f"Concurrency window {old} -> {new} ({reason})"),
+    )
+    finished: "queue.Queue" = queue.Queue()
+    started: Dict[int, float] = {}
+    pending = iter(jobs)
+    in_flight = 0
+    
+    pool = multiprocessing.Pool(processes=workers, initializer=_init_worker, initargs=(headless, fast_path, langs, lean))
+    try:
+        while True:
+            # Keep as many codes in flight as the window allows
+            while in_flight < window.size:
+                job = next(pending, None)
+                if job is None:
+                    break
+                started[job[0]] = time.monotonic()
+                pool.apply_async(_scrape_in_worker, (job,), callback=finished.put, error_callback=finished.put)
+                in_flight += 1
+            if in_flight == 0:
+                break
+            
+            item = finished.get()
+            in_flight -= 1
+            if isinstance(item, BaseException):
+                raise item
+            row_number, code, ok, err, records, signal, kind = item
+            began = started.pop(row_number)
+            if signal:
+                window.on_congestion(signal, began)
+            else:
+                window.on_success(time.monotonic() - began, began, kind=kind)
+            
+            if not record_result(targets, store, code, ok, err, records, previous, sinks):
+                total_unchanged += 1
+            if not ok:
+                print(f"Failed to process {code}: {err}")
+                total_failed += 1
+            else:
+                total_success += 1
+        pool.close()
+    except BaseException:
+        pool.terminate()
+        raise
+    finally:
+        pool.join()
+        
+    if adaptive:
+        print(f"Concurrency window: {window.summary()}")
+    return total_success, total_failed, total_unchanged
+
+
+def run(langs: List[str], headless: bool, workers: int = 1, flush_rows: int = 20, flush_seconds: float = 30.0,
+        fast_path: bool = False, resume: bool = False, incremental: bool = False, max_age_days: float = 7.0,
+        lean: bool = True, sinks: Sequence[str] = ("sheets",), background_writes: bool = True,
+        writes_per_minute: float = DEFAULT_WRITES_PER_MINUTE, trace: Optional[str] = None,
+        record: Optional[str] = None, adaptive: bool = True) -> None:
+    if trace:
+        print(f"Tracing stages to {trace} (run {tracing.enable(trace)})")
+    if record:
+        print(f"Recording page fixtures to {fixtures.enable(record)} (replay with: python fixtures.py replay --dir {record})")
+    spreadsheet = connect_to_spreadsheet() if "sheets" in sinks else None
+    
+    # Progress of this run (a crash / reboot can be continued with --resume)
+    store = CheckpointStore(CHECKPOINT_FILE)
+    generation = store.begin(",".join(langs), resume=resume)
+    
+    # One write quota for all worksheets of the spreadsheet
+    limiter = TokenBucket(writes_per_minute)
+    targets: Dict[str, SheetTarget] = {}
+    for lang in (langs if spreadsheet is not None else []):
+        worksheet = spreadsheet.worksheet(WORKSHEET_NAMES[lang])
+        
+        # Format Column B as TEXT
+        format_column_b_as_text(worksheet)
+        
+        # All cell writes go through the buffered writer (batched, rate limited, retried on 429);
+        # by default on a background thread, so the browser keeps scraping during sheet I/O
+        if background_writes:
+            writer = BackgroundSheetWriter(worksheet, flush_rows=flush_rows, flush_seconds=flush_seconds, limiter=limiter)
+        else:
+            writer = BufferedSheetWriter(worksheet, flush_rows=flush_rows, flush_seconds=flush_seconds, limiter=limiter)
+        
+        # Set headers
+        writer.update_row(1, SHEET_HEADERS)
+        writer.flush()
+        writer.on_flush = lambda lang=lang: store.flushed(lang)
+        targets[lang] = SheetTarget(worksheet, writer)
+        
+    # Local sinks (SQLite / CSV / Parquet), bulk upserts by activity code
+    local_sinks = open_local_sinks(sinks)
+    for sink in local_sinks:
+        sink.on_flush = lambda name=sink.name: store.flushed(name)
+        
+    # Codes (and their row numbers, for progress/screenshots) come from the first worksheet;
+    # the other worksheets are matched by code. Without the spreadsheet, from the listing snapshot.
+    jobs = list(enumerate(targets[langs[0]].codes, start=2)) if targets else snapshot_jobs()
+    if not jobs:
+        print("No activity codes found in sheet" if targets else "No activity codes to scrape")
+        for sink in local_sinks:
+            sink.close()
+        store.close()
+        return
+        
+    skipped = 0
+    if resume:
+        done = store.done_codes()
+        remaining = [(idx, code) for idx, code in jobs if code not in done]
+        skipped = len(jobs) - len(remaining)
+        jobs = remaining
+        print(f"Resuming run #{generation}: {skipped} codes already done, {len(jobs)} to go")
+        
+    # Incremental: only the listing delta and stale codes; identical results are not rewritten
+    previous = None
+    if incremental:
+        previous = store.latest_results(",".join(langs))
+        jobs = select_incremental(jobs, previous, max_age_days)
+        
+    start_time = time.time()
+    total_success = 0
+    total_failed = 0
+    total_unchanged = 0
+    completed = False
+    
+    try:
+        if not jobs:
+            print("All codes of this run are already done")
+        elif workers > 1:
+            workers = min(workers, len(jobs))
+            print(f"Running with {workers} parallel workers" + (" (adaptive concurrency window)" if adaptive else ""))
+            total_success, total_failed, total_unchanged = run_parallel(
+                targets, store, jobs, headless, workers, langs, fast_path, previous, lean, local_sinks, adaptive
+            )
+        else:
+            # Launch Browser with SeleniumBase UC (lean profile unless --full-browser)
+            driver = new_driver(headless, lean)
+            
+            try:
+                for idx, code in jobs:
+                    print(f"Processing row {idx} with code {code} ...")
+                    ok, err, records = scrape_one(driver, code, idx, langs, fast_path)
+                    if not record_result(targets, store, code, ok, err, records, previous, local_sinks):
+                        total_unchanged += 1
+                    
+                    if not ok:
+                        print(f"Failed to process {code}")
+                        total_failed += 1
+                    else:
+                        total_success += 1
+                        
+            finally:
+                driver.quit()
+        # Every code was attempted: the next --resume starts a fresh run
+        completed = True
+    finally:
+        # Flush whatever is still buffered, even on crash / Ctrl+C
+        for target in targets.values():
+            target.writer.close()
+        for sink in local_sinks:
+            sink.close()
+        if completed:
+            store.finish()
+        store.close()
+        
+    # Calculate elapsed time
+    elapsed_time = time.time() - start_time
+    minutes = int(elapsed_time // 60)
+    seconds = int(elapsed_time % 60)
+    
+    print("\n" + "="*70)
+    print(f"SCRAPE SUMMARY ({', '.join(lang.upper() for lang in langs)})")
+    print("="*70)
+    print(f"Elapsed Time:       {minutes}m {seconds}s")
+    print(f"Total Success Rows: {total_success}")
+    if total_failed > 0:
+        print(f"Total Failed Rows:  {total_failed}")
+    if skipped > 0:
+        print(f"Skipped (resumed):  {skipped}")
+    if incremental:
+        print(f"Unchanged (kept):   {total_unchanged}")
+    if targets:
+        print(f"Sheet API Writes:   {sum(t.writer.api_calls for t in targets.values())}")
+        if limiter.waited >= 1:
+            print(f"Quota Waits:        {limiter.waited:.0f}s")
+    for sink in local_sinks:
+        print(f"{sink.name.upper() + ' Rows:':<20}{sink.rows_written}")
+    if trace:
+        print(f"Stage Profile:      python tracing.py report --trace {trace}")
+    print("="*70)
+
+
+def parse_langs(value: str) -> List[str]:
+    langs = []
+    for part in value.split(","):
+        lang = part.strip().lower()
+        if lang not in LANGUAGES:
+            raise argparse.ArgumentTypeError(f"unknown language '{part}' (use en, ar or en,ar)")
+        if lang not in langs:
+            langs.append(lang)
+    if not langs:
+        raise argparse.ArgumentTypeError("no language given")
+    return langs
+
+
+def main(default_langs: str = "en,ar") -> None:
+    parser = argparse.ArgumentParser(description="Scrape EN/AR details using SeleniumBase (default headless)")
+    parser.add_argument("--lang", type=parse_langs, default=parse_langs(default_langs),
+                        help=f"Worksheets to fill: en, ar or en,ar (default {default_langs})")
+    parser.add_argument("--visible", action="store_true", help="Run browser visible (default is headless)")
+    parser.add_argument("--workers", type=int, default=1, help="Number of parallel browser processes (default 1)")
+    parser.add_argument("--fixed-workers", action="store_true",
+                        help="Keep all --workers browsers busy instead of adapting to the portal's latency and errors")
+    parser.add_argument("--full-browser", action="store_true",
+                        help="Load images, fonts, media and third-party scripts (default: lean browser profile)")
+    parser.add_argument("--fast", action="store_true", help="Try plain HTTP + lxml extraction first, browser only as fallback")
+    parser.add_argument("--flush-rows", type=int, default=20, help="Flush buffered sheet writes every N rows (default 20)")
+    parser.add_argument("--flush-seconds", type=float, default=30.0, help="Flush buffered sheet writes every T seconds (default 30)")
+    parser.add_argument("--blocking-writes", action="store_true",
+                        help="Write to the sheets from the scraping loop itself (default: background writer thread)")
+    parser.add_argument("--writes-per-minute", type=float, default=DEFAULT_WRITES_PER_MINUTE,
+                        help=f"Sheets write requests per minute, all worksheets together (default {DEFAULT_WRITES_PER_MINUTE})")
+    parser.add_argument("--resume", action="store_true", help="Continue the last unfinished run, skipping codes already done")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Only scrape codes added to the listing, never scraped, or older than --max-age-days")
+    parser.add_argument("--max-age-days", type=float, default=7.0, help="Rescrape codes older than this in --incremental mode (default 7)")
+    parser.add_argument("--trace", nargs="?", const=tracing.TRACE_FILE, default=None,
+                        help=f"Record per-code stage timings as JSON lines (default file {tracing.TRACE_FILE})")
+    parser.add_argument("--record", nargs="?", const=fixtures.FIXTURES_DIR, default=None,
+                        help=f"Save the rendered pages and extracted records of browser scrapes as replay fixtures "
+                             f"(default directory {fixtures.FIXTURES_DIR})")
+    parser.add_argument("--sink", type=parse_sinks, default=parse_sinks("sheets"),
+                        help="Outputs: sheets, sqlite, csv, parquet, comma separated (default sheets). "
+                             "Without sheets, the codes come from output/codes_snapshot.json")
+    args = parser.parse_args()
+    
+    run(args.lang, headless=not args.visible, workers=max(1, args.workers),
+        flush_rows=args.flush_rows, flush_seconds=args.flush_seconds, fast_path=args.fast, resume=args.resume,
+        incremental=args.incremental, max_age_days=args.max_age_days, lean=not args.full_browser, sinks=args.sink,
+        background_writes=not args.blocking_writes, writes_per_minute=args.writes_per_minute, trace=args.trace,
+        record=args.record, adaptive=not args.fixed_workers)
+
+
+if __name__ == "__main__":
+    main()
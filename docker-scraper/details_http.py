@@ -0,0 +1,178 @@
+# pyright: reportMissingImports=false
+"""
+Fast path for the activity details page: plain HTTP + lxml, no browser.
+
+The same file lives in docker-scraper/ and API-php/ (separate Docker build
+contexts) - keep both copies in sync.
+
+`parse_details_html()` is a pure function over the page HTML, so it can be
+run against saved pages (e.g. output/*.html snapshots) without the live site.
+`fetch_details()` raises `NeedsBrowser` whenever the static HTML is not
+enough (Angular template not rendered, anti-bot page, HTTP error, wrong
+language); callers then fall back to the browser path.
+"""
+import os
+import re
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import requests
+from lxml import html as lxml_html
+from requests.adapters import HTTPAdapter
+
+# Scheme + host of the portal; PORTAL_ORIGIN points the scrapers at a local mock (bench/mock_portal.py)
+PORTAL_ORIGIN = os.environ.get("PORTAL_ORIGIN", "https://investor.sw.gov.qa").rstrip("/")
+DETAILS_URL = PORTAL_ORIGIN + "/wps/portal/investors/information-center/ba/details?bacode={code}"
+
+# Details page XPaths (same as the browser scrapers)
+X_ACTIVITY_CODE = "/html/body/div[4]/div/div/section/div[2]/main/section[3]/div/div/div/div/div[1]/div[2]"
+X_ACTIVITY_NAME = "/html/body/div[4]/div/div/section/div[2]/main/section[3]/div/div/div/div/div[3]/div[2]"
+X_TBODY = "/html/body/div[4]/div/div/section/div[2]/main/section[3]/div/div/div/div/div[8]/div[2]/table/tbody"
+X_ELIGIBLE_UL = "/html/body/div[4]/div/div/section/div[2]/main/section[3]/div/div/div/div/div[9]/div[2]/table/tbody/tr[2]/td/ul"
+X_NO_APPROVAL = "/html/body/div[4]/div/div/section/div[2]/main/section[3]/div/div/div/div/div[10]/div[2]"
+
+# Markers of pages that only a real browser gets past
+ANTI_BOT_MARKERS = ("captcha", "request rejected", "access denied", "bobcmn", "window[\"bobcmn\"]")
+
+USER_AGENT = (
+    "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+)
+ACCEPT_LANGUAGE = {"en": "en-US,en;q=0.9", "ar": "ar,en;q=0.5"}
+
+
+class NeedsBrowser(Exception):
+    """The static HTML cannot be used; fall back to the browser path."""
+
+
+_local = threading.local()
+
+
+def get_session(pool_size: int = 10) -> requests.Session:
+    """One pooled keep-alive session per thread (requests.Session is not thread-safe)."""
+    session = getattr(_local, "session", None)
+    if session is None:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        session.headers.update({"User-Agent": USER_AGENT})
+        _local.session = session
+    return session
+
+
+def _text(node) -> str:
+    return re.sub(r"\s+", " ", node.text_content() or "").strip()
+
+
+def _find(doc, xpath: str) -> list:
+    """
+    Evaluate an absolute XPath. Browsers insert <tbody> into tables but lxml
+    keeps the source as-is, so retry without /tbody when the first try misses.
+    """
+    found = doc.xpath(xpath)
+    if not found and "/tbody" in xpath:
+        found = doc.xpath(xpath.replace("/tbody", ""))
+    return found
+
+
+def _first_text(doc, xpath: str) -> str:
+    found = _find(doc, xpath)
+    return _text(found[0]) if found else ""
+
+
+def parse_details_html(page_html: str, code: Optional[str] = None) -> Dict[str, object]:
+    """
+    Extract the details fields from a details page.
+
+    Returns a dict:
+        lang          - document language ('en' / 'ar' / '')
+        activity_code - str
+        name          - activity name in the page language
+        locations     - [(main_location, sub_location, fee), ...]
+        eligible      - [requirement, ...]
+        approvals     - [(title, agency_or_empty), ...]
+        no_approvals  - True when the page says no approval is required
+    Raises NeedsBrowser when the page is not a rendered details page.
+    """
+    lowered = page_html[:20000].lower()
+    if any(marker in lowered for marker in ANTI_BOT_MARKERS):
+        raise NeedsBrowser("anti-bot check")
+
+    doc = lxml_html.fromstring(page_html)
+
+    activity_code = _first_text(doc, X_ACTIVITY_CODE)
+    if not activity_code or "{{" in activity_code:
+        raise NeedsBrowser("details not rendered in static HTML (needs JS)")
+    if code and activity_code != code:
+        raise NeedsBrowser(f"page shows code {activity_code}, expected {code}")
+
+    name = _first_text(doc, X_ACTIVITY_NAME)
+    if "{{" in name:
+        raise NeedsBrowser("activity name not rendered in static HTML (needs JS)")
+
+    locations: List[Tuple[str, str, str]] = []
+    tbody = _find(doc, X_TBODY)
+    if tbody:
+        for tr in tbody[0].xpath("./tr"):
+            cells = [_text(td) for td in tr.xpath("./td")[:3]]
+            cells += [""] * (3 - len(cells))
+            if any(cells):
+                locations.append((cells[0], cells[1], cells[2]))
+
+    eligible = [_text(li) for li in _find(doc, X_ELIGIBLE_UL + "/li")]
+    eligible = [item for item in eligible if item]
+
+    approvals: List[Tuple[str, str]] = []
+    for i in range(12):
+        btn = doc.xpath(f"//*[@id='heading{i}']/button")
+        if not btn:
+            break
+        title = _text(btn[0])
+        if title and title[0].isdigit() and "." in title[:5]:
+            title = title.split(".", 1)[1].strip()
+        body = doc.xpath(f"//*[@id='collapse{i}']/div")
+        if not body:
+            # Panel body injected on click: the agency would silently read as "Not specified"
+            raise NeedsBrowser(f"approval panel {i} not in static HTML")
+        agency = body[0].xpath("./div/div[1]/div[2]")
+        approvals.append((title, _text(agency[0]) if agency else ""))
+
+    no_approvals = False
+    if not approvals:
+        txt = _first_text(doc, X_NO_APPROVAL)
+        no_approvals = bool(txt) and not any(str(i) in txt[:10] for i in range(1, 7))
+
+    return {
+        "lang": (doc.get("lang") or "").lower()[:2],
+        "activity_code": activity_code,
+        "name": name,
+        "locations": locations,
+        "eligible": eligible,
+        "approvals": approvals,
+        "no_approvals": no_approvals,
+    }
+
+
+def fetch_details(code: str, lang: str = "en", timeout: float = 15.0,
+                  session: Optional[requests.Session] = None) -> Dict[str, object]:
+    """Fetch and parse the details page of `code` in `lang`. Raises NeedsBrowser on any doubt."""
+    session = session or get_session()
+    try:
+        resp = session.get(
+            DETAILS_URL.format(code=code),
+            headers={"Accept-Language": ACCEPT_LANGUAGE.get(lang, lang)},
+            timeout=timeout,
+        )
+    except requests.RequestException as e:
+        raise NeedsBrowser(f"HTTP request failed: {e}")
+
+    if resp.status_code != 200:
+        raise NeedsBrowser(f"HTTP {resp.status_code}")
+
+    resp.encoding = resp.encoding or "utf-8"
+    fields = parse_details_html(resp.text, code)
+    if fields["lang"] != lang:
+        # No <html lang> is no proof of the language either: the names would go to the wrong column
+        raise NeedsBrowser(f"page served in '{fields['lang'] or 'unknown language'}', wanted '{lang}'")
+    return fields
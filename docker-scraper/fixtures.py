@@ -0,0 +1,250 @@
+"""
+Record/replay fixtures for extraction regression checks (output/fixtures/).
+
+Record during a real browser run:
+
+    python details_engine.py --lang en,ar --sink sqlite --record
+
+For every code scraped through the browser, the rendered page source of each
+language is saved as CODE.en.html / CODE.ar.html. The records the browser
+extracted are saved as CODE.json. Replay feeds the saved pages to the static
+parser (details_http.parse_details_html, no browser) and compares its output
+with the recorded records, field by field:
+
+    python fixtures.py replay                   # every recorded code
+    python fixtures.py replay --code 013001 -v  # one code, print every field
+    python fixtures.py listing                  # output/output_page_*.html saved by scrape_codes.py
+
+Thousands of pages replay in seconds. A page the parser cannot read any more
+(moved XPath, renamed id) or that yields different values shows up here
+before a production run wastes hours on it. The same pages can be served by
+the benchmark's mock portal (bench/mock_portal.py --pages output/fixtures).
+"""
+import argparse
+import glob
+import json
+import os
+import re
+import time
+from typing import Dict, List, Optional
+
+from lxml import html as lxml_html
+
+from details_http import NeedsBrowser, parse_details_html
+from records import Activity
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+OUTPUT_DIR = os.path.join(SCRIPT_DIR, "output")
+FIXTURES_DIR = os.path.join(OUTPUT_DIR, "fixtures")
+LANGUAGES = ("en", "ar")
+
+_dir: Optional[str] = os.environ.get("SCRAPER_RECORD") or None
+
+
+# ----------------------------
+# Record
+# ----------------------------
+def enable(path: str = FIXTURES_DIR) -> str:
+    """Record to path. Also exported to the environment, so worker processes record too."""
+    global _dir
+    os.makedirs(path, exist_ok=True)
+    _dir = path
+    os.environ["SCRAPER_RECORD"] = path
+    return path
+
+
+def enabled() -> bool:
+    return _dir is not None
+
+
+def _write(path: str, text: str) -> None:
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+def record_page(code: str, lang: str, page_source: str) -> None:
+    """Save the rendered details page of code in lang (after extraction, so clicked panels are included)."""
+    if _dir is None or lang not in LANGUAGES:
+        return
+    try:
+        _write(os.path.join(_dir, f"{code}.{lang}.html"), page_source)
+    except OSError as e:
+        print(f"  Warning: could not record page {code}.{lang}: {e}")
+
+
+def record_records(code: str, records: Dict[str, Activity]) -> None:
+    """Save what the browser extracted for code: the expected output of a replay."""
+    if _dir is None or not records:
+        return
+    payload = {
+        "code": code,
+        "recorded_at": time.time(),
+        "records": {lang: record.to_dict() for lang, record in records.items()},
+    }
+    try:
+        _write(os.path.join(_dir, f"{code}.json"), json.dumps(payload, ensure_ascii=False, indent=1))
+    except OSError as e:
+        print(f"  Warning: could not record result of {code}: {e}")
+
+
+# ----------------------------
+# Replay
+# ----------------------------
+def _norm(value) -> object:
+    """Whitespace-insensitive form of a field (innerText and lxml text_content differ in spacing)."""
+    if isinstance(value, str):
+        return re.sub(r"\s+", " ", value).strip()
+    if isinstance(value, (list, tuple)):
+        return [_norm(v) for v in value]
+    return value
+
+
+def replay_code(directory: str, code: str) -> Dict[str, object]:
+    """
+    Parse the recorded pages of code statically and compare them with the recorded records.
+    Returns {"code", "pages", "problems": [str], "fields": {lang: {field: (expected, parsed)}}}.
+    """
+    with open(os.path.join(directory, f"{code}.json"), "r", encoding="utf-8") as f:
+        expected = {lang: Activity.from_dict(data) for lang, data in json.load(f)["records"].items()}
+    any_record = next(iter(expected.values()))
+
+    result = {"code": code, "pages": 0, "problems": [], "fields": {}}
+    for lang in LANGUAGES:
+        path = os.path.join(directory, f"{code}.{lang}.html")
+        if not os.path.exists(path):
+            continue
+        result["pages"] += 1
+        with open(path, "r", encoding="utf-8") as f:
+            page_html = f.read()
+        try:
+            page = parse_details_html(page_html, code)
+        except NeedsBrowser as e:
+            result["problems"].append(f"{lang}: not parseable ({e})")
+            continue
+
+        # Both pages carry the names; the details only where that language was scraped
+        fields = {}
+        if getattr(any_record, f"name_{lang}") is not None:
+            fields[f"name_{lang}"] = (getattr(any_record, f"name_{lang}"), page["name"])
+        record = expected.get(lang)
+        if record is not None:
+            fields["locations"] = (
+                [[loc.main_location, loc.sub_location, loc.fee] for loc in record.locations],
+                [list(row) for row in page["locations"]],
+            )
+            fields["eligibility"] = (record.eligibility.requirements, list(page["eligible"]))
+            if record.approvals is not None:  # the browser could not read them either
+                fields["approvals"] = (
+                    [[a.title, a.agency] for a in record.approvals],
+                    [list(row) for row in page["approvals"]],
+                )
+        result["fields"][lang] = fields
+        for name, (want, got) in fields.items():
+            if _norm(want) != _norm(got):
+                result["problems"].append(f"{lang}: {name} differs")
+    return result
+
+
+def recorded_codes(directory: str) -> List[str]:
+    return sorted(os.path.basename(p)[:-len(".json")] for p in glob.glob(os.path.join(directory, "*.json")))
+
+
+def replay(directory: str, codes: Optional[List[str]] = None, verbose: bool = False) -> int:
+    """Replay every recorded code (or `codes`); prints a report and returns the number of failing codes."""
+    codes = codes or recorded_codes(directory)
+    started = time.perf_counter()
+    failed = pages = 0
+    for code in codes:
+        try:
+            res = replay_code(directory, code)
+        except (OSError, ValueError, KeyError, StopIteration) as e:
+            print(f"  ✗ {code}: unreadable fixture ({e})")
+            failed += 1
+            continue
+        pages += res["pages"]
+        if res["problems"]:
+            failed += 1
+            print(f"  ✗ {code}: {'; '.join(res['problems'])}")
+        if verbose or res["problems"]:
+            for lang, fields in res["fields"].items():
+                for name, (want, got) in fields.items():
+                    if verbose or _norm(want) != _norm(got):
+                        print(f"      {lang} {name}:\n        recorded: {want}\n        parsed:   {got}")
+    elapsed = time.perf_counter() - started
+
+    print("\n" + "="*70)
+    print(f"REPLAY ({directory})")
+    print("="*70)
+    print(f"Codes:      {len(codes)} ({pages} pages) in {elapsed:.1f}s")
+    print(f"Passed:     {len(codes) - failed}")
+    print(f"Failed:     {failed}")
+    print("="*70)
+    return failed
+
+
+def check_listing(directory: str = OUTPUT_DIR) -> int:
+    """
+    Parse the listing pages scrape_codes.py saved (output_page_N.html) statically: every page
+    must show activity codes and a "Page X / Y" indicator. Returns the number of failing pages
+    (1 when there are no snapshots at all).
+    """
+    def page_number(path: str) -> int:
+        match = re.search(r"output_page_(\d+)\.html$", path)
+        return int(match.group(1)) if match else 0
+
+    paths = sorted(glob.glob(os.path.join(directory, "output_page_*.html")), key=page_number)
+    if not paths:
+        print(f"No listing snapshots in {directory} (scrape_codes.py saves them as output_page_N.html)")
+        return 1
+    failed = 0
+    seen = set()
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            doc = lxml_html.fromstring(f.read())
+        codes = [t for t in (el.text_content().strip() for el in doc.xpath(
+            "//div[contains(concat(' ', normalize-space(@class), ' '), ' orange-text ')]")) if t.isdigit()]
+        indicator = " ".join(el.text_content().strip() for el in doc.xpath(
+            "//div[contains(concat(' ', normalize-space(@class), ' '), ' page-number ')]"))
+        problems = []
+        if not codes:
+            problems.append("no activity codes")
+        if not re.search(r"\d+\s*/\s*\d+", indicator):
+            problems.append("no page indicator")
+        seen.update(codes)
+        if problems:
+            failed += 1
+            print(f"  ✗ {os.path.basename(path)}: {', '.join(problems)}")
+
+    print("\n" + "="*70)
+    print(f"LISTING SNAPSHOTS ({directory})")
+    print("="*70)
+    print(f"Pages:      {len(paths)}")
+    print(f"Codes:      {len(seen)} unique")
+    print(f"Failed:     {failed}")
+    print("="*70)
+    return failed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Replay recorded portal pages through the static parser")
+    sub = parser.add_subparsers(dest="command", required=True)
+    rep = sub.add_parser("replay", help="Compare the static parse of recorded details pages with the recorded records")
+    rep.add_argument("--dir", default=FIXTURES_DIR, help=f"Fixtures directory (default {FIXTURES_DIR})")
+    rep.add_argument("--code", action="append", default=None, help="Only this code (repeatable)")
+    rep.add_argument("-v", "--verbose", action="store_true", help="Print every compared field")
+    listing = sub.add_parser("listing", help="Check the listing pages saved by scrape_codes.py")
+    listing.add_argument("--dir", default=OUTPUT_DIR, help=f"Directory of output_page_N.html (default {OUTPUT_DIR})")
+    args = parser.parse_args()
+
+    if args.command == "listing":
+        raise SystemExit(1 if check_listing(args.dir) else 0)
+    if not os.path.isdir(args.dir) or not (args.code or recorded_codes(args.dir)):
+        print(f"No fixtures in {args.dir} (record some with: python details_engine.py --record)")
+        raise SystemExit(1)
+    raise SystemExit(1 if replay(args.dir, args.code, args.verbose) else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+# pyright: reportMissingImports=false
+"""
+Lean SeleniumBase browser profile shared by scrape_codes.py and details_engine.py.
+
+The Selenium counterpart of `block_aggressively` in API-php/scraper.py:
+images, fonts, media, analytics and known third-party hosts are blocked
+through CDP `Network.setBlockedURLs`, background Chrome features are turned
+off and the disk cache is capped. Stylesheets are kept: the scrapers'
+visibility/clickability waits depend on the page layout.
+"""
+from seleniumbase import Driver
+
+BLOCKED_URL_PATTERNS = [
+    # Images
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.svg", "*.ico", "*.bmp",
+    # Fonts
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot",
+    # Media
+    "*.mp4", "*.webm", "*.mp3", "*.ogg", "*.wav",
+    # Analytics / tracking, by host only: a generic "*analytics*" would also match portal URLs
+    "*google-analytics.com*", "*analytics.google.com*", "*googletagmanager.com*", "*doubleclick.net*",
+    "*facebook.net*", "*facebook.com/tr*", "*hotjar.com*", "*clarity.ms*",
+    # Third-party widgets the scrapers never read
+    "*fonts.googleapis.com*", "*fonts.gstatic.com*", "*youtube.com*", "*ytimg.com*",
+    "*twitter.com*", "*platform.linkedin.com*", "*maps.googleapis.com*",
+]
+
+LEAN_CHROME_ARGS = [
+    "--disk-cache-size=33554432",  # 32 MB
+    "--media-cache-size=1",
+    "--disable-background-networking",
+    "--disable-component-update",
+    "--disable-default-apps",
+    "--disable-extensions",
+    "--disable-sync",
+    "--disable-translate",
+    "--mute-audio",
+    "--no-first-run",
+    "--blink-settings=imagesEnabled=false",
+]
+# Passed as Driver(disable_features=...): SeleniumBase splits chromium_arg on commas, and merges
+# this list into its own --disable-features switch (Chrome only keeps the last one given)
+LEAN_DISABLED_FEATURES = [
+    "Translate", "OptimizationHints", "MediaRouter", "InterestFeedContentSuggestions", "AutofillServerCommunication",
+]
+
+
+def apply_blocking(driver) -> bool:
+    """Block the URL patterns on the current tab through CDP. False if CDP is unavailable."""
+    try:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": BLOCKED_URL_PATTERNS})
+        return True
+    except Exception as e:
+        print(f"Warning: Could not enable resource blocking: {e}")
+        return False
+
+
+def new_driver(headless: bool, lean: bool = True):
+    """SeleniumBase UC driver; with lean=True, the lightweight profile above."""
+    if not lean:
+        return Driver(uc=True, headless=headless)
+    # No LEAN_CHROME_ARGS entry contains a comma (chromium_arg is split on them)
+    driver = Driver(uc=True, headless=headless, chromium_arg=",".join(LEAN_CHROME_ARGS),
+                    disable_features=",".join(LEAN_DISABLED_FEATURES))
+    apply_blocking(driver)
+    return driver
+
+
+def page_weight(driver):
+    """(load time in ms, bytes transferred) of the current page, from the Performance API."""
+    try:
+        return tuple(driver.execute_script("""
+            var nav = performance.getEntriesByType('navigation')[0];
+            var bytes = nav ? (nav.transferSize || 0) : 0;
+            performance.getEntriesByType('resource').forEach(function (r) { bytes += r.transferSize || 0; });
+            return [nav ? Math.round(nav.duration) : 0, bytes];
+        """))
+    except Exception:
+        return (0, 0)
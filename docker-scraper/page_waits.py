@@ -0,0 +1,166 @@
+# pyright: reportMissingImports=false
+"""
+Event-driven waits for the portal's Angular pages.
+
+Instead of fixed `time.sleep()` calls, a small script is injected with
+`execute_async_script`: a MutationObserver (plus a short interval, because
+an XHR finishing is not a DOM mutation) resolves as soon as the condition
+holds and Angular's `$http.pendingRequests` is empty. If the injected
+script fails (no Angular, CSP, driver hiccup) the callers fall back to
+plain polling.
+"""
+import math
+import time
+from typing import List, Optional, Tuple
+
+# Resolve once Angular has no request in flight (or the page has no Angular at all)
+JS_ANGULAR_IDLE = """
+var done = arguments[arguments.length - 1];
+var timeoutMs = arguments[0];
+var started = Date.now();
+function pending() {
+    try { return angular.element(document.body).injector().get('$http').pendingRequests.length; }
+    catch (e) { return 0; }
+}
+(function check() {
+    if (document.readyState === 'complete' && pending() === 0) { done(true); return; }
+    if (Date.now() - started > timeoutMs) { done(false); return; }
+    setTimeout(check, 50);
+})();
+"""
+
+# Resolve with the rendered activity codes once they differ from the previous page
+JS_CODES_RENDERED = """
+var done = arguments[arguments.length - 1];
+var selector = arguments[0], previousFp = arguments[1], minCount = arguments[2];
+var nextLiXpath = arguments[3], timeoutMs = arguments[4];
+var started = Date.now(), finished = false, observer = null, timer = null;
+function codes() {
+    var out = [];
+    document.querySelectorAll(selector).forEach(function (el) {
+        var t = (el.innerText || '').trim();
+        if (/^\\d+$/.test(t)) out.push(t);
+    });
+    return out;
+}
+function pending() {
+    try { return angular.element(document.body).injector().get('$http').pendingRequests.length; }
+    catch (e) { return 0; }
+}
+function lastPage() {
+    var li = document.evaluate(nextLiXpath, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+    return !li || (li.className || '').indexOf('disabled') !== -1;
+}
+function finish(list, timedOut) {
+    if (finished) return;
+    finished = true;
+    if (observer) observer.disconnect();
+    if (timer) clearInterval(timer);
+    done({codes: list, timed_out: timedOut, waited_ms: Date.now() - started});
+}
+function check() {
+    var list = codes();
+    if (list.length && list.slice(0, 10).join('|') !== previousFp && pending() === 0
+            && (list.length >= minCount || lastPage())) {
+        finish(list, false);
+    } else if (Date.now() - started > timeoutMs) {
+        finish(list, true);
+    }
+}
+observer = new MutationObserver(check);
+observer.observe(document.body, {childList: true, subtree: true, characterData: true});
+timer = setInterval(check, 100);
+check();
+"""
+
+# What the old fixed waits cost: hard sleeps per "next" click, and the poll interval
+LEGACY_SLEEP_PER_PAGE = 3.0  # time.sleep(2) after the click + time.sleep(1) after scrolling
+LEGACY_POLL_INTERVAL = 0.5
+
+
+def _run_async(driver, script: str, timeout: float, *args):
+    driver.set_script_timeout(timeout + 5)
+    return driver.execute_async_script(script, *args)
+
+
+def wait_for_angular_idle(driver, timeout: float = 15.0) -> bool:
+    """Wait until the document is loaded and Angular has no pending $http request."""
+    try:
+        return bool(_run_async(driver, JS_ANGULAR_IDLE, timeout, int(timeout * 1000)))
+    except Exception:
+        time.sleep(1)
+        return False
+
+
+def wait_for_codes_rendered(driver, selector: str, previous_fp: str, next_li_xpath: str,
+                            min_count: int = 1, timeout: float = 25.0) -> Tuple[List[str], float, bool]:
+    """
+    Wait until the codes matched by `selector` differ from `previous_fp` (see codes_fingerprint),
+    at least `min_count` of them are rendered (fewer is fine on the last page) and Angular is idle.
+    Returns (codes, seconds waited, timed_out).
+    """
+    started = time.time()
+    try:
+        res = _run_async(driver, JS_CODES_RENDERED, timeout,
+                         selector, previous_fp, min_count, next_li_xpath, int(timeout * 1000))
+        return list(res.get("codes") or []), time.time() - started, bool(res.get("timed_out"))
+    except Exception:
+        return _poll_codes(driver, selector, previous_fp, timeout, started)
+
+
+def _poll_codes(driver, selector: str, previous_fp: str, timeout: float,
+                started: float) -> Tuple[List[str], float, bool]:
+    """Fallback when the injected script cannot run: poll the DOM like the old code did."""
+    from selenium.webdriver.common.by import By
+
+    codes: List[str] = []
+    while time.time() - started < timeout:
+        try:
+            codes = [t for t in (el.text.strip() for el in driver.find_elements(By.CSS_SELECTOR, selector)) if t.isdigit()]
+        except Exception:
+            codes = []
+        if codes and "|".join(codes[:10]) != previous_fp:
+            return codes, time.time() - started, False
+        time.sleep(LEGACY_POLL_INTERVAL)
+    return codes, time.time() - started, True
+
+
+def legacy_wait_estimate(render_s: float) -> float:
+    """
+    What the old loop would have spent on the same page: the render time rounded up
+    to its 0.5s poll, plus the fixed sleeps.
+    """
+    polled = math.ceil(render_s / LEGACY_POLL_INTERVAL) * LEGACY_POLL_INTERVAL
+    return polled + LEGACY_SLEEP_PER_PAGE
+
+
+class WaitStats:
+    """Per-page wait times and the estimated time saved against the fixed sleeps."""
+
+    def __init__(self):
+        self.pages = 0
+        self.waited = 0.0
+        self.saved = 0.0
+        self.timeouts = 0
+
+    def add(self, render_s: float, timed_out: bool) -> float:
+        """Record one page; returns the seconds saved on it."""
+        saved = max(0.0, legacy_wait_estimate(render_s) - render_s) if not timed_out else 0.0
+        self.pages += 1
+        self.waited += render_s
+        self.saved += saved
+        self.timeouts += int(timed_out)
+        return saved
+
+    def add_saved(self, seconds: float) -> None:
+        """Time saved outside the page loop (e.g. the startup sleeps)."""
+        self.saved += max(0.0, seconds)
+
+    def summary(self) -> Optional[str]:
+        if not self.pages:
+            return None
+        return (
+            f"{self.pages} pages, avg wait {self.waited / self.pages:.2f}s, "
+            f"~{self.saved:.0f}s saved vs fixed sleeps (estimated from the old sleep lengths, not measured)"
+            + (f", {self.timeouts} timeouts" if self.timeouts else "")
+        )
@@ -1,16 +1,23 @@
 # pyright: reportMissingImports=false
 import os
 import argparse
+import multiprocessing
+import multiprocessing.util
 import time
 import re
 import warnings
 import gspread
 from oauth2client.service_account import ServiceAccountCredentials
-from seleniumbase import Driver
+from lean_browser import new_driver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, NoSuchElementException, StaleElementReferenceException
+from selenium.webdriver.common.keys import Keys
+from code_snapshot import save_snapshot
+from sinks import open_local_sinks, parse_sinks
+import tracing
+from tracing import trace_code, traced
+from page_waits import wait_for_angular_idle, wait_for_codes_rendered, WaitStats
 
 # Suppress gspread deprecation warnings
 warnings.filterwarnings('ignore', category=UserWarning, module='gspread')
@@ -19,11 +26,22 @@ SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 DRIVE_DIR = os.path.join(SCRIPT_DIR, "drive")
 OUTPUT_DIR = os.path.join(SCRIPT_DIR, "output")
 
+# Scheme + host of the portal; PORTAL_ORIGIN points the scraper at a local mock (bench/mock_portal.py)
+PORTAL_ORIGIN = os.environ.get("PORTAL_ORIGIN", "https://investor.sw.gov.qa").rstrip("/")
+BASE_URL = PORTAL_ORIGIN + "/wps/portal/investors/home/!ut/p/z1/04_Sj9CPykssy0xPLMnMz0vMAfIjo8zivfxNXA393Q38LXy9DQzMAj0cg4NcLY0MDMz1w_Wj9KNQlISGGRkEOjuZBjm6Wxj7OxpCFRjgAI4G-sGpefoF2dlpjo6KigAeufkI/dz/d5/L2dBISEvZ0FBIS9nQSEh/"
+
 # XPath Constants
+X_FOOTER_BUSINESS_ACTIVITIES = "/html/body/footer/section[1]/div/div/div[2]/ul/li[2]/a"
+X_SEARCH_INPUT = "/html/body/div[4]/div/div/section/div[2]/main/section[3]/div/div/div[1]/div/div/input"
+X_SEARCH_REMOVE = "/html/body/div[4]/div/div/section/div[2]/main/section[3]/div/div/div[1]/div/div/div/div/span"
+X_RESULTS_CONTAINER = "/html/body/div[4]/div/div/section/div[2]/main/section[3]/div/div/div[3]"
 X_ACTIVITY_CODE_CONTAINER = "div.orange-text.ng-binding"
 X_NEXT_BUTTON_LI = "//*[@id='pills-activities']//li[contains(@ng-click, 'nextPage()')]"
 X_NEXT_BUTTON_LINK = "//*[@id='pills-activities']//li[contains(@ng-click, 'nextPage()')]//div[@class='page-link']"
 
+# Fixed sleeps the start-up sequence used before page 1 (5+1+5+3+1+1 in main, 3 in set_page_size_30)
+LEGACY_STARTUP_SLEEP = 19.0
+
 def save_html_snapshot(driver, filename: str):
     """Save page HTML to output directory"""
     try:
@@ -83,18 +101,16 @@ def codes_fingerprint(codes: list) -> str:
     """Fingerprint to detect page content change (order-sensitive)"""
     return "|".join(codes[:10]) if codes else ""
 
-def wait_for_codes_change(driver, previous_codes: list, timeout: int = 20) -> list:
-    """Wait until the activity code list changes compared to previous page"""
-    prev_fp = codes_fingerprint(previous_codes)
-    start = time.time()
-    
-    while (time.time() - start) < timeout:
-        codes = get_activity_codes(driver)
-        if codes and codes_fingerprint(codes) != prev_fp:
-            return codes
-        time.sleep(0.5)
-    
-    return get_activity_codes(driver)
+@traced("page_render")
+def wait_for_codes_change(driver, previous_codes: list, expected_count: int = 30, timeout: int = 25):
+    """
+    Wait until the activity code list changes compared to previous page (event-driven, see page_waits).
+    Returns (codes, seconds waited, timed_out).
+    """
+    return wait_for_codes_rendered(
+        driver, X_ACTIVITY_CODE_CONTAINER, codes_fingerprint(previous_codes), X_NEXT_BUTTON_LI,
+        min_count=expected_count, timeout=timeout,
+    )
 
 def is_next_button_disabled(driver) -> bool:
     """Check if the Next page button is disabled"""
@@ -152,6 +168,7 @@ def get_expected_pages(driver, timeout: int = 5) -> int:
         pass
     return None
 
+@traced("page_size")
 def set_page_size_30(driver) -> bool:
     """
     Set the page size dropdown to 30 rows per page.
@@ -165,8 +182,9 @@ def set_page_size_30(driver) -> bool:
         select = Select(dropdown_element)
         select.select_by_visible_text("30")
         
-        # Wait for the page to reload
-        time.sleep(3) # Give it a moment to trigger update
+        # Wait for the list to re-render with the new page size. Page 1 keeps its first
+        # codes, so wait for 30 of them instead of a changed fingerprint
+        wait_for_codes_change(driver, [], expected_count=30, timeout=15)
         WebDriverWait(driver, 15).until(
             EC.visibility_of_element_located((By.CSS_SELECTOR, "div.orange-text.ng-binding"))
         )
@@ -195,6 +213,7 @@ def wait_for_results(driver, expected_count: int = 30, timeout: int = 15) -> int
     # Return whatever we have after timeout
     return len(get_activity_codes(driver))
 
+@traced("sheet_save")
 def save_codes_bulk(worksheet, start_row: int, codes: list) -> bool:
     """
     Save a page of codes in bulk with retries.
@@ -254,6 +273,83 @@ def connect_to_sheets():
         print(f"Error connecting to Google Sheets: {e}")
         return None
 
+def save_codes_local(sink_kinds, codes: list) -> None:
+    """Replace the code listing in every local sink (--sink sqlite/csv/parquet) in one bulk write."""
+    for sink in open_local_sinks(sink_kinds):
+        try:
+            count = sink.write_codes(codes)
+            print(f"Saved {count} codes to the {sink.name} sink")
+        except Exception as e:
+            print(f"Error saving to the {sink.name} sink: {e}")
+        finally:
+            sink.close()
+
+@traced("open_listing")
+def open_activity_listing(driver) -> None:
+    """Open the home page and follow the footer link to the business activities listing."""
+    driver.get(BASE_URL)
+    
+    # Wait for page to be fully loaded (no pending Angular requests)
+    wait_for_angular_idle(driver, timeout=30)
+    
+    # Scroll to the very bottom of the page
+    driver.execute_script("window.scrollTo(0, document.body.scrollHeight)")
+    
+    # Click footer link
+    footer_link = WebDriverWait(driver, 10).until(
+        EC.element_to_be_clickable((By.XPATH, X_FOOTER_BUSINESS_ACTIVITIES))
+    )
+    footer_link.click()
+    
+    # Wait for page to load
+    wait_for_angular_idle(driver, timeout=30)
+
+
+@traced("search")
+def search_listing(driver, text: str) -> None:
+    """Type text into the listing search input and press ENTER."""
+    input_field = WebDriverWait(driver, 10).until(
+        EC.visibility_of_element_located((By.XPATH, X_SEARCH_INPUT))
+    )
+    input_field.clear()
+    input_field.send_keys(text)
+    input_field.send_keys(Keys.ENTER)
+    
+    # Wait for the search request to finish
+    wait_for_angular_idle(driver, timeout=15)
+
+
+def clear_search(driver) -> None:
+    """Click the Remove button of the search filter (shows the full list) and scroll to the results."""
+    remove_button = WebDriverWait(driver, 10).until(
+        EC.element_to_be_clickable((By.XPATH, X_SEARCH_REMOVE))
+    )
+    remove_button.click()
+    wait_for_angular_idle(driver, timeout=15)
+    
+    # Scroll again to the end of the page
+    driver.execute_script("window.scrollTo(0, document.body.scrollHeight)")
+    
+    # Scroll up to the container with activity codes
+    try:
+        container = driver.find_element(By.XPATH, X_RESULTS_CONTAINER)
+        driver.execute_script("arguments[0].scrollIntoView();", container)
+    except:
+        pass
+
+
+@traced("next_click")
+def click_next_page(driver) -> None:
+    next_button_link = WebDriverWait(driver, 10).until(
+        EC.element_to_be_clickable((By.XPATH, X_NEXT_BUTTON_LINK))
+    )
+    # Try regular click, fall back to JS click
+    try:
+        next_button_link.click()
+    except:
+        driver.execute_script("arguments[0].click();", next_button_link)
+
+
 def print_page_table(page_number: int, codes: list):
     """Print a professional table showing page number and activity codes"""
     try:
@@ -272,6 +368,263 @@ def print_page_table(page_number: int, codes: list):
             print(f"| {code:<11} |")
         print("+-------------+")
 
+# ----------------------------
+# Sharded listing (--shards K)
+# ----------------------------
+# The unfiltered listing is split into K contiguous page ranges; each browser jumps
+# to the first page of its range and pages only that range.
+SHEET_CHUNK_ROWS = 1000
+
+# Jump the listing to page arguments[1] (it shows page arguments[2]) through the Angular
+# scope of the Next button: the controller's current-page field is the one scope field named
+# *page* holding the shown page number; set it to target - 1 and let nextPage() load the target.
+# Returns the field name, or null when the scope does not look like that.
+JS_JUMP_TO_PAGE = """
+var li = arguments[0], target = arguments[1], current = arguments[2];
+if (!window.angular || !angular.element(li).scope) return null;
+var scope = angular.element(li).scope();
+if (!scope || typeof scope.nextPage !== 'function') return null;
+var found = [];
+for (var s = scope; s; s = s.$parent) {
+    for (var k in s) {
+        if (Object.prototype.hasOwnProperty.call(s, k) && k.charAt(0) !== '$' && /page/i.test(k)
+                && !/size|count|total|per|select|last|max/i.test(k) && s[k] === current) {
+            found.push([s, k]);
+        }
+    }
+    if (found.length) break;
+}
+if (found.length !== 1) return null;
+var owner = found[0][0], field = found[0][1];
+scope.$apply(function () { owner[field] = target - 1; scope.nextPage(); });
+return field;
+"""
+
+_shard_driver = None
+
+
+def _quit_shard_driver() -> None:
+    global _shard_driver
+    if _shard_driver is not None:
+        try:
+            _shard_driver.quit()
+        except Exception:
+            pass
+        _shard_driver = None
+
+
+def _init_shard_worker(headless: bool, lean: bool = True) -> None:
+    """Pool initializer: each shard process owns one browser for its whole lifetime."""
+    global _shard_driver
+    _shard_driver = new_driver(headless, lean)
+    multiprocessing.util.Finalize(None, _quit_shard_driver, exitpriority=10)
+
+
+def open_unfiltered_listing(driver) -> list:
+    """The serial start-up sequence: unfiltered listing, 30 rows per page. Returns the codes of page 1."""
+    open_activity_listing(driver)
+    search_listing(driver, "10")
+    clear_search(driver)
+    set_page_size_30(driver)
+    wait_for_results(driver, expected_count=30, timeout=15)
+    return get_activity_codes(driver)
+
+
+@traced("page_jump")
+def jump_to_page(driver, page: int, codes: list) -> list:
+    """
+    Show listing page `page` without walking the pages before it: a numbered paginator link
+    if there is one, else the Angular scope (JS_JUMP_TO_PAGE). Verified against the
+    "Page X / Y" indicator; raises if the portal cannot jump. Returns the codes of that page.
+    """
+    current, _ = get_page_numbers(driver)
+    if current == page:
+        return codes
+    links = driver.find_elements(
+        By.XPATH, f"//*[@id='pills-activities']//li[contains(@class, 'page-item')][normalize-space(.)='{page}']"
+    )
+    if links:
+        driver.execute_script("arguments[0].click();", links[0])
+        how = "page link"
+    else:
+        next_li = driver.find_element(By.XPATH, X_NEXT_BUTTON_LI)
+        how = driver.execute_script(JS_JUMP_TO_PAGE, next_li, page, current)
+        if not how:
+            raise Exception("the paginator has no page links and its scope has no current-page field")
+    new_codes, _, timed_out = wait_for_codes_change(driver, codes, timeout=25)
+    shown, _ = get_page_numbers(driver)
+    if timed_out or shown != page:
+        raise Exception(f"jump to page {page} via {how} landed on page {shown}")
+    return new_codes
+
+
+def collect_page_range(driver, first: int, last: int):
+    """
+    Codes of listing pages first..last (inclusive): jump to `first`, then Next up to `last`.
+    Returns (codes, pages, wait_stats).
+    """
+    stats = WaitStats()
+    activity_codes = jump_to_page(driver, first, open_unfiltered_listing(driver))
+    codes = []
+    page = first
+    while True:
+        codes.extend(activity_codes)
+        if page >= last or is_next_button_disabled(driver):
+            break
+        before_codes = activity_codes
+        click_next_page(driver)
+        activity_codes, render_s, timed_out = wait_for_codes_change(driver, before_codes, timeout=25)
+        stats.add(render_s, timed_out)
+        if timed_out and codes_fingerprint(activity_codes) == codes_fingerprint(before_codes):
+            raise Exception(f"pagination stuck after page {page}")
+        page += 1
+    return codes, page - first + 1, stats
+
+
+def probe_listing(driver) -> dict:
+    """Total results and pages of the unfiltered listing, and whether jumping to page 2 works."""
+    codes = open_unfiltered_listing(driver)
+    probe = {"total": get_total_results_count(driver, timeout=10), "pages": get_expected_pages(driver, timeout=5),
+             "jump_error": None}
+    if (probe["pages"] or 0) >= 2:
+        try:
+            jump_to_page(driver, 2, codes)
+        except Exception as e:
+            probe["jump_error"] = str(e)
+    return probe
+
+
+def _run_shard_job(job):
+    """One pool job: ("probe", None) or ("range", (first, last))."""
+    kind, pages = job
+    started = time.time()
+    result = {"job": job, "codes": [], "pages": 0, "probe": None, "error": None, "waits": None}
+    try:
+        if kind == "probe":
+            result["probe"] = probe_listing(_shard_driver)
+        else:
+            with trace_code(f"pages:{pages[0]}-{pages[1]}"):
+                codes, count, stats = collect_page_range(_shard_driver, *pages)
+            result.update(codes=codes, pages=count, waits=stats.summary())
+    except Exception as e:
+        result["error"] = str(e)
+        try:
+            save_html_snapshot(_shard_driver, f"output_shard_{kind}_{pages[0] if pages else 0}_error.html")
+        except Exception:
+            pass
+    result["elapsed_s"] = round(time.time() - started, 1)
+    return result
+
+
+def split_pages(total_pages: int, shards: int) -> list:
+    """Contiguous (first, last) page ranges, as even as possible, at most one per shard."""
+    shards = max(1, min(shards, total_pages))
+    size, extra = divmod(total_pages, shards)
+    ranges, first = [], 1
+    for i in range(shards):
+        last = first + size - 1 + (1 if i < extra else 0)
+        ranges.append((first, last))
+        first = last + 1
+    return ranges
+
+
+def run_sharded(shards: int, headless: bool, lean: bool = True, sinks=("sheets",)) -> bool:
+    """
+    List all codes with `shards` browsers at once, each paging its own range of the listing.
+    One browser first reads the totals and checks that the portal can jump to a page;
+    returns False (nothing done, run serially) when it cannot.
+    Codes are merged in page order, deduplicated and checked against the unfiltered total.
+    """
+    start_time = time.time()
+    pool = multiprocessing.Pool(processes=shards, initializer=_init_shard_worker, initargs=(headless, lean))
+    try:
+        probe_result = pool.apply(_run_shard_job, (("probe", None),))
+        probe = probe_result["probe"]
+        if probe_result["error"] or not probe or not probe["pages"]:
+            print(f"Sharded listing: could not read the page count ({probe_result['error']}), running serially")
+            pool.close()
+            return False
+        if probe["jump_error"]:
+            print(f"Sharded listing: the listing cannot jump to a page ({probe['jump_error']}), running serially")
+            pool.close()
+            return False
+        
+        ranges = split_pages(probe["pages"], shards)
+        print(f"Sharded listing: {probe['pages']} pages over {len(ranges)} browsers "
+              f"({', '.join(f'{a}-{b}' for a, b in ranges)}); probe took {probe_result['elapsed_s']}s")
+        results = {}
+        for res in pool.imap_unordered(_run_shard_job, [("range", r) for r in ranges]):
+            first, last = res["job"][1]
+            results[(first, last)] = res
+            if res["error"]:
+                print(f"  ✗ pages {first}-{last}: {res['error']} ({res['elapsed_s']}s)")
+            else:
+                print(f"  ✓ pages {first}-{last}: {len(res['codes'])} codes on {res['pages']} pages ({res['elapsed_s']}s)")
+        pool.close()
+    except BaseException:
+        pool.terminate()
+        raise
+    finally:
+        pool.join()
+        
+    expected_total_results = probe["total"]
+    merged = [code for r in ranges for code in results[r]["codes"]]
+    unique_codes = list(dict.fromkeys(merged))
+    failed = [f"{a}-{b}" for a, b in ranges if results[(a, b)]["error"]]
+    workers = len(ranges)
+    
+    # Write everything in a few bulk updates
+    worksheet = connect_to_sheets() if "sheets" in sinks else None
+    saved = 0
+    if worksheet and unique_codes:
+        worksheet.update_cell(1, 1, "Search")
+        format_column_as_text(worksheet)
+        for i in range(0, len(unique_codes), SHEET_CHUNK_ROWS):
+            chunk = unique_codes[i:i + SHEET_CHUNK_ROWS]
+            if save_codes_bulk(worksheet, 2 + i, chunk):
+                saved += len(chunk)
+    elif not worksheet and "sheets" in sinks:
+        print("Could not connect to Google Sheets, skipping save")
+    if unique_codes:
+        save_codes_local(sinks, unique_codes)
+        
+    elapsed_time = time.time() - start_time
+    minutes = int(elapsed_time // 60)
+    seconds = int(elapsed_time % 60)
+    
+    print(f"\n{'='*40}")
+    print(f"{'SUMMARY (SHARDED)':^40}")
+    print(f"{'='*40}")
+    print(f"\nElapsed Time:    {minutes}m {seconds}s")
+    print(f"Browsers:        {workers}")
+    print(f"\nResults:")
+    if expected_total_results is not None:
+        print(f"  Expected:      {expected_total_results}")
+    print(f"  Collected:     {len(unique_codes)} ({len(merged) - len(unique_codes)} duplicates removed)")
+    print(f"  Saved:         {saved}")
+    if failed:
+        print(f"  Status:        ✗ FAILED PAGES ({', '.join(failed)})")
+    elif expected_total_results is None:
+        print(f"  Status:        Unknown (could not read expected total)")
+    elif len(unique_codes) == expected_total_results:
+        print(f"  Status:        ✓ OK")
+    else:
+        diff = len(unique_codes) - expected_total_results
+        print(f"  Status:        ✗ MISMATCH ({'Excess: +' if diff > 0 else 'Missing: '}{diff})")
+        
+    # Listing snapshot: only a complete listing can tell which codes were removed
+    if not failed and (expected_total_results is None or len(unique_codes) >= expected_total_results):
+        delta = save_snapshot(unique_codes)
+        print(f"\nSnapshot:")
+        print(f"  Codes:         {len(unique_codes)}")
+        print(f"  Added:         {len(delta['added'])}")
+        print(f"  Removed:       {len(delta['removed'])}")
+    else:
+        print(f"\nSnapshot:       not updated (listing incomplete)")
+    print(f"\n{'='*40}")
+    return True
+
+
 def main():
     # Parse command-line arguments
     parser = argparse.ArgumentParser(description='Scrape activity codes from investor portal (SeleniumBase)')
@@ -280,75 +633,43 @@ def main():
     group.add_argument('--visible', action='store_true', help='Run browser in visible mode (default is headless)')
     # Backward-compatible flag (still supported)
     group.add_argument('--headless', action='store_true', help='Run browser in headless mode (invisible)')
+    parser.add_argument('--shards', type=int, default=1, help='Parallel browsers, each paging its own range of the listing (default 1 = serial; '
+                             'falls back to serial when the portal cannot jump to a page)')
+    parser.add_argument('--full-browser', action='store_true',
+                        help='Load images, fonts, media and third-party scripts (default: lean browser profile)')
+    parser.add_argument('--sink', type=parse_sinks, default=parse_sinks("sheets"),
+                        help='Outputs: sheets, sqlite, csv, parquet, comma separated (default sheets)')
+    parser.add_argument('--trace', nargs='?', const=tracing.TRACE_FILE, default=None,
+                        help=f'Record stage timings as JSON lines (default file {tracing.TRACE_FILE})')
     args = parser.parse_args()
+    if args.trace:
+        print(f"Tracing stages to {args.trace} (run {tracing.enable(args.trace)}); "
+              f"profile with: python tracing.py report --trace {args.trace}")
     
     # Determine headless mode (default True if not --visible)
     # SeleniumBase Driver arg is "headless", NOT "run_headless"
     is_headless = not args.visible
     
+    if args.shards > 1 and run_sharded(args.shards, is_headless, lean=not args.full_browser, sinks=args.sink):
+        return
+    
     # Start timing
     start_time = time.time()
     
     print("Browser started (SeleniumBase UC)")
     
     # Launch Chromium browser with SeleniumBase UC
-    # uc=True enables Undetected ChromeDriver
-    driver = Driver(uc=True, headless=is_headless)
+    # uc=True enables Undetected ChromeDriver; lean profile blocks images/fonts/media/analytics
+    driver = new_driver(is_headless, lean=not args.full_browser)
+    wait_stats = WaitStats()
     
     try:
-        # Open the base URL
-        base_url = "https://investor.sw.gov.qa/wps/portal/investors/home/!ut/p/z1/04_Sj9CPykssy0xPLMnMz0vMAfIjo8zivfxNXA393Q38LXy9DQzMAj0cg4NcLY0MDMz1w_Wj9KNQlISGGRkEOjuZBjm6Wxj7OxpCFRjgAI4G-sGpefoF2dlpjo6KigAeufkI/dz/d5/L2dBISEvZ0FBIS9nQSEh/"
-        driver.get(base_url)
+        startup_started = time.time()
         
-        # Wait for page to be fully loaded (generic wait)
-        time.sleep(5)
-        
-        # Scroll to the very bottom of the page
-        driver.execute_script("window.scrollTo(0, document.body.scrollHeight)")
-        time.sleep(1)
-        
-        # Click footer link
-        # /html/body/footer/section[1]/div/div/div[2]/ul/li[2]/a
-        footer_link = WebDriverWait(driver, 10).until(
-            EC.element_to_be_clickable((By.XPATH, "/html/body/footer/section[1]/div/div/div[2]/ul/li[2]/a"))
-        )
-        footer_link.click()
-        
-        # Wait for page to load
-        time.sleep(5)
-        
-        # Locate input field and type 10, then press ENTER
-        input_xpath = "/html/body/div[4]/div/div/section/div[2]/main/section[3]/div/div/div[1]/div/div/input"
-        input_field = WebDriverWait(driver, 10).until(
-            EC.visibility_of_element_located((By.XPATH, input_xpath))
-        )
-        input_field.clear()
-        input_field.send_keys("10")
-        from selenium.webdriver.common.keys import Keys
-        input_field.send_keys(Keys.ENTER)
-        
-        # Wait 3 seconds
-        time.sleep(3)
-        
-        # Click Remove button
-        remove_button_xpath = "/html/body/div[4]/div/div/section/div[2]/main/section[3]/div/div/div[1]/div/div/div/div/span"
-        remove_button = WebDriverWait(driver, 10).until(
-            EC.element_to_be_clickable((By.XPATH, remove_button_xpath))
-        )
-        remove_button.click()
-        
-        # Scroll again to the end of the page
-        driver.execute_script("window.scrollTo(0, document.body.scrollHeight)")
-        time.sleep(1)
-        
-        # Scroll up to the container with activity codes
-        try:
-            container_xpath = "/html/body/div[4]/div/div/section/div[2]/main/section[3]/div/div/div[3]"
-            container = driver.find_element(By.XPATH, container_xpath)
-            driver.execute_script("arguments[0].scrollIntoView();", container)
-            time.sleep(1)
-        except:
-            pass
+        # Business activities page, then "10" + Remove to get the unfiltered list
+        open_activity_listing(driver)
+        search_listing(driver, "10")
+        clear_search(driver)
         
         # Set page size to 30 rows per page
         set_page_size_30(driver)
@@ -358,6 +679,10 @@ def main():
         
         # Extract activity codes from the page
         activity_codes = get_activity_codes(driver)
+        startup_s = time.time() - startup_started
+        wait_stats.add_saved(LEGACY_STARTUP_SLEEP - startup_s)
+        print(f"Page 1 ready after {startup_s:.1f}s "
+              f"(estimated ~{max(0.0, LEGACY_STARTUP_SLEEP - startup_s):.0f}s saved: the fixed sleeps alone took {LEGACY_STARTUP_SLEEP:.0f}s)")
         
         # Capture the expected total results and pages count from page 1
         expected_total_results = get_total_results_count(driver, timeout=5)
@@ -376,9 +701,10 @@ def main():
         print(f"{'='*40}\n")
         
         # Connect to Google Sheets once at the beginning
-        worksheet = connect_to_sheets()
+        worksheet = connect_to_sheets() if "sheets" in args.sink else None
         if not worksheet:
-            print("Could not connect to Google Sheets, skipping save")
+            if "sheets" in args.sink:
+                print("Could not connect to Google Sheets, skipping save")
             worksheet = None
         else:
             # Set header in row 1
@@ -391,6 +717,10 @@ def main():
         page_number = 1
         pages_processed = 0
         last_saved_fp = None
+        # Every code seen, for the listing snapshot (incremental detail runs)
+        all_codes = []
+        last_seen_fp = None
+        listing_complete = False
         
         while True:
             # Sync our displayed page number with the real UI page number
@@ -402,6 +732,10 @@ def main():
             if activity_codes:
                 print_page_table(page_number, activity_codes)
             
+            if activity_codes and codes_fingerprint(activity_codes) != last_seen_fp:
+                all_codes.extend(activity_codes)
+                last_seen_fp = codes_fingerprint(activity_codes)
+            
             # Save current page codes in bulk
             if activity_codes and worksheet:
                 try:
@@ -428,6 +762,7 @@ def main():
             try:
                 if is_next_button_disabled(driver):
                     print("\nReached last page (Next button disabled)")
+                    listing_complete = True
                     break
             except Exception as e:
                 print(f"\nCould not locate Next button: {e}")
@@ -435,57 +770,41 @@ def main():
             
             # Try to click next page button
             try:
-                before_text = get_page_indicator_text(driver)
                 before_codes = activity_codes
                 
                 # Click next (find the clickable element inside the li)
-                next_button_link = WebDriverWait(driver, 10).until(
-                    EC.element_to_be_clickable((By.XPATH, X_NEXT_BUTTON_LINK))
-                )
-                
-                # Try regular click, fall back to JS click
-                try:
-                    next_button_link.click()
-                except:
-                    driver.execute_script("arguments[0].click();", next_button_link)
+                click_next_page(driver)
                 
-                # Wait for page indicator to change
-                start_wait = time.time()
-                while time.time() - start_wait < 15:
-                    new_text = get_page_indicator_text(driver)
-                    if new_text != before_text:
-                        break
-                    time.sleep(0.5)
+                # Wait until the new page's codes are rendered and Angular is idle
+                activity_codes, render_s, timed_out = wait_for_codes_change(driver, before_codes, timeout=25)
+                saved_s = wait_stats.add(render_s, timed_out)
+                print(f"Next page rendered in {render_s:.2f}s"
+                      + (" (timed out)" if timed_out else f" (est. ~{saved_s:.1f}s saved vs fixed sleeps)"))
                 
                 # After navigation, re-sync page number from UI
                 ui_cur2, ui_last2 = get_page_numbers(driver)
                 if ui_cur2:
                     page_number = ui_cur2
                 
-                # Wait for network stabilization
-                time.sleep(2)
-                
-                # Wait for results to render
-                wait_for_results(driver, expected_count=30, timeout=15)
-                
                 # Scroll to container
                 try:
-                    container = driver.find_element(By.XPATH, "/html/body/div[4]/div/div/section/div[2]/main/section[3]/div/div/div[3]")
+                    container = driver.find_element(By.XPATH, X_RESULTS_CONTAINER)
                     driver.execute_script("arguments[0].scrollIntoView();", container)
-                    time.sleep(1)
                 except:
                     pass
                 
-                # Extract codes from new page
-                activity_codes = wait_for_codes_change(driver, before_codes, timeout=25)
-                
             except Exception as e:
                 save_html_snapshot(driver, f"output_stopped_page_{page_number}.html")
                 print(f"Stopped pagination at page {page_number}: {e}")
                 break
         
+        # Local sinks get the whole listing in one bulk write
+        unique_codes = list(dict.fromkeys(all_codes))
+        if unique_codes:
+            save_codes_local(args.sink, unique_codes)
+        
         # Print summary
-        total_activities_saved = current_row - 2
+        total_activities_saved = current_row - 2 if worksheet else len(unique_codes)
         
         elapsed_time = time.time() - start_time
         minutes = int(elapsed_time // 60)
@@ -495,6 +814,8 @@ def main():
         print(f"{'SUMMARY':^40}")
         print(f"{'='*40}")
         print(f"\nElapsed Time:    {minutes}m {seconds}s")
+        if wait_stats.summary():
+            print(f"Waits:           {wait_stats.summary()}")
         
         # Determine actual pages processed
         final_cur, final_last = get_page_numbers(driver)
@@ -536,6 +857,18 @@ def main():
             print(f"  Scraped/Saved: {total_activities_saved}")
             print(f"  Status:        Unknown (could not read expected total)")
         
+        # Listing snapshot: only a complete listing can tell which codes were removed
+        if listing_complete and (expected_total_results is None or len(unique_codes) >= expected_total_results):
+            delta = save_snapshot(unique_codes)
+            print(f"\nSnapshot:")
+            print(f"  Codes:         {len(unique_codes)}")
+            print(f"  Added:         {len(delta['added'])}")
+            print(f"  Removed:       {len(delta['removed'])}")
+            for code in delta["removed"][:20]:
+                print(f"    - {code}")
+        else:
+            print(f"\nSnapshot:       not updated (listing incomplete)")
+        
         print(f"\n{'='*40}")
         
         # Save the full page HTML source
@@ -544,8 +877,9 @@ def main():
         with open(os.path.join(OUTPUT_DIR, "output.html"), "w", encoding="utf-8") as f:
             f.write(content)
         
-        # Keep browser open for 5 seconds
-        time.sleep(5)
+        # Keep a visible browser open for 5 seconds (nothing to look at when headless)
+        if not is_headless:
+            time.sleep(5)
         
     except Exception as e:
         print(f"Error: {str(e)}")
@@ -0,0 +1,118 @@
+# pyright: reportMissingImports=false
+"""
+Push local results to the EN/AR worksheets in one bulk sync.
+
+Scrape into a local sink first, then publish only what changed:
+
+    python details_engine.py --lang en,ar --sink sqlite
+    python sheet_sync.py --lang en,ar                  # from output/scrape.sqlite3
+    python sheet_sync.py --lang en --from csv --dry-run
+
+Each worksheet is read with a single `get_all_values` call. Rows are matched by
+the code in Column A, like details_engine.py does. The cells that differ from
+the stored records are sent through BufferedSheetWriter, which builds one
+`batch_update` per `--batch-rows` changed rows. A refresh where 20 of 2,800
+rows changed costs one read and one write per worksheet.
+"""
+import argparse
+from typing import Dict, List
+
+from details_engine import (
+    SHEET_COLUMNS, SHEET_HEADERS, WORKSHEET_NAMES,
+    connect_to_spreadsheet, format_column_b_as_text, parse_langs,
+)
+from records import Activity, sheet_fields
+from sheet_writer import BufferedSheetWriter
+from sinks import SINKS, open_local_sinks
+
+
+def _cell(grid: List[List[str]], row: int, col: int) -> str:
+    """Value of a 1-based cell in a get_all_values() grid ('' outside the filled area)."""
+    if row - 1 >= len(grid):
+        return ""
+    values = grid[row - 1]
+    return values[col - 1] if col - 1 < len(values) else ""
+
+
+def sheet_diff(grid: List[List[str]], records: Dict[str, Activity]) -> Dict[int, Dict[int, str]]:
+    """
+    {row: {col: value}} of the cells that differ from the records: the header row, and
+    Columns B-G of the first row listing each code in Column A. Rows without a record are left alone.
+    """
+    changes: Dict[int, Dict[int, str]] = {}
+    headers = {col: text for col, text in SHEET_HEADERS.items() if _cell(grid, 1, col) != text}
+    if headers:
+        changes[1] = headers
+
+    seen = set()
+    for row in range(2, len(grid) + 1):
+        code = _cell(grid, row, 1)
+        record = records.get(code)
+        if record is None or code in seen:
+            continue
+        seen.add(code)
+        fields = sheet_fields(record)
+        wanted = {2: fields["activity_code"]}
+        wanted.update({col: fields[key] for key, col in SHEET_COLUMNS if key in fields})
+        cells = {col: value for col, value in wanted.items() if _cell(grid, row, col) != value}
+        if cells:
+            changes[row] = cells
+    return changes
+
+
+def sync_worksheet(worksheet, records: Dict[str, Activity], batch_rows: int, dry_run: bool) -> Dict[str, int]:
+    """Diff one worksheet against the records and write the changed cells. Returns the counts for the summary."""
+    grid = worksheet.get_all_values()
+    changes = sheet_diff(grid, records)
+    stats = {
+        "rows": max(0, len(grid) - 1),
+        "changed_rows": len(changes),
+        "changed_cells": sum(len(cells) for cells in changes.values()),
+        "api_calls": 1,  # get_all_values
+    }
+    if dry_run or not changes:
+        return stats
+
+    format_column_b_as_text(worksheet)
+    # Never flushed by time: one batch_update per batch_rows changed rows, plus the last partial one
+    writer = BufferedSheetWriter(worksheet, flush_rows=batch_rows, flush_seconds=float("inf"))
+    for row in sorted(changes):
+        writer.update_row(row, changes[row])
+    writer.close()
+    stats["api_calls"] += 1 + writer.api_calls  # + format
+    return stats
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Sync locally stored results to the EN/AR worksheets (cell diff, bulk writes)")
+    parser.add_argument("--lang", type=parse_langs, default=parse_langs("en,ar"),
+                        help="Worksheets to sync: en, ar or en,ar (default en,ar)")
+    parser.add_argument("--from", dest="source", choices=sorted(SINKS), default="sqlite",
+                        help="Local sink to read the results from (default sqlite)")
+    parser.add_argument("--batch-rows", type=int, default=500, help="Changed rows per batch_update call (default 500)")
+    parser.add_argument("--dry-run", action="store_true", help="Only report what would change")
+    args = parser.parse_args()
+
+    sink = open_local_sinks([args.source])[0]
+    try:
+        records = {lang: sink.read_activities(lang) for lang in args.lang}
+    finally:
+        sink.close()
+
+    spreadsheet = connect_to_spreadsheet()
+
+    print("\n" + "="*70)
+    print(f"SHEET SYNC ({args.source} -> {', '.join(WORKSHEET_NAMES[lang] for lang in args.lang)})"
+          + (" [dry run]" if args.dry_run else ""))
+    print("="*70)
+    for lang in args.lang:
+        worksheet = spreadsheet.worksheet(WORKSHEET_NAMES[lang])
+        stats = sync_worksheet(worksheet, records[lang], max(1, args.batch_rows), args.dry_run)
+        print(f"{WORKSHEET_NAMES[lang]}: {len(records[lang])} local records, {stats['rows']} sheet rows, "
+              f"{stats['changed_rows']} rows / {stats['changed_cells']} cells changed, "
+              f"{stats['api_calls']} API calls")
+    print("="*70)
+
+
+if __name__ == "__main__":
+    main()
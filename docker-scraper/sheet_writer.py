@@ -0,0 +1,288 @@
+# pyright: reportMissingImports=false
+"""
+Buffered Google Sheets writer.
+
+Collects cell writes in memory and pushes them with a single
+`worksheet.batch_update` call every N rows or T seconds, instead of one
+`update_cell` round-trip per cell.
+
+BackgroundSheetWriter moves those batch updates to a thread. The scraping loop
+only puts rows on a bounded queue, so browser work and sheet I/O overlap, and
+a shared TokenBucket keeps all worksheets under the Sheets per-minute write quota.
+"""
+import queue
+import random
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from gspread.exceptions import APIError
+from gspread.utils import rowcol_to_a1
+
+from tracing import stage
+
+# HTTP statuses worth retrying (quota exceeded / transient backend errors)
+RETRY_STATUSES = (429, 500, 502, 503)
+
+
+# Sheets API: 60 write requests per minute per user (and 300 per project)
+DEFAULT_WRITES_PER_MINUTE = 60
+
+
+def _status_of(error: APIError) -> Optional[int]:
+    try:
+        return error.response.status_code
+    except Exception:
+        return None
+
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate_per_minute` tokens per minute, bursts of up to `burst`."""
+
+    def __init__(self, rate_per_minute: float = DEFAULT_WRITES_PER_MINUTE, burst: int = 5):
+        self.rate = max(0.1, rate_per_minute) / 60.0
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+        self.waited = 0.0
+
+    def acquire(self) -> float:
+        """Take one token, sleeping until one is available. Returns the seconds waited."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    self.waited += waited
+                    return waited
+                delay = (1 - self.tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+
+class BufferedSheetWriter:
+    """
+    Drop-in replacement for the `worksheet.update_cell` calls in the scrapers.
+
+    Usage:
+        with BufferedSheetWriter(worksheet, flush_rows=20, flush_seconds=30) as writer:
+            writer.update_cell(row, col, value)
+    """
+
+    def __init__(self, worksheet, flush_rows: int = 20, flush_seconds: float = 30.0,
+                 max_retries: int = 6, backoff_base: float = 2.0, limiter: Optional[TokenBucket] = None):
+        self.worksheet = worksheet
+        self.limiter = limiter
+        self.flush_rows = max(1, flush_rows)
+        self.flush_seconds = flush_seconds
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self._pending: Dict[int, Dict[int, str]] = {}
+        self._last_flush = time.time()
+        self.api_calls = 0
+        # Called after every successful flush (everything buffered so far is on the sheet)
+        self.on_flush: Optional[Callable[[], None]] = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    def update_cell(self, row: int, col: int, value) -> None:
+        """Buffer a single cell write (same arguments as gspread's update_cell)."""
+        self._pending.setdefault(row, {})[col] = "" if value is None else str(value)
+        if self._should_flush():
+            self.flush()
+
+    def update_row(self, row: int, values: Dict[int, str]) -> None:
+        """Buffer several cells of the same row ({col: value})."""
+        for col, value in values.items():
+            self._pending.setdefault(row, {})[col] = "" if value is None else str(value)
+        if self._should_flush():
+            self.flush()
+
+    @property
+    def pending_rows(self) -> int:
+        return len(self._pending)
+
+    def _should_flush(self) -> bool:
+        if len(self._pending) >= self.flush_rows:
+            return True
+        return (time.time() - self._last_flush) >= self.flush_seconds
+
+    def _build_ranges(self) -> List[dict]:
+        """Turn the buffer into A1 ranges, one per run of adjacent columns, in row order."""
+        data = []
+        for row in sorted(self._pending):
+            cells = self._pending[row]
+            cols = sorted(cells)
+            run_start = cols[0]
+            run_values = [cells[run_start]]
+            for prev, col in zip(cols, cols[1:]):
+                if col == prev + 1:
+                    run_values.append(cells[col])
+                    continue
+                data.append(self._range(row, run_start, run_values))
+                run_start, run_values = col, [cells[col]]
+            data.append(self._range(row, run_start, run_values))
+        return data
+
+    @staticmethod
+    def _range(row: int, start_col: int, values: List[str]) -> dict:
+        first = rowcol_to_a1(row, start_col)
+        last = rowcol_to_a1(row, start_col + len(values) - 1)
+        return {"range": f"{first}:{last}", "values": [values]}
+
+    def flush(self) -> bool:
+        """Push everything buffered so far. Returns False if the write kept failing (buffer is kept)."""
+        self._last_flush = time.time()
+        if not self._pending:
+            self._flushed()
+            return True
+
+        data = self._build_ranges()
+        with stage("sheet_flush", rows=len(self._pending)):
+            return self._send(data)
+
+    def _send(self, data: List[dict]) -> bool:
+        for attempt in range(self.max_retries + 1):
+            if self.limiter is not None:
+                self.limiter.acquire()
+            try:
+                # RAW keeps codes like "013001" as text, in line with Column B's TEXT format
+                self.worksheet.batch_update(data, value_input_option="RAW")
+                self.api_calls += 1
+                self._pending.clear()
+                self._flushed()
+                return True
+            except APIError as e:
+                status = _status_of(e)
+                if status not in RETRY_STATUSES or attempt == self.max_retries:
+                    print(f"Warning: Sheet batch update failed ({status}): {e}")
+                    return False
+                delay = self.backoff_base ** attempt + random.uniform(0, 1)
+                print(f"Sheets API returned {status}, retrying in {delay:.1f}s ...")
+                time.sleep(delay)
+            except Exception as e:
+                print(f"Warning: Sheet batch update failed: {e}")
+                return False
+        return False
+
+    def _flushed(self) -> None:
+        if self.on_flush is not None:
+            self.on_flush()
+
+    def close(self) -> None:
+        """Final flush on shutdown."""
+        if not self.flush() and self._pending:
+            print(f"Warning: {len(self._pending)} rows could not be written to the sheet")
+
+
+class BackgroundSheetWriter:
+    """
+    Same interface as BufferedSheetWriter, but the batch updates run on a background thread.
+
+    update_cell/update_row only queue the write (blocking when `queue_size` rows are waiting,
+    which throttles the scraper instead of growing memory). flush() and close() wait for the
+    thread. `on_flush` is called on the caller's thread, on its next call into the writer,
+    so callbacks may use objects that are not thread-safe (e.g. the checkpoint store's SQLite connection),
+    and only for flushes that covered every row queued before that call.
+    """
+
+    _FLUSH = object()
+    _STOP = object()
+
+    def __init__(self, worksheet, flush_rows: int = 20, flush_seconds: float = 30.0,
+                 limiter: Optional[TokenBucket] = None, queue_size: int = 200):
+        self._writer = BufferedSheetWriter(worksheet, flush_rows=flush_rows, flush_seconds=flush_seconds,
+                                           limiter=limiter)
+        self._writer.on_flush = self._record_flush
+        self.worksheet = worksheet
+        self.flush_seconds = flush_seconds
+        self.on_flush: Optional[Callable[[], None]] = None
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max(1, queue_size))
+        # Rows queued (caller's thread) / rows handed to the inner writer (background thread)
+        self._queued = 0
+        self._applied = 0
+        self._flushes: "queue.SimpleQueue[int]" = queue.SimpleQueue()
+        self._replies: "queue.SimpleQueue[bool]" = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run, name=f"sheet-writer-{worksheet.title}", daemon=True)
+        self._thread.start()
+        self._closed = False
+
+    @property
+    def api_calls(self) -> int:
+        return self._writer.api_calls
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    def update_cell(self, row: int, col: int, value) -> None:
+        self.update_row(row, {col: value})
+
+    def update_row(self, row: int, values: Dict[int, str]) -> None:
+        self._dispatch()
+        self._queue.put((row, dict(values)))
+        self._queued += 1
+
+    def flush(self) -> bool:
+        """Push everything queued so far and wait for it. Returns False if the write kept failing."""
+        self._queue.put(self._FLUSH)
+        ok = self._replies.get()
+        self._dispatch()
+        return ok
+
+    def close(self) -> None:
+        """Final flush and stop the thread."""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(self._STOP)
+        self._thread.join()
+        self._dispatch()
+
+    # Background thread
+    def _run(self) -> None:
+        while True:
+            try:
+                item = self._queue.get(timeout=max(0.1, self.flush_seconds))
+            except queue.Empty:
+                # Nothing new for flush_seconds: push what is buffered
+                if self._writer.pending_rows:
+                    self._writer.flush()
+                continue
+            if item is self._STOP:
+                self._writer.close()
+                return
+            if item is self._FLUSH:
+                self._replies.put(self._writer.flush())
+                continue
+            row, values = item
+            self._applied += 1
+            self._writer.update_row(row, values)
+
+    def _record_flush(self) -> None:
+        self._flushes.put(self._applied)
+
+    def _dispatch(self) -> None:
+        """
+        Run on_flush for the flushes the thread completed since the last call (caller's thread).
+        A flush that missed rows still waiting in the queue is skipped: a later one will cover them.
+        """
+        while True:
+            try:
+                applied = self._flushes.get_nowait()
+            except queue.Empty:
+                return
+            if applied >= self._queued and self.on_flush is not None:
+                self.on_flush()
@@ -0,0 +1,275 @@
+# pyright: reportMissingImports=false
+"""
+Local output sinks: an alternative (or addition) to the Google Sheets "Filter" spreadsheet.
+
+    --sink sheets            the spreadsheet only (default)
+    --sink sqlite            output/scrape.sqlite3 (tables `codes` and `activities`)
+    --sink csv               output/codes.csv, output/activities.csv
+    --sink parquet           output/codes.parquet, output/activities.parquet (needs pyarrow)
+    --sink sqlite,sheets     both
+
+Activity rows are upserted by (activity_code, lang) and written in bulk: records are
+buffered and flushed every `flush_rows` rows in one transaction / one file rewrite.
+A row holds the Sheets text of the record (records.sheet_fields) plus the record
+itself as JSON. The code listing is replaced as a whole on every listing run.
+
+Like BufferedSheetWriter, a sink calls `on_flush` after each successful flush, so the
+checkpoint store only marks codes done once they are on disk.
+"""
+import argparse
+import csv
+import os
+import sqlite3
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from records import Activity, sheet_fields
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # optional, only needed for --sink parquet
+    pyarrow = None
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+OUTPUT_DIR = os.path.join(SCRIPT_DIR, "output")
+
+SINK_KINDS = ("sheets", "sqlite", "csv", "parquet")
+ACTIVITY_COLUMNS = ["activity_code", "lang", "name_en", "name_ar", "locations", "eligible", "approvals",
+                    "record", "updated_at"]
+CODE_COLUMNS = ["position", "code"]
+
+
+def activity_row(record: Activity, now: float) -> Dict[str, object]:
+    """Flat row of a record: the Sheets text, the record as JSON and the write time."""
+    fields = sheet_fields(record)
+    return {
+        "activity_code": record.code,
+        "lang": record.lang,
+        "name_en": fields.get("name_en"),
+        "name_ar": fields.get("name_ar"),
+        "locations": fields.get("locations", ""),
+        "eligible": fields["eligible"],
+        "approvals": fields["approvals"],
+        "record": record.to_json(),
+        "updated_at": now,
+    }
+
+
+class LocalSink:
+    """Buffers records and upserts them in bulk; subclasses implement _write_rows and write_codes."""
+
+    name = ""
+
+    def __init__(self, directory: str = OUTPUT_DIR, flush_rows: int = 500):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.flush_rows = max(1, flush_rows)
+        self._pending: Dict[Tuple[str, str], Activity] = {}
+        self.rows_written = 0
+        # Called after every successful flush (everything buffered so far is on disk)
+        self.on_flush: Optional[Callable[[], None]] = None
+
+    def upsert(self, records: Iterable[Activity]) -> None:
+        """Buffer records; the last one per (code, lang) wins."""
+        for record in records:
+            self._pending[(record.code, record.lang)] = record
+        if len(self._pending) >= self.flush_rows:
+            self.flush()
+
+    def flush(self) -> bool:
+        """Write everything buffered so far. Returns False if the write failed (buffer is kept)."""
+        if self._pending:
+            now = time.time()
+            rows = [activity_row(record, now) for record in self._pending.values()]
+            try:
+                self._write_rows(rows)
+            except Exception as e:
+                print(f"Warning: {self.name} sink write failed: {e}")
+                return False
+            self.rows_written += len(rows)
+            self._pending.clear()
+        if self.on_flush is not None:
+            self.on_flush()
+        return True
+
+    def _write_rows(self, rows: List[Dict[str, object]]) -> None:
+        raise NotImplementedError
+
+    def write_codes(self, codes: List[str]) -> int:
+        """Replace the stored code listing. Returns the number of codes written."""
+        raise NotImplementedError
+
+    def read_activities(self, lang: str) -> Dict[str, Activity]:
+        """code -> stored record of one language (read back by sheet_sync.py)."""
+        raise NotImplementedError
+
+    def close(self) -> None:
+        if not self.flush() and self._pending:
+            print(f"Warning: {len(self._pending)} rows could not be written to the {self.name} sink")
+
+
+class SQLiteSink(LocalSink):
+    name = "sqlite"
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS activities (
+        activity_code TEXT NOT NULL,
+        lang          TEXT NOT NULL,
+        name_en       TEXT,
+        name_ar       TEXT,
+        locations     TEXT,
+        eligible      TEXT,
+        approvals     TEXT,
+        record        TEXT NOT NULL,
+        updated_at    REAL NOT NULL,
+        PRIMARY KEY (activity_code, lang)
+    );
+    CREATE TABLE IF NOT EXISTS codes (
+        position INTEGER NOT NULL,
+        code     TEXT PRIMARY KEY
+    );
+    """
+
+    def __init__(self, directory: str = OUTPUT_DIR, flush_rows: int = 500, filename: str = "scrape.sqlite3"):
+        super().__init__(directory, flush_rows)
+        self.path = os.path.join(directory, filename)
+        self.conn = sqlite3.connect(self.path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(self.SCHEMA)
+
+    def _write_rows(self, rows: List[Dict[str, object]]) -> None:
+        columns = ", ".join(ACTIVITY_COLUMNS)
+        # A name that could not be read (NULL) keeps the stored one
+        updates = ", ".join(
+            f"{c} = COALESCE(excluded.{c}, {c})" if c.startswith("name_") else f"{c} = excluded.{c}"
+            for c in ACTIVITY_COLUMNS[2:]
+        )
+        with self.conn:
+            self.conn.executemany(
+                f"INSERT INTO activities ({columns}) VALUES ({', '.join('?' * len(ACTIVITY_COLUMNS))}) "
+                f"ON CONFLICT (activity_code, lang) DO UPDATE SET {updates}",
+                [tuple(row[c] for c in ACTIVITY_COLUMNS) for row in rows],
+            )
+
+    def write_codes(self, codes: List[str]) -> int:
+        codes = list(dict.fromkeys(codes))
+        with self.conn:
+            self.conn.execute("DELETE FROM codes")
+            self.conn.executemany("INSERT INTO codes (position, code) VALUES (?, ?)", list(enumerate(codes)))
+        return len(codes)
+
+    def read_activities(self, lang: str) -> Dict[str, Activity]:
+        rows = self.conn.execute("SELECT activity_code, record FROM activities WHERE lang = ?", (lang,))
+        return {code: Activity.from_json(record) for code, record in rows}
+
+    def close(self) -> None:
+        super().close()
+        self.conn.close()
+
+
+class _TableFileSink(LocalSink):
+    """
+    Sinks backed by whole files (CSV, Parquet): the table is held in memory, keyed by
+    (activity_code, lang), and the file is rewritten atomically on every flush.
+    """
+
+    extension = ""
+
+    def __init__(self, directory: str = OUTPUT_DIR, flush_rows: int = 500):
+        super().__init__(directory, flush_rows)
+        self.activities_path = os.path.join(directory, f"activities.{self.extension}")
+        self.codes_path = os.path.join(directory, f"codes.{self.extension}")
+        self._table: Dict[Tuple[str, str], Dict[str, object]] = {}
+        if os.path.exists(self.activities_path):
+            for row in self._load(self.activities_path):
+                self._table[(str(row["activity_code"]), str(row["lang"]))] = row
+
+    def _write_rows(self, rows: List[Dict[str, object]]) -> None:
+        for row in rows:
+            key = (row["activity_code"], row["lang"])
+            previous = self._table.get(key)
+            if previous is not None:
+                # A name that could not be read keeps the stored one (as in SQLiteSink)
+                row = {**row, **{c: previous.get(c) for c in ("name_en", "name_ar") if row[c] is None}}
+            self._table[key] = row
+        self._replace(self.activities_path, ACTIVITY_COLUMNS, list(self._table.values()))
+
+    def write_codes(self, codes: List[str]) -> int:
+        codes = list(dict.fromkeys(codes))
+        self._replace(self.codes_path, CODE_COLUMNS, [{"position": i, "code": c} for i, c in enumerate(codes)])
+        return len(codes)
+
+    def read_activities(self, lang: str) -> Dict[str, Activity]:
+        return {code: Activity.from_json(str(row["record"])) for (code, row_lang), row in self._table.items()
+                if row_lang == lang}
+
+    def _replace(self, path: str, columns: List[str], rows: List[Dict[str, object]]) -> None:
+        tmp_path = path + ".tmp"
+        self._save(tmp_path, columns, rows)
+        os.replace(tmp_path, path)
+
+    def _load(self, path: str) -> List[Dict[str, object]]:
+        raise NotImplementedError
+
+    def _save(self, path: str, columns: List[str], rows: List[Dict[str, object]]) -> None:
+        raise NotImplementedError
+
+
+class CSVSink(_TableFileSink):
+    name = "csv"
+    extension = "csv"
+
+    def _load(self, path: str) -> List[Dict[str, object]]:
+        with open(path, "r", encoding="utf-8-sig", newline="") as f:
+            return list(csv.DictReader(f))
+
+    def _save(self, path: str, columns: List[str], rows: List[Dict[str, object]]) -> None:
+        # utf-8-sig so that Excel shows the Arabic columns correctly
+        with open(path, "w", encoding="utf-8-sig", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=columns)
+            writer.writeheader()
+            writer.writerows(rows)
+
+
+class ParquetSink(_TableFileSink):
+    name = "parquet"
+    extension = "parquet"
+
+    def __init__(self, directory: str = OUTPUT_DIR, flush_rows: int = 500):
+        if pyarrow is None:
+            raise RuntimeError("pyarrow is not installed (pip install pyarrow)")
+        super().__init__(directory, flush_rows)
+
+    def _load(self, path: str) -> List[Dict[str, object]]:
+        return pyarrow.parquet.read_table(path).to_pylist()
+
+    def _save(self, path: str, columns: List[str], rows: List[Dict[str, object]]) -> None:
+        table = pyarrow.Table.from_pylist(rows) if rows else pyarrow.table({c: [] for c in columns})
+        pyarrow.parquet.write_table(table.select(columns), path)
+
+
+SINKS = {
+    "sqlite": SQLiteSink,
+    "csv": CSVSink,
+    "parquet": ParquetSink,
+}
+
+
+def parse_sinks(value: str) -> List[str]:
+    """argparse type for --sink: a comma separated list of SINK_KINDS."""
+    kinds = []
+    for part in value.split(","):
+        kind = part.strip().lower()
+        if kind not in SINK_KINDS:
+            raise argparse.ArgumentTypeError(f"unknown sink '{part}' (use {', '.join(SINK_KINDS)})")
+        if kind not in kinds:
+            kinds.append(kind)
+    if not kinds:
+        raise argparse.ArgumentTypeError("no sink given")
+    return kinds
+
+
+def open_local_sinks(kinds: Iterable[str], directory: str = OUTPUT_DIR, flush_rows: int = 500) -> List[LocalSink]:
+    """The local sinks among `kinds` ("sheets" is handled by the scripts themselves)."""
+    return [SINKS[kind](directory, flush_rows) for kind in kinds if kind in SINKS]
@@ -0,0 +1,64 @@
+"""
+Make the scripts importable for tests without a browser or Google credentials.
+
+The browser and Sheets packages (seleniumbase, selenium, gspread, oauth2client)
+are only replaced by empty stand-ins when they are not installed; tests stub
+the functions that would use them.
+"""
+import importlib.util
+import os
+import sys
+import types
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class _Placeholder:
+    def __init__(self, *args, **kwargs):
+        raise RuntimeError("not available in tests (package not installed)")
+
+
+class _PlaceholderError(Exception):
+    pass
+
+
+STAND_INS = {
+    "seleniumbase": {"Driver": _Placeholder},
+    "selenium": {},
+    "selenium.webdriver": {},
+    "selenium.webdriver.common": {},
+    "selenium.webdriver.common.by": {"By": _Placeholder},
+    "selenium.webdriver.common.keys": {"Keys": _Placeholder},
+    "selenium.webdriver.support": {},
+    "selenium.webdriver.support.ui": {"WebDriverWait": _Placeholder},
+    "selenium.webdriver.support.expected_conditions": {},
+    "selenium.common": {},
+    "selenium.common.exceptions": {
+        "TimeoutException": _PlaceholderError,
+        "NoSuchElementException": _PlaceholderError,
+        "StaleElementReferenceException": _PlaceholderError,
+    },
+    "gspread": {},
+    "gspread.exceptions": {"APIError": _PlaceholderError},
+    "gspread.utils": {"rowcol_to_a1": _Placeholder},
+    "oauth2client": {},
+    "oauth2client.service_account": {"ServiceAccountCredentials": _Placeholder},
+}
+
+
+def _install_stand_ins() -> None:
+    for top in {name.split(".")[0] for name in STAND_INS}:
+        if importlib.util.find_spec(top) is not None:
+            # Installed: use the real packages
+            for name in [n for n in STAND_INS if n.split(".")[0] == top]:
+                del STAND_INS[name]
+    for name, attrs in STAND_INS.items():
+        module = types.ModuleType(name)
+        module.__dict__.update(attrs)
+        sys.modules[name] = module
+        parent, _, child = name.rpartition(".")
+        if parent:
+            setattr(sys.modules[parent], child, module)
+
+
+_install_stand_ins()
@@ -0,0 +1,82 @@
+"""
+scrape_activity_code with the browser steps stubbed out.
+
+    python -m pytest docker-scraper/tests
+"""
+import pytest
+
+import details_engine
+
+
+@pytest.fixture
+def page(monkeypatch):
+    """A details page that arrives in English; `reads[lang]` decides whether reading lang succeeds."""
+    reads = {"en": True, "ar": True}
+    monkeypatch.setattr(details_engine, "navigate_to_details", lambda driver, code: False)
+    monkeypatch.setattr(details_engine, "page_weight", lambda driver: (0, 0))
+    monkeypatch.setattr(details_engine, "_get_lang", lambda driver: "en")
+    monkeypatch.setattr(details_engine, "set_language", lambda driver, lang: True)
+
+    def read_language_fields(driver, lang, names, sections, full):
+        if not reads[lang]:
+            return False
+        names["activity_code"] = "013001"
+        names[f"name_{lang}"] = f"name in {lang}"
+        if full:
+            sections[lang] = details_engine.Activity(code="013001", lang=lang)
+        return True
+
+    monkeypatch.setattr(details_engine, "read_language_fields", read_language_fields)
+    return reads
+
+
+def test_both_languages(page):
+    ok, _, error, records = details_engine.scrape_activity_code(None, "013001", ["en", "ar"])
+    assert ok and error is None
+    assert sorted(records) == ["ar", "en"]
+    assert records["ar"].name_en == "name in en"
+    assert records["ar"].name_ar == "name in ar"
+
+
+def test_second_language_read_fails(page):
+    page["ar"] = False
+    ok, _, error, records = details_engine.scrape_activity_code(None, "013001", ["en", "ar"])
+    assert not ok
+    assert error == "Activity code not found after switching to 'ar'"
+    assert records == {}
+
+
+def test_second_language_not_scraped(page):
+    # --lang en: the Arabic name is only a bonus, its absence leaves Column C alone
+    page["ar"] = False
+    ok, _, error, records = details_engine.scrape_activity_code(None, "013001", ["en"])
+    assert ok and error is None
+    assert list(records) == ["en"]
+    assert records["en"].name_ar is None
+
+
+def test_fast_path_fetches_only_scraped_languages(monkeypatch):
+    fetched = []
+
+    def fetch_details(code, lang):
+        fetched.append(lang)
+        return {"lang": lang, "activity_code": code, "name": f"name in {lang}",
+                "locations": [], "eligible": [], "approvals": []}
+
+    monkeypatch.setattr(details_engine, "fetch_details", fetch_details)
+    records = details_engine.try_fast_path("013001", ["en"])
+    assert fetched == ["en"]
+    assert list(records) == ["en"]
+    assert records["en"].name_en == "name in en"
+    assert records["en"].name_ar is None
+
+
+@pytest.mark.parametrize("heading, no_approval_text, expected", [
+    (False, "This activity does not require any approval", []),
+    (False, "", []),
+    (True, "", None),                      # heading but no panel: failed to load
+    (False, "1. Commercial registration", None),
+])
+def test_read_approvals_without_panels(heading, no_approval_text, expected):
+    page = {"approvals": [], "approvals_heading": heading, "no_approval_text": no_approval_text}
+    assert details_engine.read_approvals(None, page) == expected
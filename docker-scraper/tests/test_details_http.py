@@ -0,0 +1,83 @@
+"""
+parse_details_html against saved details pages (tests/fixtures/, markup of bench/mock_portal.py).
+
+    python -m pytest docker-scraper/tests
+"""
+import os
+import re
+import types
+
+import pytest
+
+from details_http import NeedsBrowser, fetch_details, parse_details_html
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+def load(name: str) -> str:
+    with open(os.path.join(FIXTURES_DIR, name), "r", encoding="utf-8") as f:
+        return f.read()
+
+
+def test_static_page_en():
+    page = parse_details_html(load("details_static.en.html"), "002661")
+    assert page["lang"] == "en"
+    assert page["activity_code"] == "002661"
+    assert page["name"] == "Installation of jewellery"
+    assert page["locations"] == [("Residential", "Home business", "2000 QAR")]
+    assert page["eligible"] == ["Allowed for Qatari nationals"]
+    assert page["approvals"] == [
+        ("Commercial registration", "Ministry of Commerce"),
+        ("Health license", "Ministry of Public Health"),
+    ]
+    assert page["no_approvals"] is False
+
+
+def test_static_page_ar():
+    page = parse_details_html(load("details_static.ar.html"), "002661")
+    assert page["lang"] == "ar"
+    assert page["name"] == "تركيب المجوهرات"
+    assert page["locations"] == [("سكني", "عمل منزلي", "2000 QAR")]
+    assert page["approvals"] == [("السجل التجاري", "وزارة التجارة"), ("ترخيص صحي", "وزارة الصحة العامة")]
+
+
+def test_lazy_approval_panel_needs_browser():
+    # collapse0 is empty until its heading is clicked: the agency is not in the static HTML
+    with pytest.raises(NeedsBrowser, match="approval panel 0"):
+        parse_details_html(load("details_lazy_panel.en.html"), "010652")
+
+
+def test_other_code_needs_browser():
+    with pytest.raises(NeedsBrowser, match="expected 013001"):
+        parse_details_html(load("details_static.en.html"), "013001")
+
+
+def test_unrendered_template_needs_browser():
+    page_html = load("details_static.en.html").replace("<div>002661</div>", "<div>{{ activity.code }}</div>")
+    with pytest.raises(NeedsBrowser, match="needs JS"):
+        parse_details_html(page_html, "002661")
+
+
+class FakeSession:
+    """Answers every request with one saved page."""
+    def __init__(self, page_html: str):
+        self.page_html = page_html
+
+    def get(self, url, headers=None, timeout=None):
+        return types.SimpleNamespace(status_code=200, encoding="utf-8", text=self.page_html)
+
+
+def test_fetch_details_in_requested_language():
+    page = fetch_details("002661", "en", session=FakeSession(load("details_static.en.html")))
+    assert page["name"] == "Installation of jewellery"
+
+
+def test_fetch_details_other_language_needs_browser():
+    with pytest.raises(NeedsBrowser, match="served in 'en', wanted 'ar'"):
+        fetch_details("002661", "ar", session=FakeSession(load("details_static.en.html")))
+
+
+def test_fetch_details_unknown_language_needs_browser():
+    page_html = re.sub(r"<html[^>]*>", "<html>", load("details_static.en.html"), count=1)
+    with pytest.raises(NeedsBrowser, match="unknown language"):
+        fetch_details("002661", "en", session=FakeSession(page_html))
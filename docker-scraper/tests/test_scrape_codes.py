@@ -0,0 +1,17 @@
+"""
+Page ranges of the sharded listing (scrape_codes.py --shards).
+
+    python -m pytest docker-scraper/tests
+"""
+from scrape_codes import split_pages
+
+
+def test_split_pages_covers_every_page_once():
+    ranges = split_pages(100, 3)
+    assert ranges == [(1, 34), (35, 67), (68, 100)]
+    pages = [p for first, last in ranges for p in range(first, last + 1)]
+    assert pages == list(range(1, 101))
+
+
+def test_split_pages_more_shards_than_pages():
+    assert split_pages(2, 8) == [(1, 1), (2, 2)]
@@ -0,0 +1,198 @@
+"""
+Per-stage timing trace for the SeleniumBase scrapers (output/trace.jsonl).
+
+Off unless a script is started with --trace (or SCRAPER_TRACE=path is set);
+when off, the helpers below cost a function call and nothing else.
+
+    with trace_code(code):                  # attribute the stages below to a code
+        with stage("extract"):
+            ...
+
+    @traced("toggle")
+    def set_language(...): ...
+
+One JSON line per stage: {"run", "pid", "code", "stage", "ms", "ok", ...extra}.
+Worker processes append to the same file. Print a profile with
+
+    python tracing.py report                # last run: p50/p95/p99 per stage, slowest codes
+    python tracing.py report --all --top 20
+"""
+import argparse
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+TRACE_FILE = os.path.join(SCRIPT_DIR, "output", "trace.jsonl")
+
+# Stage that covers a whole code (sum of the others plus untraced work); used for "slowest codes"
+CODE_STAGE = "code"
+
+_path: Optional[str] = os.environ.get("SCRAPER_TRACE") or None
+_run: Optional[str] = os.environ.get("SCRAPER_TRACE_RUN") or None
+_file = None
+_file_pid: Optional[int] = None
+_lock = threading.Lock()
+_local = threading.local()
+
+
+def enable(path: str = TRACE_FILE) -> str:
+    """Start tracing to path. Also exported to the environment, so worker processes trace too."""
+    global _path, _run
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    _path = path
+    _run = _run or time.strftime("%Y%m%d-%H%M%S")
+    os.environ["SCRAPER_TRACE"] = path
+    os.environ["SCRAPER_TRACE_RUN"] = _run
+    return _run
+
+
+def enabled() -> bool:
+    return _path is not None
+
+
+def _emit(record: Dict) -> None:
+    global _file, _file_pid
+    line = json.dumps(record, ensure_ascii=False) + "\n"
+    with _lock:
+        # Forked workers inherit the parent's handle: reopen once per process
+        if _file is None or _file_pid != os.getpid():
+            _file = open(_path, "a", encoding="utf-8")
+            _file_pid = os.getpid()
+        _file.write(line)
+        _file.flush()
+
+
+@contextmanager
+def trace_code(code: str) -> Iterator[None]:
+    """Attribute the stages of this thread to `code`, and time the whole code as CODE_STAGE."""
+    previous = getattr(_local, "code", None)
+    _local.code = code
+    try:
+        with stage(CODE_STAGE):
+            yield
+    finally:
+        _local.code = previous
+
+
+@contextmanager
+def stage(name: str, **extra) -> Iterator[None]:
+    """Time the block as stage `name` of the current code. Exceptions are recorded as ok=false and re-raised."""
+    if _path is None:
+        yield
+        return
+    started = time.perf_counter()
+    ok = True
+    try:
+        yield
+    except BaseException:
+        ok = False
+        raise
+    finally:
+        _emit({
+            "run": _run,
+            "pid": os.getpid(),
+            "code": getattr(_local, "code", None),
+            "stage": name,
+            "ms": round((time.perf_counter() - started) * 1000, 1),
+            "ok": ok,
+            **extra,
+        })
+
+
+def traced(name: str):
+    """Decorator form of stage()."""
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with stage(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+# ----------------------------
+# Report
+# ----------------------------
+def load_trace(path: str, run: Optional[str] = None) -> List[Dict]:
+    """Records of one run (default: the last run in the file; "all" for every run)."""
+    records = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                continue # a line cut short by a crash
+    if run == "all" or not records:
+        return records
+    run = run or records[-1].get("run")
+    return [r for r in records if r.get("run") == run]
+
+
+def percentile(sorted_values: List[float], p: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, -(-len(sorted_values) * p // 100))  # ceil
+    return sorted_values[int(rank) - 1]
+
+
+def print_report(records: List[Dict], top: int = 10) -> None:
+    by_stage: Dict[str, List[float]] = {}
+    failures: Dict[str, int] = {}
+    for r in records:
+        by_stage.setdefault(r["stage"], []).append(r["ms"])
+        failures[r["stage"]] = failures.get(r["stage"], 0) + (0 if r.get("ok", True) else 1)
+
+    runs = sorted({r.get("run") for r in records if r.get("run")})
+    codes_total = sum(by_stage.get(CODE_STAGE, []))
+
+    print("\n" + "="*86)
+    print(f"TRACE REPORT ({', '.join(runs) or 'no run id'})")
+    print("="*86)
+    print(f"{'Stage':<16}{'Count':>7}{'Fail':>6}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'Max ms':>10}{'Total s':>9}{'Share':>8}")
+    for name, values in sorted(by_stage.items(), key=lambda item: -sum(item[1])):
+        values.sort()
+        total = sum(values)
+        share = f"{total / codes_total:.0%}" if codes_total and name != CODE_STAGE else ""
+        print(f"{name:<16}{len(values):>7}{failures[name]:>6}{percentile(values, 50):>10.0f}{percentile(values, 95):>10.0f}"
+              f"{percentile(values, 99):>10.0f}{values[-1]:>10.0f}{total / 1000:>9.1f}{share:>8}")
+
+    per_code: Dict[str, Dict[str, float]] = {}
+    for r in records:
+        if r.get("code"):
+            per_code.setdefault(r["code"], {}).setdefault(r["stage"], 0.0)
+            per_code[r["code"]][r["stage"]] += r["ms"]
+    slowest = sorted(per_code.items(), key=lambda item: -item[1].get(CODE_STAGE, 0.0))[:top]
+    if slowest:
+        print(f"\nSlowest codes:")
+        for code, stages in slowest:
+            parts = ", ".join(f"{name} {ms / 1000:.1f}s" for name, ms in
+                              sorted(stages.items(), key=lambda item: -item[1]) if name != CODE_STAGE)
+            print(f"  {code:<10}{stages.get(CODE_STAGE, 0.0) / 1000:>7.1f}s  ({parts})")
+    print("="*86)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Per-stage timing report of a scraper trace")
+    sub = parser.add_subparsers(dest="command", required=True)
+    report = sub.add_parser("report", help="p50/p95/p99 per stage and the slowest codes")
+    report.add_argument("--trace", default=TRACE_FILE, help=f"Trace file (default {TRACE_FILE})")
+    report.add_argument("--run", default=None, help="Run id to report (default: the last run)")
+    report.add_argument("--all", action="store_true", help="Report every run in the file")
+    report.add_argument("--top", type=int, default=10, help="Slowest codes to list (default 10)")
+    args = parser.parse_args()
+
+    records = load_trace(args.trace, "all" if args.all else args.run)
+    if not records:
+        print(f"No trace records in {args.trace}")
+        return
+    print_report(records, args.top)
+
+
+if __name__ == "__main__":
+    main()